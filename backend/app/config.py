@@ -10,12 +10,91 @@ class Settings(BaseSettings):
     google_api_key: str | None = None
     google_cse_id: str | None = None
     openai_api_key: str | None = None
+    openai_base_url: str = "https://api.openai.com/v1"  # OpenAI-compatible endpoint (proxy, local stub)
 
     # Data stores
     database_url: str | None = None
     redis_url: str | None = None
 
-    # Frontend origin for CORS (e.g., https://your-project.vercel.app)
+    # Upstream fan-out: overall budget for the concurrent CSE group queries
+    search_deadline_seconds: float = 8.0
+
+    # Articles per search, picked across left/center/right by outlet score;
+    # at most this share may be unknown outlets (each costs an AI call)
+    search_result_count: int = 12
+    selection_max_unknown_share: float = 0.34
+
+    # End-to-end budget for one search (CSE fan-out, AI classification):
+    # upstream timeouts shrink to what is left, and a stage the rest cannot
+    # cover is skipped (unknown outlets keep their outlet score). 0: no limit
+    search_budget_seconds: float = 12.0
+
+    # Speculative search: answer with outlet scores at once and classify the
+    # unknown outlets in background jobs (poll /search/{job}/refinements).
+    # Needs a long-lived process; off by default for serverless deployments.
+    search_speculative: bool = False
+    refine_concurrency: int = 4
+    refine_job_ttl_seconds: int = 600
+
+    # "Load more" (/search/more?cursor=...): continuation state is kept
+    # server-side for this long after a page, so later pages fetch and
+    # classify only new results
+    search_cursor_ttl_seconds: int = 1800
+    search_cursor_max_entries: int = 1000
+
+    # Near-duplicate results: max differing bits between 64-bit SimHashes of title + snippet
+    dedup_max_distance: int = 6
+
+    # Multi-worker mode: CSE/OpenAI pacing, daily quota, circuit breaker state
+    # and the query cache are shared through this backend ("redis" uses
+    # redis_url; "memory" is an in-process stand-in). Unset: per process.
+    shared_state_backend: str | None = None
+
+    # Upstream pacing and circuit breaking (0 disables a limit)
+    google_cse_qps: float = 5.0
+    google_cse_daily_quota: int = 0  # e.g. 100 on the free tier
+    openai_rpm: int = 500
+    openai_tpm: int = 200_000
+    upstream_max_wait_seconds: float = 2.0
+    # Hedging: a duplicate request goes out when one outlives this quantile
+    # of the upstream's recent latency, for at most this share of requests
+    upstream_hedging: bool = True
+    upstream_hedge_quantile: float = 0.95
+    upstream_hedge_max_share: float = 0.1
+
+    # AI classification cache (in-process LRU + durable tier from the stores above)
+    classification_cache_max_entries: int = 4096
+    classification_cache_ttl_seconds: int = 7 * 24 * 3600
+
+    # Classified /search responses: fresh for ttl, then served stale while refreshing
+    search_cache_ttl_seconds: int = 300
+    search_cache_stale_seconds: int = 3600
+    search_cache_max_entries: int = 512
+
+    # Background ingestion: re-runs these topics plus the most popular recent
+    # queries every interval, off the request path, to keep them warm in the
+    # query cache. Off by default (serverless deployments have no lifespan).
+    ingest_enabled: bool = False
+    ingest_interval_seconds: int = 600
+    ingest_topics: list[str] = [
+        "latest news", "climate change", "immigration policy", "healthcare reform", "tax policy",
+        "education funding", "gun control", "trade policy", "social security", "minimum wage",
+    ]
+    ingest_popular_queries: int = 10
+    ingest_quota_share: float = 0.5  # stop a cycle once this share of the CSE daily quota is used
+
+    # Local SQLite/FTS5 store of every classified article (serves /articles/{id}
+    # and offline search); defaults to a SQLite database_url, else in-process
+    article_store_path: str | None = None
+
+    # Narratives are clustered incrementally from classified articles; on
+    # startup the most recent stored articles seed them
+    narrative_bootstrap_articles: int = 2000
+
+    # Outlet bias registry (JSON); defaults to the bundled app/data/outlets.json
+    outlet_registry_path: str | None = None
+
+    # Frontend origin for CORS (e.g., https://your-project.vercel.app; "*" allows any origin)
     frontend_origin: str | None = None
 
 
@@ -0,0 +1,389 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, HTTPException, Request
+from pydantic import BaseModel
+from typing import List, Literal, Dict, Any
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+import asyncio
+import logging
+import time
+
+from .services.google import get_api_status
+from .services.http import close_client
+from .services.article_store import article_store
+from .services.dimensions import dimension_engine
+from .services.ingest import ingest_worker
+from .services.metrics import render as render_metrics, request_latency, stage, start_trace
+from .services.narratives import narrative_index
+from .services.records import dumps as dump_json
+from .services.refine import refinement_queue
+from .services.pagination import first_page_token
+from .services.prompts import prompts
+from .services.search import cached_search_and_classify, search_more, speculative_search_and_classify, stream_search_and_classify
+from .services.search_cache import search_cache
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One event loop serves every request, so the pooled upstream client,
+    # caches and background refreshes all outlive individual requests.
+    # The client is created lazily on first use; release it on shutdown.
+    if settings.narrative_bootstrap_articles:
+        await narrative_index.absorb(await article_store.recent(settings.narrative_bootstrap_articles))
+    if settings.ingest_enabled:
+        ingest_worker.start()
+    yield
+    await ingest_worker.stop()
+    await refinement_queue.stop()
+    await close_client()
+
+
+app = FastAPI(title="Political Spectrum News Analyzer API", version="0.1.0", lifespan=lifespan)
+
+# CORS configuration - always allow localhost for development
+allowed_origins = [
+    "http://localhost:5173", 
+    "http://127.0.0.1:5173",
+    "http://localhost:3000",  # Additional common dev ports
+    "http://127.0.0.1:3000"
+]
+
+# Add production frontend origins
+if settings.frontend_origin:
+    allowed_origins.append(settings.frontend_origin)
+
+# Add Vercel patterns for any environment
+allowed_origins.extend([
+    "https://*.vercel.app",
+    "https://your-frontend-project.vercel.app"  # Replace with your actual frontend domain
+])
+
+logger.info(f"CORS allowed origins: {allowed_origins}")
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=allowed_origins,
+    allow_origin_regex=r"https://.*\.vercel\.app",  # allow_origins does not expand wildcards
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Every stage() entered while handling this request lands in its trace;
+    # streamed responses are timed until their headers go out.
+    trace = start_trace()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    request_latency.observe(elapsed, method=request.method, route=path, status=response.status_code)
+    if logger.isEnabledFor(logging.DEBUG):
+        stages = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in trace)
+        logger.debug(f"{request.method} {path} {response.status_code} {elapsed * 1000:.1f}ms {stages}")
+    return response
+
+
+class Article(BaseModel):
+    id: str | None = None
+    url: str
+    title: str
+    snippet: str
+    source: str
+    published_at: str | None = None
+    spectrum_score: float
+    confidence: float
+    method: Literal["outlet", "ai", "unknown"]
+    reasoning: str | None = None
+
+
+class RefinementJob(BaseModel):
+    job: str
+    status: Literal["queued", "running", "done", "failed"]
+    pending: int
+    poll: str
+
+
+class SearchResponse(BaseModel):
+    query: str
+    articles: List[Article]
+    api_status: dict | None = None
+    refinement: RefinementJob | None = None
+    cursor: str | None = None  # pass to /search/more for the next page
+
+
+class Refinement(BaseModel):
+    type: Literal["classification"]
+    id: str
+    spectrum_score: float
+    confidence: float
+    method: Literal["outlet", "ai", "unknown"]
+    reasoning: str | None = None
+
+
+class TokenSpend(BaseModel):
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    requests: int
+    truncated: int
+
+
+class RefinementsResponse(RefinementJob):
+    query: str
+    refinements: List[Refinement]
+    next: int
+    tokens: TokenSpend
+
+
+class SearchPage(BaseModel):
+    query: str
+    articles: List[Article]
+    page: int
+    cursor: str | None = None
+    tokens: TokenSpend
+
+
+class APIStatusResponse(BaseModel):
+    total_requests: int
+    failed_requests: int
+    success_rate: float
+    rate_limited: bool
+    quota_exceeded: bool
+    last_error: dict | None
+    last_request_time: str | None
+    api_configured: bool
+    classification_cache: dict | None = None
+    search_cache: dict | None = None
+    outlet_registry: dict | None = None
+    upstreams: dict | None = None
+    ingestion: dict | None = None
+    article_store: dict | None = None
+    narratives: dict | None = None
+    refinement: dict | None = None
+    prompts: dict | None = None
+
+
+class BiasDimensions(BaseModel):
+    factuality: float
+    economic: float
+    social: float
+    establishment: float
+    sensationalism: float
+
+
+class ArticleDetail(BaseModel):
+    id: str
+    article: Article
+    bias_dimensions: BiasDimensions | None = None
+    highlighted_phrases: List[Dict[str, str]]  # { text, dimension }
+    dimensions_method: Literal["ai", "lexicon"] | None = None
+
+
+class Narrative(BaseModel):
+    id: str
+    title: str
+    description: str
+    article_ids: List[str]
+    centroid_bias: BiasDimensions
+
+
+@app.get("/")
+async def root():
+    return {
+        "message": "News Analyzer API",
+        "version": "0.1.0",
+        "endpoints": {
+            "health": "/health",
+            "search": "/search?q=query",
+            "search_stream": "/search?q=query&stream=true",
+            "search_offline": "/search?q=query&offline=true&min_score=-1&max_score=1",
+            "search_speculative": "/search?q=query&speculative=true",
+            "search_refinements": "/search/{job}/refinements?since=0",
+            "search_more": "/search/more?cursor=...",
+            "api-status": "/api-status",
+            "metrics": "/metrics",
+            "articles": "/articles",
+            "narratives": "/narratives"
+        }
+    }
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/api-status", response_model=APIStatusResponse)
+async def api_status():
+    """Get current Google API usage status and rate limit information"""
+    return {**get_api_status(), "ingestion": ingest_worker.status(), "article_store": article_store.stats(),
+            "narratives": narrative_index.stats(), "refinement": refinement_queue.stats(), "prompts": prompts()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms and counters in Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def _json(payload: Any) -> Response:
+    # Encoded here in one pass rather than validated again through
+    # response_model (which stays for the schema), so encoding is timed
+    with stage("encode"):
+        body = dump_json(payload)
+    return Response(body, media_type="application/json")
+
+
+@app.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2),
+    stream: bool = False,
+    offline: bool = False,
+    speculative: bool | None = None,
+    min_score: float | None = Query(None, ge=-1.0, le=1.0),
+    max_score: float | None = Query(None, ge=-1.0, le=1.0),
+):
+    # min_score/max_score filter the JSON responses; streamed frames are unfiltered
+    def in_range(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            a for a in articles
+            if (min_score is None or a["spectrum_score"] >= min_score)
+            and (max_score is None or a["spectrum_score"] <= max_score)
+        ]
+    
+    async def from_index() -> List[Dict[str, Any]]:
+        return await article_store.search(q, limit=12, min_score=min_score, max_score=max_score)
+    
+    # Answer from the local full-text index only, without touching upstream
+    if offline:
+        return _json({"query": q, "articles": await from_index(), "api_status": {"served_from": "index"}})
+    
+    # Check if Google API is configured
+    if not settings.google_api_key or not settings.google_cse_id:
+        # Return empty results when no API keys are configured
+        return _json({
+            "query": q,
+            "articles": [],
+            "api_status": {
+                "error": "API not configured",
+                "message": "Google API keys not found in environment variables"
+            }
+        })
+    
+    # Popular queries are kept warm by the background ingestion worker
+    ingest_worker.record_query(q)
+    
+    # Get current API status
+    status = get_api_status()
+    
+    # Rate limited or out of quota: serve whatever we have cached for this
+    # query, else the best matches from the article index
+    if status["rate_limited"] or status["quota_exceeded"]:
+        cached = search_cache.peek(q)
+        return _json({
+            "query": q,
+            "articles": in_range(cached) if cached else await from_index(),
+            "api_status": {
+                "error": "quota_exceeded" if status["quota_exceeded"] else "rate_limited",
+                "message": "Google API rate limit or quota exceeded. Showing cached results where available.",
+                "details": status["last_error"],
+                "retry_in_seconds": status["upstreams"]["google_cse"]["retry_in_seconds"],
+                "served_from": "cache" if cached else "index"
+            }
+        })
+    
+    if stream:
+        # NDJSON frames: outlet-scored articles, then AI refinements, then a summary
+        async def frames():
+            async for frame in stream_search_and_classify(q):
+                yield dump_json(frame) + b"\n"
+        return StreamingResponse(frames(), media_type="application/x-ndjson")
+    
+    # Cached per normalized query: fresh hits skip CSE and OpenAI entirely,
+    # stale hits are refreshed in the background, and concurrent identical
+    # searches share one upstream fan-out. Speculative searches answer with
+    # outlet scores and leave the unknown outlets to a refinement job.
+    job = None
+    if settings.search_speculative if speculative is None else speculative:
+        results, job = await speculative_search_and_classify(q)
+    else:
+        results = await cached_search_and_classify(q)
+    articles = in_range(results)
+    served_from = "live"
+    if not articles:
+        # Upstream came back empty (deadline, errors): fall back to the index
+        articles = await from_index()
+        served_from = "index"
+    
+    # Include API status in response for monitoring
+    final_status = get_api_status()
+    payload = {
+        "query": q, 
+        "articles": articles,
+        "api_status": {
+            "requests_made": final_status["total_requests"],
+            "success_rate": round(final_status["success_rate"], 1),
+            "rate_limited": final_status["rate_limited"],
+            "quota_exceeded": final_status["quota_exceeded"],
+            "served_from": served_from
+        },
+        "refinement": job.summary() if job is not None else None,
+        "cursor": first_page_token(q) if served_from == "live" else None,
+    }
+    return _json(payload)
+
+
+@app.get("/search/more", response_model=SearchPage)
+async def search_more_results(cursor: str = Query(..., min_length=3)):
+    """The next page of a search: only results no earlier page had are fetched and classified"""
+    page = await search_more(cursor)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Search cursor not found or expired")
+    return _json(page)
+
+
+@app.get("/search/{job_id}/refinements", response_model=RefinementsResponse)
+async def search_refinements(job_id: str, since: int = Query(0, ge=0)):
+    """AI scores a speculative search has resolved since cursor ``since``"""
+    job = refinement_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Refinement job not found or expired")
+    return _json(job.since(since))
+
+
+@app.get("/articles", response_model=List[Article])
+async def list_articles():
+    # Live results for a general query, served from the query cache when warm
+    return _json(await cached_search_and_classify("latest news"))
+
+
+@app.get("/articles/{article_id}", response_model=ArticleDetail)
+async def get_article(article_id: str) -> ArticleDetail:
+    stored = await article_store.get(article_id)
+    if stored is not None:
+        # Scored on first view together with the rest of its narrative, so the
+        # group costs one batched LLM call (awaited here) and its other
+        # articles open from the memo; the lexicon scores whatever AI misses
+        siblings = narrative_index.siblings(article_id, dimension_engine.batch_size - 1)
+        group = [a for a in await asyncio.gather(*map(article_store.get, siblings)) if a]
+        scores = (await dimension_engine.score_many([stored, *group]))[0]
+        return ArticleDetail(
+            id=article_id,
+            article=Article(**stored),
+            bias_dimensions=BiasDimensions(**scores.dimensions()),
+            highlighted_phrases=scores.highlighted_phrases,
+            dimensions_method=scores.method,
+        )
+    raise HTTPException(status_code=404, detail="Article not found")
+
+
+@app.get("/narratives", response_model=List[Narrative])
+async def get_narratives() -> List[Narrative]:
+    # Precomputed after every ingested batch; nothing is clustered per request
+    return narrative_index.snapshot()
\ No newline at end of file
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from ..config import settings
+from .cache import normalize_url
+from .metrics import gauge_func, stage
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = (
+    "id", "url", "source", "title", "snippet", "published_at",
+    "spectrum_score", "confidence", "method", "reasoning",
+)
+_SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    published_at TEXT,
+    spectrum_score REAL NOT NULL,
+    confidence REAL NOT NULL,
+    method TEXT NOT NULL,
+    reasoning TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_score ON articles (spectrum_score);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, snippet, source, content='articles', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, snippet, source) VALUES (new.rowid, new.title, new.snippet, new.source);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, snippet, source)
+    VALUES ('delete', old.rowid, old.title, old.snippet, old.source);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF title, snippet, source ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, snippet, source)
+    VALUES ('delete', old.rowid, old.title, old.snippet, old.source);
+    INSERT INTO articles_fts (rowid, title, snippet, source) VALUES (new.rowid, new.title, new.snippet, new.source);
+END;
+"""
+
+# Keep an AI/outlet score over a later "unknown" one for the same article
+_UPSERT = """
+INSERT INTO articles (
+    id, url, source, title, snippet, published_at, spectrum_score, confidence, method, reasoning,
+    first_seen, last_seen
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title,
+    snippet = excluded.snippet,
+    published_at = COALESCE(excluded.published_at, articles.published_at),
+    last_seen = excluded.last_seen,
+    spectrum_score = CASE WHEN excluded.method != 'unknown' OR articles.method = 'unknown'
+        THEN excluded.spectrum_score ELSE articles.spectrum_score END,
+    confidence = CASE WHEN excluded.method != 'unknown' OR articles.method = 'unknown'
+        THEN excluded.confidence ELSE articles.confidence END,
+    reasoning = CASE WHEN excluded.method != 'unknown' OR articles.method = 'unknown'
+        THEN excluded.reasoning ELSE articles.reasoning END,
+    method = CASE WHEN excluded.method != 'unknown' OR articles.method = 'unknown'
+        THEN excluded.method ELSE articles.method END
+"""
+
+
+def article_id(url: str) -> str:
+    """Stable article ID derived from the canonical URL"""
+    return "a_" + hashlib.sha1(normalize_url(url).encode()).hexdigest()[:16]
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """FTS5 query matching any term; BM25 ranks articles with more terms higher"""
+    terms = _SEARCH_TERM.findall(query.lower())
+    return " OR ".join(f'"{t}"' for t in terms) or None
+
+
+class ArticleStore:
+    """Every classified article, persisted in SQLite with an FTS5 index.
+
+    Lets /articles/{id} resolve real articles and lets /search answer from
+    what has already been fetched (BM25 ranking plus spectrum filters) when
+    CSE is out of quota, rate limited, or the caller asks for offline results.
+    Queries run in a worker thread, serialized on one connection, so the
+    event loop never waits on SQLite; the article count is kept as writes
+    land instead of being counted on every /metrics scrape.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._articles = 0
+        self.writes = 0
+        self.searches = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._articles = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _write(self, rows: List[tuple]) -> int:
+        ids = list({row[0] for row in rows})
+        with self._lock:
+            conn = self._connect()
+            known = conn.execute(
+                f"SELECT COUNT(*) FROM articles WHERE id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchone()[0]
+            conn.executemany(_UPSERT, rows)
+            conn.commit()
+            self._articles += len(ids) - known
+        return len(rows)
+
+    def _query(self, sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    async def upsert(self, articles: Iterable[Dict[str, Any]]) -> int:
+        now = time.time()
+        rows = [
+            (
+                a.get("id") or article_id(a["url"]), a["url"], a.get("source") or "unknown",
+                a.get("title") or "", a.get("snippet") or "", a.get("published_at"),
+                float(a.get("spectrum_score", 0.0)), float(a.get("confidence", 0.0)),
+                a.get("method") or "unknown", a.get("reasoning"), now, now,
+            )
+            for a in articles if a.get("url")
+        ]
+        if not rows:
+            return 0
+        try:
+            with stage("store_write"):
+                written = await asyncio.to_thread(self._write, rows)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Article store write failed: {e}")
+            return 0
+        self.writes += written
+        return written
+
+    async def get(self, id: str) -> Optional[Dict[str, Any]]:
+        try:
+            rows = await asyncio.to_thread(
+                self._query, f"SELECT {', '.join(_COLUMNS)} FROM articles WHERE id = ?", (id,)
+            )
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Article store lookup failed: {e}")
+            return None
+        return rows[0] if rows else None
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 12,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        methods: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Best BM25 matches for ``query``, optionally within a spectrum range"""
+        expression = _match_expression(query)
+        if expression is None:
+            return []
+        # Title matches count most, then the snippet, then the outlet name
+        sql = [
+            f"SELECT {', '.join('a.' + c for c in _COLUMNS)} FROM articles_fts",
+            "JOIN articles a ON a.rowid = articles_fts.rowid",
+            "WHERE articles_fts MATCH ?",
+        ]
+        params: List[Any] = [expression]
+        if min_score is not None:
+            sql.append("AND a.spectrum_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            sql.append("AND a.spectrum_score <= ?")
+            params.append(max_score)
+        if methods:
+            sql.append(f"AND a.method IN ({', '.join('?' * len(methods))})")
+            params.extend(methods)
+        sql.append("ORDER BY bm25(articles_fts, 3.0, 1.0, 0.5), a.last_seen DESC LIMIT ?")
+        params.append(limit)
+        try:
+            with stage("store_search"):
+                rows = await asyncio.to_thread(self._query, " ".join(sql), params)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Article store search failed: {e}")
+            return []
+        self.searches += 1
+        return rows
+
+    async def recent(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """The ``limit`` most recently seen articles, oldest first"""
+        try:
+            rows = await asyncio.to_thread(
+                self._query, f"SELECT {', '.join(_COLUMNS)} FROM articles ORDER BY last_seen DESC LIMIT ?", (limit,)
+            )
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Article store scan failed: {e}")
+            return []
+        return rows[::-1]
+
+    def count(self) -> int:
+        """Articles stored; no query once the store has been opened"""
+        if self._conn is None:
+            try:
+                with self._lock:
+                    self._connect()
+            except sqlite3.Error:
+                return 0
+        return self._articles
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "articles": self.count(),
+            "writes": self.writes,
+            "searches": self.searches,
+            "errors": self.errors,
+            "path": self.path,
+        }
+
+
+def _store_path() -> str:
+    """article_store_path, else a SQLite database_url, else an in-process database"""
+    if settings.article_store_path:
+        return settings.article_store_path
+    if settings.database_url and settings.database_url.startswith("sqlite:///"):
+        return settings.database_url[len("sqlite:///"):] or ":memory:"
+    return ":memory:"
+
+
+article_store = ArticleStore(_store_path())
+
+
+gauge_func(
+    "newsanalyzer_article_store_articles",
+    "Articles held in the local full-text store",
+    lambda: {(): float(article_store.count())},
+)
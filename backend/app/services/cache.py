@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from ..config import settings
+from .metrics import gauge_func
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of an article URL: no scheme, www., tracking params or fragment"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_")
+    ))
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+def article_fingerprint(url: str | None, title: str, snippet: str) -> str:
+    """Stable identity of an article: its normalized URL, else its text"""
+    if url:
+        return "url:" + normalize_url(url)
+    text = " ".join(f"{title} {snippet}".lower().split())
+    return "text:" + text
+
+
+class SQLiteStore:
+    """Durable cache tier backed by a local SQLite file.
+
+    Queries run in a worker thread so disk I/O never blocks the event loop;
+    one lock serializes them on the shared connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS classification_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM classification_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                conn.execute("DELETE FROM classification_cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            return row[0]
+
+    def _write(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(sql, params)
+            conn.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await asyncio.to_thread(
+            self._write,
+            "INSERT OR REPLACE INTO classification_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl),
+        )
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._write, "DELETE FROM classification_cache WHERE key = ?", (key,))
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._write, "DELETE FROM classification_cache")
+
+
+class RedisStore:
+    """Durable cache tier backed by Redis (requires the ``redis`` package)"""
+
+    prefix = "newsanalyzer:cls:"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._redis.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self.prefix + key)
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+
+def _durable_store() -> Optional[Any]:
+    """Pick the durable tier from settings: Redis first, then a SQLite database_url"""
+    if settings.redis_url:
+        try:
+            return RedisStore(settings.redis_url)
+        except ImportError:
+            logger.warning("redis_url is set but the redis package is not installed; skipping durable cache")
+    if settings.database_url and settings.database_url.startswith("sqlite:///"):
+        return SQLiteStore(settings.database_url[len("sqlite:///"):] or ":memory:")
+    return None
+
+
+class ClassificationCache:
+    """Two-tier (in-process LRU + optional durable store) cache of AI classifications.
+
+    Keys combine the article fingerprint with the model and prompt version, so
+    changing either naturally misses old entries.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lru: OrderedDict[str, tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._store: Any = None
+        self._store_ready = False
+        self.hits = 0
+        self.durable_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(url: str | None, title: str, snippet: str, model: str, prompt_version: str) -> str:
+        fingerprint = article_fingerprint(url, title, snippet)
+        return hashlib.sha256(f"{model}|{prompt_version}|{fingerprint}".encode()).hexdigest()
+
+    @property
+    def store(self) -> Any:
+        if not self._store_ready:
+            self._store = _durable_store()
+            self._store_ready = True
+        return self._store
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._lru.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at >= time.time():
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._lru[key]
+
+        if self.store is not None:
+            try:
+                raw = await self.store.get(key)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Classification cache read failed: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._remember(key, value)
+                self.hits += 1
+                self.durable_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._remember(key, value)
+        self.writes += 1
+        if self.store is not None:
+            try:
+                await self.store.set(key, json.dumps(value), self.ttl)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Classification cache write failed: {e}")
+
+    async def invalidate(self, key: str | None = None) -> None:
+        """Drop one entry, or every entry when ``key`` is None"""
+        if key is None:
+            self._lru.clear()
+        else:
+            self._lru.pop(key, None)
+        if self.store is not None:
+            if key is None:
+                await self.store.clear()
+            else:
+                await self.store.delete(key)
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._lru[key] = (time.time() + self.ttl, value)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "durable_hits": self.durable_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups * 100 if lookups else 0.0,
+            "writes": self.writes,
+            "errors": self.errors,
+            "durable_tier": type(self.store).__name__ if self.store is not None else None,
+        }
+
+
+classification_cache = ClassificationCache(
+    max_entries=settings.classification_cache_max_entries,
+    ttl=settings.classification_cache_ttl_seconds,
+)
+
+
+def _cache_counters() -> Dict[Any, float]:
+    stats = classification_cache.stats()
+    return {(("event", name),): float(stats[name]) for name in ("hits", "durable_hits", "misses", "writes", "errors")}
+
+
+gauge_func(
+    "newsanalyzer_classification_cache_events_total",
+    "Classification cache lookups and writes, by event",
+    _cache_counters,
+    kind="counter",
+)
@@ -1,123 +1,93 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
-import tldextract
-import httpx
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
+import asyncio
 import json
+import logging
 from ..config import settings
+from .cache import classification_cache
+from .http import get_client
+from .domains import host_of, registered_domain
+from .outlets import get_registry
+from .ratelimit import openai_guard, parse_retry_after
+from .deadline import can_afford, expired, hedged, remaining, time_left
+from .metrics import stage, upstream_requests
+from .prompts import (
+    PromptTemplate, StreamingJSON, article_lines, estimate_tokens, is_complete, object_schema, parse_partial,
+    record_usage, register_prompt,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+AI_MODEL = "gpt-4o-mini"
+
+# Batch sizing: articles are packed into one request until the estimated
+# prompt tokens reach the budget or the adaptive size limit is hit.
+BATCH_TOKEN_BUDGET = 1800
+BATCH_MIN_SIZE = 2
+BATCH_MAX_SIZE = 8
+BATCH_CONCURRENCY = 3
+
+# No completion is started with less of the request budget left than this
+MIN_CHAT_SECONDS = 1.0
+
+_RATING = (
+    "from -1.0 (far left) to 1.0 (far right); 0.0 is neutral. "
+    "Weigh word choice, framing and which facts are included."
+)
+# Scores before reasoning: a completion cut off by max_tokens still carries them
+_SCORE_FIELDS = {"bias_score": {"type": "number"}, "confidence": {"type": "number"}, "reasoning": {"type": "string"}}
 
-# Comprehensive political news source classification
-OUTLET_BIAS: dict[str, float] = {
-    # Far Left (-0.9 to -1.0)
-    "jacobinmag.com": -1.0,
-    "socialistworker.org": -1.0,
-    "wsws.org": -1.0,
-    "motherjones.com": -0.9,
-    "thenation.com": -0.9,
-    "commondreams.org": -0.9,
-    "alternet.org": -0.9,
-    "truthout.org": -0.9,
-    "democracynow.org": -0.9,
-    "counterpunch.org": -0.9,
-    
-    # Clear Left (-0.7 to -0.8)
-    "theintercept.com": -0.8,
-    "salon.com": -0.8,
-    "rawstory.com": -0.8,
-    "thedailybeast.com": -0.8,
-    "thinkprogress.org": -0.8,
-    "mediamatters.org": -0.8,
-    "talkingpointsmemo.com": -0.8,
-    "democraticunderground.com": -0.8,
-    "crooksandliars.com": -0.8,
-    "dailykos.com": -0.8,
-    "msnbc.com": -0.7,
-    "huffpost.com": -0.7,
-    "vox.com": -0.7,
-    "slate.com": -0.7,
-    "theroot.com": -0.7,
-    "jezebel.com": -0.7,
-    "buzzfeednews.com": -0.7,
-    
-    # Left Leaning (-0.4 to -0.6) - AI Analysis Recommended
-    "nytimes.com": -0.5,
-    "washingtonpost.com": -0.5,
-    "cnn.com": -0.5,
-    "theguardian.com": -0.5,
-    "npr.org": -0.4,
-    "pbs.org": -0.4,
-    "theatlantic.com": -0.4,
-    "newyorker.com": -0.4,
-    
-    # Center (-0.3 to +0.3)
-    "reuters.com": 0.0,
-    "apnews.com": 0.0,
-    "bbc.com": 0.0,
-    "c-span.org": 0.0,
-    "allsides.com": 0.0,
-    "usatoday.com": -0.1,
-    "politico.com": 0.1,
-    "thehill.com": 0.1,
-    "axios.com": 0.1,
-    "time.com": -0.1,
-    "newsweek.com": -0.1,
-    "csmonitor.com": 0.2,
-    "realclearpolitics.com": 0.2,
-    "abcnews.go.com": 0.0,
-    "cbsnews.com": -0.1,
-    "nbcnews.com": -0.2,
-    "bloomberg.com": 0.1,
-    "marketwatch.com": 0.1,
-    "yahoo.com": 0.0,
-    "msn.com": 0.0,
-    
-    # Right Leaning (+0.4 to +0.6) - AI Analysis Recommended  
-    "wsj.com": 0.4,
-    "economist.com": 0.3,
-    "forbes.com": 0.3,
-    "reason.com": 0.5,
-    "nypost.com": 0.5,
-    "washingtontimes.com": 0.6,
-    "theepochtimes.com": 0.5,
-    "washingtonexaminer.com": 0.6,
-    "spectator.org": 0.5,
-    "city-journal.org": 0.5,
-    
-    # Clear Right (+0.7 to +0.8)
-    "foxnews.com": 0.7,
-    "dailywire.com": 0.8,
-    "theblaze.com": 0.8,
-    "redstate.com": 0.8,
-    "townhall.com": 0.8,
-    "pjmedia.com": 0.8,
-    "americanthinker.com": 0.8,
-    "thefederalist.com": 0.8,
-    "nationalreview.com": 0.7,
-    "theamericanconservative.com": 0.7,
-    "dailycaller.com": 0.7,
-    "freebeacon.com": 0.7,
-    "hotair.com": 0.7,
-    "twitchy.com": 0.7,
-    "dailysignal.com": 0.7,
-    "cnsnews.com": 0.7,
-    "thepostmillennial.com": 0.7,
-    "rightscoop.com": 0.8,
-    "conservativereview.com": 0.8,
-    "theepochtimes.com": 0.7,
-    "lifenews.com": 0.8,
-    
-    # Far Right (+0.9 to +1.0)
-    "breitbart.com": 1.0,
-    "oann.com": 1.0,
-    "newsmax.com": 0.9,
-    "thegatewaypundit.com": 1.0,
-    "wnd.com": 0.9,
-    "infowars.com": 1.0,
-}
 
+def _classify_prompt(articles: Sequence[dict[str, Any]]) -> str:
+    article = articles[0]
+    return "\n".join([
+        f"Rate the political bias of this news article {_RATING}",
+        f"Source: {article.get('source', '')}",
+        f"Title: {article.get('title', '')}",
+        f"Snippet: {article.get('snippet', '')}",
+        "Give your confidence (0.0 to 1.0) and reasoning in at most 25 words.",
+    ])
 
-@dataclass
+
+def _batch_prompt(articles: Sequence[dict[str, Any]]) -> str:
+    return "\n".join([
+        f"Rate the political bias of each news article below {_RATING}",
+        *article_lines(articles),
+        "One result per article, in order: its [index], bias_score, confidence (0.0 to 1.0) "
+        "and reasoning in at most 20 words.",
+    ])
+
+
+# Bump a template's version whenever its prompt changes so cached results are not reused
+CLASSIFY_PROMPT = register_prompt(PromptTemplate(
+    name="classify",
+    version="v2",
+    render=_classify_prompt,
+    schema=object_schema(**_SCORE_FIELDS),
+    output_tokens=80,
+))
+BATCH_PROMPT = register_prompt(PromptTemplate(
+    name="classify-batch",
+    version="v2",
+    render=_batch_prompt,
+    schema=object_schema(results={"type": "array", "items": object_schema(index={"type": "integer"}, **_SCORE_FIELDS)}),
+    output_tokens=20,
+    output_tokens_per_item=60,
+))
+PROMPT_VERSION = CLASSIFY_PROMPT.cache_version
+BATCH_PROMPT_VERSION = BATCH_PROMPT.cache_version
+
+# Outlet bias ratings live in a versioned data file (app/data/outlets.json),
+# loaded and hot-reloaded by the outlet registry.
+
+
+@dataclass(slots=True)
 class Classification:
     score: float
     confidence: float
@@ -126,149 +96,422 @@ class Classification:
 
 
 def extract_domain(url: str) -> Optional[str]:
+    """Outlet domain for a URL.
+
+    Hosts under a known outlet resolve to that outlet (``edition.cnn.com`` ->
+    ``cnn.com``, ``abcnews.go.com`` stays ``abcnews.go.com``); anything else
+    resolves to its registrable domain. Fully offline and memoized per host.
+    """
     try:
-        parts = tldextract.extract(url)
-        if not parts.domain:
-            return None
-        domain = ".".join(p for p in [parts.domain, parts.suffix] if p)
-        return domain.lower()
+        host = host_of(url)
+        match = get_registry().index.resolve(host)
+        if match is not None:
+            return match[0]
+        return registered_domain(host)
     except Exception:
         return None
 
 
-async def classify_with_ai(title: str, snippet: str, source: str) -> Classification:
-    """Use OpenAI to analyze article bias with detailed reasoning"""
-    print(f"Debug classify_with_ai: OpenAI key configured: {bool(settings.openai_api_key)}")
+async def classify_with_ai(title: str, snippet: str, source: str, url: Optional[str] = None) -> Classification:
+    """Use OpenAI to score one article's bias, with a short reasoning"""
     if not settings.openai_api_key:
-        print("Debug: No OpenAI API key, falling back to outlet classification")
         # Fallback to outlet-based classification
         return classify_by_outlet(f"https://{source}")
     
+    cache_key = classification_cache.make_key(url, title, snippet, AI_MODEL, PROMPT_VERSION)
+    cached = await classification_cache.get(cache_key)
+    if cached is not None:
+        return Classification(method="ai", **cached)
+    
+    prompt = CLASSIFY_PROMPT.render([{"title": title, "snippet": snippet, "source": source}])
+    answer = await chat_completion(CLASSIFY_PROMPT, prompt, 1, "openai_classify", timeout=15.0)
+    if answer is None:
+        return classify_by_outlet(f"https://{source}")
+    
+    content, _ = answer
+    classification = _entry_classification(parse_partial(content))
+    if classification is None:
+        logger.warning(f"Unusable OpenAI response: {content[:200]}")
+        return classify_by_outlet(f"https://{source}")
+    await classification_cache.set(cache_key, {
+        "score": classification.score,
+        "confidence": classification.confidence,
+        "reasoning": classification.reasoning,
+    })
+    return classification
+
+
+async def chat_completion(
+    template: PromptTemplate,
+    prompt: str,
+    items: int,
+    stage_name: str,
+    timeout: float = 20.0,
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> Optional[tuple[str, Optional[str]]]:
+    """Send one chat completion for ``template``: (content, finish_reason), or None if skipped or failed.
+
+    With ``on_delta`` the completion is streamed and each content delta is
+    passed on as it arrives. Usage is accounted per prompt and against the
+    current search, and the TPM reservation is settled to the real usage.
+    ``timeout`` is shortened to the request's budget left, and a call still
+    running at the deadline is cut off and returns what had arrived with
+    finish_reason ``"deadline"``. Unstreamed completions are hedged once
+    they outlive the recent OpenAI p95.
+    """
+    if not can_afford(MIN_CHAT_SECONDS, stage_name):
+        return None
+    reserved = template.reserve(prompt, items)
+    # Paced against the OpenAI RPM/TPM budget; skipped while the breaker is open
+    if not await openai_guard.acquire(tokens=reserved):
+        return None
+    hedges: list[int] = []
+
+    async def admit_hedge() -> bool:
+        # A hedge takes its own reservation, like any other request
+        if await openai_guard.acquire(tokens=reserved):
+            hedges.append(reserved)
+            return True
+        return False
+    
+    url = f"{settings.openai_base_url}/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {settings.openai_api_key}",
+        "Content-Type": "application/json"
+    }
+    body = template.request(AI_MODEL, prompt, items, stream=on_delta is not None)
+    usage: Optional[dict[str, Any]] = None
+    finish_reason: Optional[str] = None
+    parts: list[str] = []
     try:
-        prompt = f"""
-Analyze this news article for political bias on a scale from -1.0 (far left) to +1.0 (far right), where 0.0 is perfectly neutral.
-
-Article Title: {title}
-Article Snippet: {snippet}
-Source: {source}
-
-Please provide:
-1. A bias score between -1.0 and +1.0
-2. Your confidence level (0.0 to 1.0)
-3. Detailed reasoning explaining why you assigned this score
-
-Consider these factors:
-- Language choices (emotional vs. neutral)
-- Framing of issues
-- Selection of facts presented
-- Implicit assumptions
-- Source credibility patterns
-
-Respond in this exact JSON format:
-{{
-    "bias_score": <float between -1.0 and 1.0>,
-    "confidence": <float between 0.0 and 1.0>,
-    "reasoning": "<detailed explanation of your analysis>"
-}}
-"""
-
-        async with httpx.AsyncClient(timeout=15.0) as client:  # 15 second timeout
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {settings.openai_api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "gpt-4o-mini",  # Cost-effective model
-                    "messages": [
-                        {
-                            "role": "system", 
-                            "content": "You are an expert media analyst specializing in detecting political bias in news articles. Provide objective, detailed analysis."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.3,  # Lower temperature for more consistent analysis
-                    "max_tokens": 200  # Reduced tokens for faster response
-                }
-            )
-            
-            if response.status_code != 200:
-                print(f"Debug: OpenAI API error: {response.status_code} - {response.text}")
-                return classify_by_outlet(f"https://{source}")
-            
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
-            print(f"Debug: OpenAI API response received: {content[:100]}...")
-            
-            # Parse the JSON response
-            try:
-                analysis = json.loads(content)
-                print(f"Debug: Successfully parsed OpenAI response, returning AI classification")
-                return Classification(
-                    score=float(analysis["bias_score"]),
-                    confidence=float(analysis["confidence"]),
-                    method="ai",
-                    reasoning=analysis["reasoning"]
-                )
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
-                print(f"Debug: Failed to parse OpenAI response: {e}")
-                print(f"Debug: Response content: {content}")
-                return classify_by_outlet(f"https://{source}")
-                
+        client = get_client()
+        # An httpx timeout bounds each read, not a completion that keeps
+        # streaming: the whole call is cut off when the search budget runs out
+        async with asyncio.timeout(remaining()):
+            with stage(stage_name):
+                if on_delta is None:
+                    response = await hedged(
+                        "openai",
+                        openai_guard.latency,
+                        lambda: client.post(url, headers=headers, json=body, timeout=time_left(timeout)),
+                        admit=admit_hedge,
+                    )
+                    _record_openai_response(response)
+                    if response.status_code != 200:
+                        logger.warning(f"OpenAI API error ({template.name}): {response.status_code} - {response.text}")
+                        openai_guard.settle(reserved, 0)
+                        return None
+                    result = response.json()
+                    choice = result["choices"][0]
+                    content, finish_reason, usage = choice["message"]["content"], choice.get("finish_reason"), result.get("usage")
+                else:
+                    async with client.stream("POST", url, headers=headers, json=body, timeout=time_left(timeout)) as response:
+                        _record_openai_response(response)
+                        if response.status_code != 200:
+                            await response.aread()
+                            logger.warning(f"OpenAI API error ({template.name}): {response.status_code} - {response.text}")
+                            openai_guard.settle(reserved, 0)
+                            return None
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            chunk = json.loads(data)
+                            usage = chunk.get("usage") or usage
+                            for choice in chunk.get("choices") or ():
+                                delta = (choice.get("delta") or {}).get("content")
+                                if delta:
+                                    parts.append(delta)
+                                    on_delta(delta)
+                                finish_reason = choice.get("finish_reason") or finish_reason
+                        content = "".join(parts)
+    except TimeoutError:
+        # Our own cutoff, not an upstream fault: keep what streamed in
+        upstream_requests.inc(upstream="openai", outcome="deadline")
+        content = "".join(parts)
+        openai_guard.settle(reserved, record_usage(template, usage, "deadline", prompt, content))
+        if not content:
+            return None
+        logger.info(f"OpenAI {template.name} response cut off by the request deadline; salvaging what parsed")
+        return content, "deadline"
     except Exception as e:
-        print(f"Debug: AI classification failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return classify_by_outlet(f"https://{source}")
+        if not expired():
+            openai_guard.record_failure("error")  # running out of our own budget is not an upstream fault
+        logger.warning(f"OpenAI {template.name} request failed: {e}")
+        return None
+    finally:
+        # The cancelled duplicate is charged its prompt: it was sent and may be billed
+        for hedge in hedges:
+            openai_guard.settle(hedge, estimate_tokens(template.system) + estimate_tokens(prompt))
+    
+    openai_guard.settle(reserved, record_usage(template, usage, finish_reason, prompt, content))
+    if finish_reason == "length":
+        logger.info(f"OpenAI {template.name} response cut off at {body['max_tokens']} tokens; salvaging what parsed")
+    return content, finish_reason
 
 
-def classify_by_outlet(url: str) -> Classification:
-    domain = extract_domain(url) or ""
-    if domain in OUTLET_BIAS:
-        reasoning = f"Based on {domain}'s known editorial stance and historical reporting patterns."
-        return Classification(
-            score=OUTLET_BIAS[domain], 
-            confidence=0.9, 
-            method="outlet",
-            reasoning=reasoning
-        )
+def _record_openai_response(response: httpx.Response) -> None:
+    """Feed an OpenAI response status into the shared limiter/breaker"""
+    upstream_requests.inc(upstream="openai", outcome=response.status_code)
+    if response.status_code == 429:
+        openai_guard.record_rate_limited(parse_retry_after(response.headers.get("Retry-After")))
+    elif response.status_code >= 500:
+        openai_guard.record_failure(f"http_{response.status_code}")
+    else:
+        openai_guard.record_success()
+
+
+class _BatchSizer:
+    """Additive-increase / multiplicative-decrease limit on articles per batch.
+
+    Incomplete or cut-off batch responses halve the limit (long batches are
+    the first to hit max_tokens); clean responses grow it back one article
+    at a time.
+    """
+
+    def __init__(self):
+        self.limit = BATCH_MAX_SIZE // 2
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.limit = min(self.limit + 1, BATCH_MAX_SIZE)
+        else:
+            self.limit = max(self.limit // 2, BATCH_MIN_SIZE)
+
+    def plan(self, articles: list[dict[str, Any]]) -> list[list[int]]:
+        """Group article indexes into batches under the size and token limits"""
+        batches: list[list[int]] = []
+        current: list[int] = []
+        tokens = 0
+        for i, article in enumerate(articles):
+            cost = _estimate_tokens(article)
+            if current and (len(current) >= self.limit or tokens + cost > BATCH_TOKEN_BUDGET):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(i)
+            tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+
+batch_sizer = _BatchSizer()
+
+
+def _estimate_tokens(article: dict[str, Any]) -> int:
+    # Plus per-item framing overhead
+    return estimate_tokens(f"{article.get('title', '')} {article.get('snippet', '')} {article.get('source', '')}") + 15
+
+
+def _entry_classification(entry: Any) -> Optional[Classification]:
+    """Classification from a response entry, possibly cut off; None without valid scores"""
+    if not isinstance(entry, dict):
+        return None
+    try:
+        score = float(entry["bias_score"])
+        confidence = float(entry["confidence"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-1.0 <= score <= 1.0 and 0.0 <= confidence <= 1.0):
+        return None
+    reasoning = entry.get("reasoning")
+    reasoning = str(reasoning) if reasoning is not None else None
+    if reasoning and not is_complete(entry):
+        reasoning += "…"  # cut off by max_tokens; the scores came first
+    return Classification(score=score, confidence=confidence, method="ai", reasoning=reasoning)
+
+
+def _batch_entry(entry: Any, position: int, size: int) -> Optional[tuple[int, Classification]]:
+    classification = _entry_classification(entry)
+    if classification is None:
+        return None
+    try:
+        index = int(entry.get("index", position))
+    except (TypeError, ValueError):
+        return None
+    return (index, classification) if 0 <= index < size else None
+
+
+def _parse_batch(content: str, size: int) -> dict[int, Classification]:
+    """Return the usable entries of a batch response, keyed by article index"""
+    data = parse_partial(content)
+    entries = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return {}
+    
+    parsed: dict[int, Classification] = {}
+    for position, entry in enumerate(entries):
+        found = _batch_entry(entry, position, size)
+        if found is not None:
+            parsed[found[0]] = found[1]
+    return parsed
+
+
+async def _classify_batch(
+    articles: list[dict[str, Any]],
+    on_entry: Optional[Callable[[int, Classification], None]] = None,
+) -> tuple[dict[int, Classification], Optional[bool]]:
+    """Send one chat-completion request for a batch: (parsed entries, whether it was cut off).
+
+    The flag is None when no response came back (skipped, breaker open,
+    request failed), which says nothing about the batch size.
+
+    With ``on_entry`` the response is streamed and each entry is passed on
+    as soon as it closes.
+    """
+    prompt = BATCH_PROMPT.render(articles)
+    streamed: dict[int, Classification] = {}
+    stream = StreamingJSON("results")
+    
+    def feed(delta: str) -> None:
+        for position, entry in stream.feed(delta):
+            found = _batch_entry(entry, position, len(articles))
+            if found is not None and found[0] not in streamed:
+                streamed[found[0]] = found[1]
+                on_entry(*found)
+    
+    answer = await chat_completion(
+        BATCH_PROMPT, prompt, len(articles), "openai_batch", on_delta=feed if on_entry is not None else None
+    )
+    if answer is None:
+        # Entries already handed out stand, even if the stream broke off later
+        return streamed, None
+    content, finish_reason = answer
+    parsed = {**_parse_batch(content, len(articles)), **streamed}
+    # Cut off by our deadline rather than max_tokens: nothing to learn about the batch size
+    return parsed, None if finish_reason == "deadline" else finish_reason == "length"
+
+
+async def classify_batch_with_ai(
+    articles: list[dict[str, Any]],
+    on_result: Optional[Callable[[int, Classification], None]] = None,
+) -> list[Classification]:
+    """Classify many articles with as few OpenAI requests as possible.
+
+    Each article is a dict with ``url``, ``title``, ``snippet`` and ``source``.
+    Cached articles are answered locally, the rest are packed into batched
+    requests, and any article a batch fails to score falls back to its own
+    ``classify_with_ai`` call. Results are returned in input order;
+    ``on_result(index, classification)`` is also called as each one resolves.
+    """
+    if not settings.openai_api_key:
+        fallback = [classify_by_outlet(f"https://{a.get('source', '')}") for a in articles]
+        if on_result is not None:
+            for i, classification in enumerate(fallback):
+                on_result(i, classification)
+        return fallback
+    
+    results: list[Optional[Classification]] = [None] * len(articles)
+    
+    def resolve(i: int, classification: Classification) -> None:
+        results[i] = classification
+        if on_result is not None:
+            on_result(i, classification)
+
+    keys = [
+        classification_cache.make_key(a.get("url"), a.get("title", ""), a.get("snippet", ""), AI_MODEL, BATCH_PROMPT_VERSION)
+        for a in articles
+    ]
+    pending: list[int] = []
+    for i, key in enumerate(keys):
+        cached = await classification_cache.get(key)
+        if cached is not None:
+            resolve(i, Classification(method="ai", **cached))
+        else:
+            pending.append(i)
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def run_batch(indexes: list[int]) -> list[int]:
+        streamed: set[int] = set()
+        
+        def on_entry(position: int, classification: Classification) -> None:
+            streamed.add(position)
+            resolve(indexes[position], classification)
+        
+        # Stream the batch only when someone is waiting on each result
+        async with semaphore:
+            parsed, truncated = await _classify_batch(
+                [articles[i] for i in indexes], on_entry=on_entry if on_result is not None else None
+            )
+        if truncated is not None:
+            # Only responses say anything about the batch size, not skipped or failed calls
+            batch_sizer.record(len(parsed) == len(indexes) and not truncated)
+        failed = []
+        for position, i in enumerate(indexes):
+            classification = parsed.get(position)
+            if classification is None:
+                failed.append(i)
+                continue
+            if position not in streamed:
+                resolve(i, classification)
+            await classification_cache.set(keys[i], {
+                "score": classification.score,
+                "confidence": classification.confidence,
+                "reasoning": classification.reasoning,
+            })
+        return failed
+    
+    plan = batch_sizer.plan([articles[i] for i in pending])
+    failed_groups = await asyncio.gather(*(run_batch([pending[j] for j in group]) for group in plan))
+    
+    # Retry only the articles the batch responses left unscored
+    failed = [i for group in failed_groups for i in group]
+    if failed:
+        logger.info(f"Falling back to single-article AI calls for {len(failed)} article(s)")
+        async def run_single(i: int) -> Classification:
+            article = articles[i]
+            async with semaphore:
+                classification = await classify_with_ai(article.get("title", ""), article.get("snippet", ""), article.get("source", ""), url=article.get("url"))
+            resolve(i, classification)
+            return classification
+        
+        await asyncio.gather(*(run_single(i) for i in failed))
+    
+    return results  # type: ignore[return-value]  # every slot is filled above
+
+
+@lru_cache(maxsize=4096)
+def _outlet_classification(domain: str, score: float) -> Classification:
+    # One shared instance (and reasoning string) per outlet rating; treat as read-only
     return Classification(
-        score=0.0, 
-        confidence=0.3, 
-        method="unknown",
-        reasoning="Unknown source - no bias information available."
+        score=score,
+        confidence=0.9,
+        method="outlet",
+        reasoning=f"Based on {domain}'s known editorial stance and historical reporting patterns."
     )
 
 
-async def classify_hybrid(title: str, snippet: str, source: str, ai_limit_reached: bool = False) -> Classification:
+_UNKNOWN = Classification(
+    score=0.0,
+    confidence=0.3,
+    method="unknown",
+    reasoning="Unknown source - no bias information available."
+)
+
+
+def classify_by_outlet(url: str) -> Classification:
+    match = get_registry().index.resolve_url(url)
+    if match is not None:
+        return _outlet_classification(*match)
+    return _UNKNOWN
+
+
+async def classify_hybrid(title: str, snippet: str, source: str, ai_limit_reached: bool = False, url: Optional[str] = None) -> Classification:
     """
     Hybrid classification: Use outlet-based for known sources, AI for unknown sources
     This dramatically improves speed by avoiding unnecessary AI calls
     """
-    domain = extract_domain(f"https://{source}") or ""
-    
-    # If it's a known outlet, use fast outlet-based classification
-    if domain in OUTLET_BIAS:
-        reasoning = f"Based on {domain}'s known editorial stance and historical reporting patterns."
-        return Classification(
-            score=OUTLET_BIAS[domain], 
-            confidence=0.9, 
-            method="outlet",
-            reasoning=reasoning
-        )
+    # If it's a known outlet (including its subdomains), use fast outlet-based classification
+    classification = classify_by_outlet(url or f"https://{source}")
+    if classification.method == "outlet":
+        return classification
     
     # For unknown sources, use AI analysis (but respect limits)
     if not ai_limit_reached and settings.openai_api_key:
-        return await classify_with_ai(title, snippet, source)
+        return await classify_with_ai(title, snippet, source, url=url)
     
     # Fallback for unknown sources when AI limit reached
-    return Classification(
-        score=0.0, 
-        confidence=0.3, 
-        method="unknown",
-        reasoning="Unknown source - no bias information available."
-    ) 
\ No newline at end of file
+    return classification
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+from ..config import settings
+from .metrics import counter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+upstream_hedges = counter("newsanalyzer_upstream_hedges_total", "Hedged duplicate upstream requests, by upstream and outcome")
+deadline_skips = counter("newsanalyzer_deadline_skips_total", "Stages given up because the request budget left could not cover them, by stage")
+
+# End-to-end deadline of the current request, as a time.monotonic() instant.
+# Tasks started inside a deadline inherit it.
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound upstream calls in this context to ``seconds`` from now.
+
+    Nested deadlines keep the tighter one; None leaves the current one.
+    """
+    current = _deadline.get()
+    at = current
+    if seconds is not None:
+        at = time.monotonic() + seconds
+        if current is not None:
+            at = min(at, current)
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def search_deadline() -> Any:
+    """The end-to-end deadline for one search (settings.search_budget_seconds; 0 disables it)"""
+    return deadline(settings.search_budget_seconds or None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    at = _deadline.get()
+    return None if at is None else max(at - time.monotonic(), 0.0)
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0.0
+
+
+def time_left(timeout: float) -> float:
+    """``timeout``, shortened to the budget left"""
+    left = remaining()
+    return timeout if left is None else min(timeout, left)
+
+
+def can_afford(seconds: float, stage_name: str) -> bool:
+    """False (and counted) when the budget left cannot cover a stage expected to take ``seconds``"""
+    left = remaining()
+    if left is None or left >= seconds:
+        return True
+    deadline_skips.inc(stage=stage_name)
+    logger.info(f"Skipping {stage_name}: {left:.2f}s of the request budget left, needs ~{seconds:.2f}s")
+    return False
+
+
+class LatencyTracker:
+    """Recent response times of one upstream, for hedge delays and stage estimates.
+
+    Quantiles come from the last ``window`` responses and are only trusted
+    once ``min_samples`` have been seen.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedges = 0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def estimate(self, default: float) -> float:
+        """Typical (median) response time, or ``default`` until there are enough samples"""
+        median = self.quantile(0.5)
+        return default if median is None else median
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging, or None when no hedge may go out"""
+        if not settings.upstream_hedging or self.hedges >= settings.upstream_hedge_max_share * self.requests:
+            return None
+        return self.quantile(settings.upstream_hedge_quantile)
+
+    def status(self) -> Dict[str, Any]:
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        return {
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "samples": len(self._samples),
+            "hedges": self.hedges,
+        }
+
+
+async def hedged(
+    upstream: str,
+    tracker: LatencyTracker,
+    send: Callable[[], Awaitable[T]],
+    admit: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> T:
+    """``send()``, plus one duplicate if the first outlives the upstream's recent p95.
+
+    The first response back wins and the other request is cancelled. The
+    duplicate goes out only if ``admit`` (the upstream's rate limiter) lets
+    it, the budget left covers another wait of that long, and hedges stay
+    under settings.upstream_hedge_max_share of requests. An exception is
+    raised only when both requests fail.
+    """
+
+    async def timed() -> T:
+        start = time.monotonic()
+        result = await send()
+        tracker.observe(time.monotonic() - start)
+        return result
+
+    tracker.requests += 1
+    delay = tracker.hedge_delay()
+    first = asyncio.ensure_future(timed())
+    if delay is None:
+        return await first
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        left = remaining()
+        if done or (left is not None and left < delay) or (admit is not None and not await admit()):
+            return await first
+        if first.done():
+            return first.result()  # arrived while the hedge waited for admission
+        tracker.hedges += 1
+        tasks.append(asyncio.ensure_future(timed()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    upstream_hedges.inc(upstream=upstream, outcome="hedge_won" if task is not first else "first_won")
+                    return task.result()
+                error = task.exception()
+        upstream_hedges.inc(upstream=upstream, outcome="failed")
+        raise error  # type: ignore[misc]  # both requests failed
+    finally:
+        losers = [task for task in tasks if not task.done()]
+        for task in losers:
+            task.cancel()
+        if losers:
+            await asyncio.gather(*losers, return_exceptions=True)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .cache import normalize_url
+from .outlets import get_registry
+
+# 64-bit SimHash fingerprints; two articles are near-duplicates when their
+# fingerprints differ in at most ``max_distance`` bits.
+HASH_BITS = 64
+_MASK = (1 << HASH_BITS) - 1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# "Headline - Reuters", "Headline | Fox News": the outlet suffix CSE appends
+_OUTLET_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+# "Mar 3, 2024 ... " / "2 hours ago ... ": the date CSE prepends to snippets
+_SNIPPET_DATE = re.compile(r"^\s*(?:\w{3} \d{1,2}, \d{4}|\d+ \w+ ago)\s*\.\.\.\s*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or says that the to was were will with".split()
+)
+
+
+# Each feature hash is "spread" so bit i lands in its own 16-bit field of one
+# big int. Summing spread ints counts every bit position at once in C, instead
+# of looping over 64 bits per feature in Python.
+_FIELD = 16
+_FIELD_MASK = (1 << _FIELD) - 1
+
+
+@lru_cache(maxsize=65536)
+def _spread_hash(feature: str) -> int:
+    h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+    spread = 0
+    for bit in range(HASH_BITS):
+        if h >> bit & 1:
+            spread |= 1 << (bit * _FIELD)
+    return spread
+
+
+def _features(title: str, snippet: str) -> List[str]:
+    title = _OUTLET_SUFFIX.sub("", title)
+    snippet = _SNIPPET_DATE.sub("", snippet)
+    tokens = [t for t in _TOKEN.findall(f"{title} {snippet}".lower()) if t not in _STOPWORDS]
+    # Unigrams carry re-worded headlines, bigrams keep word order informative
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def simhash(title: str, snippet: str = "") -> int:
+    """64-bit SimHash over word unigrams and bigrams of title + snippet"""
+    features = _features(title, snippet)
+    if not features:
+        return 0
+    features = features[:_FIELD_MASK]  # keep per-bit counts inside their field
+    counts = sum(map(_spread_hash, features))
+    fields = memoryview(counts.to_bytes(HASH_BITS * 2, sys.byteorder)).cast("H")
+    threshold = len(features) // 2
+    return sum(1 << bit for bit, count in enumerate(fields) if count > threshold)
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class _DisjointSet:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Lower index wins so a cluster is keyed by its first occurrence
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def _bands(max_distance: int) -> List[tuple[int, int]]:
+    """Split the fingerprint into max_distance + 1 bit ranges.
+
+    If two fingerprints differ in at most max_distance bits, at least one
+    range is identical (pigeonhole), so exact matches on ranges find every
+    candidate pair without comparing all pairs.
+    """
+    count = min(max_distance, HASH_BITS - 1) + 1
+    size, extra = divmod(HASH_BITS, count)
+    bands, start = [], 0
+    for i in range(count):
+        width = size + (1 if i < extra else 0)
+        bands.append((start, (1 << width) - 1))
+        start += width
+    return bands
+
+
+def cluster(fingerprints: Sequence[int], keys: Sequence[str], max_distance: int) -> List[int]:
+    """Cluster id (index of the first member) for each item.
+
+    Items sharing a canonical ``key`` are always merged; otherwise items whose
+    fingerprints are within ``max_distance`` bits are.
+    """
+    sets = _DisjointSet(len(fingerprints))
+    first_by_key: Dict[str, int] = {}
+    for i, key in enumerate(keys):
+        if key:
+            sets.union(first_by_key.setdefault(key, i), i)
+
+    buckets: Dict[tuple[int, int], List[int]] = {}
+    bands = _bands(max_distance)
+    for i, fp in enumerate(fingerprints):
+        if not fp:
+            continue  # no text to compare
+        candidates: set[int] = set()
+        for band, (shift, mask) in enumerate(bands):
+            bucket = buckets.setdefault((band, (fp >> shift) & mask), [])
+            candidates.update(bucket)
+            bucket.append(i)
+        for j in candidates:
+            if hamming(fp, fingerprints[j]) <= max_distance:
+                sets.union(j, i)
+    return [sets.find(i) for i in range(len(fingerprints))]
+
+
+class DedupIndex:
+    """Incremental near-duplicate check against everything added so far.
+
+    Holds canonical URLs and SimHash fingerprints banded as in ``cluster``,
+    so continuation pages can drop articles already delivered (or waiting
+    in a candidate pool) without re-clustering earlier pages.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.keys: set[str] = set()
+        self.fingerprints: List[int] = []
+        self._bands = _bands(max_distance)
+        self._buckets: Dict[tuple[int, int], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def seen(self, key: str, fingerprint: int) -> bool:
+        if key and key in self.keys:
+            return True
+        if not fingerprint:
+            return False
+        for band, (shift, mask) in enumerate(self._bands):
+            for j in self._buckets.get((band, (fingerprint >> shift) & mask), ()):
+                if hamming(fingerprint, self.fingerprints[j]) <= self.max_distance:
+                    return True
+        return False
+
+    def add(self, key: str, fingerprint: int) -> None:
+        if key:
+            self.keys.add(key)
+        i = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        if fingerprint:
+            for band, (shift, mask) in enumerate(self._bands):
+                self._buckets.setdefault((band, (fingerprint >> shift) & mask), []).append(i)
+
+    def add_article(self, url: str, title: str, snippet: str) -> None:
+        self.add(normalize_url(url) if url else "", simhash(title, snippet))
+
+    def filter_new(self, results: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The CSE results not near-duplicating anything seen so far, which are then added"""
+        fresh = []
+        for result in results:
+            key = normalize_url(result["link"]) if result.get("link") else ""
+            fingerprint = simhash(result.get("title") or "", result.get("snippet") or "")
+            if not self.seen(key, fingerprint):
+                self.add(key, fingerprint)
+                fresh.append(result)
+        return fresh
+
+
+def _default_score(result: Dict[str, Any]) -> tuple:
+    # Prefer copies from rated outlets (no AI call needed), then fuller snippets
+    rated = get_registry().index.resolve_url(result.get("link", "")) is not None
+    return (rated, len(result.get("snippet") or ""))
+
+
+def dedup_results(
+    results: Sequence[Dict[str, Any]],
+    max_distance: int = 3,
+    score: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Collapse CSE results to one representative per near-duplicate cluster.
+
+    Canonical URLs catch tracking-parameter and scheme variants; SimHash over
+    title + snippet catches syndicated wire copies and light re-headlines.
+    Clusters keep the position of their first member, represented by the
+    member with the highest ``score`` (first wins ties).
+    """
+    results = [r for r in results if r.get("link")]
+    if not results:
+        return []
+    keys = [normalize_url(r["link"]) for r in results]
+    fingerprints = [simhash(r.get("title") or "", r.get("snippet") or "") for r in results]
+    clusters = cluster(fingerprints, keys, max_distance)
+
+    score = score or _default_score
+    best: Dict[int, int] = {}
+    best_score: Dict[int, Any] = {}
+    for i, cid in enumerate(clusters):
+        s = score(results[i])
+        if cid not in best or s > best_score[cid]:
+            best[cid], best_score[cid] = i, s
+    return [results[best[cid]] for cid in sorted(best)]
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..config import settings
+from .cache import classification_cache
+from .classifier import AI_MODEL, chat_completion
+from .metrics import counter
+from .prompts import PromptTemplate, article_lines, object_schema, parse_partial, register_prompt
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("factuality", "economic", "social", "establishment", "sensationalism")
+# factuality and sensationalism run 0..1; the others are -1 (left/anti) .. +1 (right/pro)
+UNIT_DIMENSIONS = ("factuality", "sensationalism")
+BATCH_SIZE = 6
+OUTPUT_TOKENS_PER_ARTICLE = 120
+MAX_HIGHLIGHTS = 8
+
+dimension_scores = counter("newsanalyzer_dimension_scores_total", "Per-dimension article scorings, by method")
+
+# phrase -> (dimension, weight). Weights push economic/social toward -1 (left)
+# or +1 (right), establishment toward -1 (anti) or +1 (pro), factuality and
+# sensationalism up or down from their baselines.
+LEXICON: Dict[str, tuple[str, float]] = {
+    # economic
+    "corporate greed": ("economic", -0.4), "living wage": ("economic", -0.3), "wealth tax": ("economic", -0.3),
+    "income inequality": ("economic", -0.25), "billionaires": ("economic", -0.2), "workers' rights": ("economic", -0.25),
+    "price gouging": ("economic", -0.3), "tax cuts for the rich": ("economic", -0.4), "union": ("economic", -0.1),
+    "tax relief": ("economic", 0.3), "job creators": ("economic", 0.4), "free market": ("economic", 0.3),
+    "red tape": ("economic", 0.25), "government spending": ("economic", 0.2), "burdensome regulation": ("economic", 0.35),
+    "unfair to taxpayers": ("economic", 0.3), "taxpayer dollars": ("economic", 0.2), "handouts": ("economic", 0.35),
+    "reduces default risk": ("economic", 0.15),
+    # social
+    "reproductive rights": ("social", -0.35), "marginalized": ("social", -0.25), "systemic racism": ("social", -0.4),
+    "undocumented immigrants": ("social", -0.25), "gun safety": ("social", -0.3), "lgbtq": ("social", -0.15),
+    "most in need": ("social", -0.15), "climate crisis": ("social", -0.3),
+    "traditional values": ("social", 0.35), "pro-life": ("social", 0.35), "illegal aliens": ("social", 0.45),
+    "illegal immigrants": ("social", 0.3), "second amendment": ("social", 0.3), "woke": ("social", 0.4),
+    "gender ideology": ("social", 0.4), "law and order": ("social", 0.3),
+    # establishment
+    "bipartisan": ("establishment", 0.25), "officials said": ("establishment", 0.15), "experts say": ("establishment", 0.2),
+    "according to officials": ("establishment", 0.15), "compromise framework": ("establishment", 0.2),
+    "consensus": ("establishment", 0.15), "deep state": ("establishment", -0.5), "elites": ("establishment", -0.3),
+    "mainstream media": ("establishment", -0.35), "rigged": ("establishment", -0.4), "corrupt": ("establishment", -0.25),
+    "the swamp": ("establishment", -0.4), "cover-up": ("establishment", -0.3), "establishment": ("establishment", -0.15),
+    # factuality (sourcing raises it, hedged or unsourced claims lower it)
+    "according to": ("factuality", 0.08), "data show": ("factuality", 0.1), "report found": ("factuality", 0.1),
+    "study": ("factuality", 0.06), "reportedly": ("factuality", -0.1), "sources say": ("factuality", -0.1),
+    "critics say": ("factuality", -0.08), "some say": ("factuality", -0.12), "allegedly": ("factuality", -0.06),
+    "rumor": ("factuality", -0.15), "unconfirmed": ("factuality", -0.15),
+    # sensationalism
+    "shocking": ("sensationalism", 0.25), "slams": ("sensationalism", 0.25), "blasts": ("sensationalism", 0.25),
+    "destroys": ("sensationalism", 0.3), "chaos": ("sensationalism", 0.2), "meltdown": ("sensationalism", 0.3),
+    "bombshell": ("sensationalism", 0.3), "outrage": ("sensationalism", 0.2), "disaster": ("sensationalism", 0.15),
+    "explosive": ("sensationalism", 0.25), "you won't believe": ("sensationalism", 0.4), "furious": ("sensationalism", 0.2),
+    "crisis": ("sensationalism", 0.1), "breaking": ("sensationalism", 0.1),
+}
+_LEXICON_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p in sorted(LEXICON, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_BASELINE = {"factuality": 0.6, "economic": 0.0, "social": 0.0, "establishment": 0.0, "sensationalism": 0.1}
+
+
+@dataclass
+class DimensionScores:
+    factuality: float
+    economic: float
+    social: float
+    establishment: float
+    sensationalism: float
+    highlighted_phrases: List[Dict[str, str]] = field(default_factory=list)
+    method: str = "lexicon"
+
+    def dimensions(self) -> Dict[str, float]:
+        return {d: getattr(self, d) for d in DIMENSIONS}
+
+
+def _clamp(dimension: str, value: float) -> float:
+    low = 0.0 if dimension in UNIT_DIMENSIONS else -1.0
+    return round(max(low, min(1.0, value)), 3)
+
+
+def _text(article: Dict[str, Any]) -> str:
+    return f"{article.get('title', '')}\n{article.get('snippet', '')}"
+
+
+def score_lexicon(article: Dict[str, Any]) -> DimensionScores:
+    """Fast local first pass: phrase lexicon plus a few surface cues"""
+    text = _text(article)
+    values = dict(_BASELINE)
+    highlights: List[Dict[str, str]] = []
+    seen = set()
+    for match in _LEXICON_PATTERN.finditer(text):
+        phrase = match.group(0)
+        dimension, weight = LEXICON[phrase.lower()]
+        values[dimension] += weight
+        if phrase.lower() not in seen:
+            seen.add(phrase.lower())
+            highlights.append({"text": phrase, "dimension": dimension})
+    # Shouting and exclamation marks read as sensational; quotes and figures as sourced
+    values["sensationalism"] += 0.1 * text.count("!") + 0.05 * len(re.findall(r"\b[A-Z]{4,}\b", text))
+    values["factuality"] += 0.05 * min(text.count('"') // 2, 2) + 0.03 * min(len(re.findall(r"\d", text)) // 2, 3)
+    return DimensionScores(
+        **{d: _clamp(d, v) for d, v in values.items()},
+        highlighted_phrases=highlights[:MAX_HIGHLIGHTS],
+        method="lexicon",
+    )
+
+
+def _prompt(articles: Sequence[Dict[str, Any]]) -> str:
+    return "\n".join([
+        "Score each news article below on five bias dimensions: "
+        "factuality 0.0 (unsupported claims) to 1.0 (well sourced); "
+        "economic -1.0 (left: redistribution, regulation) to 1.0 (right: markets, lower taxes); "
+        "social -1.0 (progressive) to 1.0 (conservative); "
+        "establishment -1.0 (distrusts institutions) to 1.0 (pro-establishment); "
+        "sensationalism 0.0 (measured) to 1.0 (emotionally charged).",
+        "Quote up to four short phrases, verbatim from the title or snippet, that drive the scores, "
+        "each with the dimension it affects.",
+        *article_lines(articles),
+        "One result per article, in order, with its [index].",
+    ])
+
+
+DIMENSIONS_PROMPT = register_prompt(PromptTemplate(
+    name="dimensions",
+    version="v2",
+    render=_prompt,
+    schema=object_schema(results={"type": "array", "items": object_schema(
+        index={"type": "integer"},
+        **{d: {"type": "number"} for d in DIMENSIONS},
+        phrases={"type": "array", "items": object_schema(
+            text={"type": "string"}, dimension={"type": "string", "enum": list(DIMENSIONS)},
+        )},
+    )}),
+    output_tokens=20,
+    output_tokens_per_item=OUTPUT_TOKENS_PER_ARTICLE,
+    temperature=0.2,
+))
+
+
+def _parse(content: str, articles: Sequence[Dict[str, Any]]) -> Dict[int, DimensionScores]:
+    """Entries of a batch response, possibly cut off, that carry all five
+    scores; phrases not found in the article are dropped"""
+    data = parse_partial(content)
+    entries = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return {}
+    parsed: Dict[int, DimensionScores] = {}
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(entry.get("index", position))
+            values = {d: _clamp(d, float(entry[d])) for d in DIMENSIONS}
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 0 <= index < len(articles):
+            continue
+        text = _text(articles[index]).lower()
+        phrases = [
+            {"text": str(p["text"]), "dimension": str(p["dimension"])}
+            for p in entry.get("phrases") or []
+            if isinstance(p, dict) and p.get("dimension") in DIMENSIONS
+            and str(p.get("text", "")).strip() and str(p["text"]).lower() in text
+        ]
+        parsed[index] = DimensionScores(**values, highlighted_phrases=phrases, method="ai")
+    return parsed
+
+
+class DimensionEngine:
+    """Lazily computed, memoized five-dimension bias scores for articles.
+
+    The lexicon scorer answers immediately and is the fallback. When OpenAI
+    is configured, articles without a memoized AI result are scored with one
+    batched request per group; AI results are memoized in the classification
+    cache (in-process LRU plus durable tier) and concurrent requests for the
+    same article share one in-flight call, so an article is sent to the LLM
+    at most once.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _key(self, article: Dict[str, Any]) -> str:
+        return classification_cache.make_key(
+            article.get("url"), article.get("title", ""), article.get("snippet", ""),
+            AI_MODEL, DIMENSIONS_PROMPT.cache_version,
+        )
+
+    async def score(self, article: Dict[str, Any]) -> DimensionScores:
+        return (await self.score_many([article]))[0]
+
+    async def score_many(self, articles: Sequence[Dict[str, Any]], allow_llm: bool = True) -> List[DimensionScores]:
+        """Scores in input order. With ``allow_llm=False`` only memoized AI
+        results are used and everything else gets its lexicon score."""
+        lexicon = [score_lexicon(a) for a in articles]
+        results: List[Optional[DimensionScores]] = [None] * len(articles)
+        if not settings.openai_api_key:
+            self._count(lexicon)
+            return lexicon
+
+        keys = [self._key(a) for a in articles]
+        loop = asyncio.get_running_loop()
+        waiting: Dict[int, asyncio.Future] = {}
+        owned: Dict[str, asyncio.Future] = {}
+        to_score: List[int] = []
+        for i, key in enumerate(keys):
+            cached = await classification_cache.get(key)
+            if cached is not None:
+                results[i] = DimensionScores(**cached)
+                continue
+            if not allow_llm:
+                continue
+            future = self._inflight.get(key)
+            if future is not None and future.get_loop() is loop:
+                waiting[i] = future
+            elif key in owned:
+                waiting[i] = owned[key]
+            else:
+                owned[key] = self._inflight[key] = loop.create_future()
+                to_score.append(i)
+
+        try:
+            for start in range(0, len(to_score), self.batch_size):
+                group = to_score[start:start + self.batch_size]
+                scored = await self._score_batch([articles[i] for i in group])
+                for position, i in enumerate(group):
+                    result = scored.get(position)
+                    if result is not None:
+                        await classification_cache.set(keys[i], {
+                            **result.dimensions(),
+                            "highlighted_phrases": result.highlighted_phrases,
+                            "method": result.method,
+                        })
+                    results[i] = result
+                    owned[keys[i]].set_result(result)
+        finally:
+            for key, future in owned.items():
+                if not future.done():
+                    future.set_result(None)
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+        for i, future in waiting.items():
+            results[i] = await future
+
+        final = [r if r is not None else lexicon[i] for i, r in enumerate(results)]
+        self._count(final)
+        return final
+
+    def _count(self, results: Sequence[DimensionScores]) -> None:
+        for result in results:
+            dimension_scores.inc(method=result.method)
+
+    async def _score_batch(self, articles: List[Dict[str, Any]]) -> Dict[int, DimensionScores]:
+        """One chat-completion for a group of articles; missing entries fall back to the lexicon"""
+        answer = await chat_completion(DIMENSIONS_PROMPT, DIMENSIONS_PROMPT.render(articles), len(articles), "openai_dimensions")
+        if answer is None:
+            return {}
+        content, _ = answer
+        return _parse(content, articles)
+
+
+dimension_engine = DimensionEngine()
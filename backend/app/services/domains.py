@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Mapping, Optional
+
+# ICANN section of the Public Suffix List, bundled so resolving a domain
+# needs no network fetch, no on-disk cache and no heavy import; loaded on
+# first use. Regenerate with ``python -m app.services.domains public_suffix_list.dat``.
+SUFFIX_LIST_PATH = Path(__file__).resolve().parent.parent / "data" / "public_suffixes.txt"
+
+_TERMINAL = ""  # trie key marking "an outlet ends at this label"
+
+HOST_CACHE_SIZE = 65536
+
+_IPV4 = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+_suffixes: Optional[tuple[frozenset, frozenset, frozenset]] = None
+
+
+def host_of(url: str) -> str:
+    """Lower-cased host of a URL; bare hosts like ``cnn.com/x`` are accepted"""
+    start = url.find("//")
+    start = 0 if start < 0 else start + 2
+    end = len(url)
+    for sep in "/?#":
+        i = url.find(sep, start)
+        if 0 <= i < end:
+            end = i
+    host = url[start:end].strip()
+    if "@" in host:
+        host = host.rpartition("@")[2]
+    if ":" in host and not host.startswith("["):
+        host = host.partition(":")[0]
+    return host.rstrip(".").lower()
+
+
+def _suffix_rules() -> tuple[frozenset, frozenset, frozenset]:
+    """(exact rules, wildcard parents, exception rules) from the bundled list"""
+    global _suffixes
+    if _suffixes is None:
+        exact, wildcard, exception = set(), set(), set()
+        for rule in SUFFIX_LIST_PATH.read_text(encoding="utf-8").splitlines():
+            if not rule or rule.startswith("//"):
+                continue
+            if rule.startswith("!"):
+                exception.add(rule[1:])
+            elif rule.startswith("*."):
+                wildcard.add(rule[2:])
+            else:
+                exact.add(rule)
+        _suffixes = frozenset(exact), frozenset(wildcard), frozenset(exception)
+    return _suffixes
+
+
+def _suffix_labels(labels: list[str]) -> int:
+    """How many trailing labels form the public suffix.
+
+    A TLD the list does not know is a suffix on its own (the PSL's implicit ``*`` rule).
+    """
+    exact, wildcard, exception = _suffix_rules()
+    for i in range(len(labels)):
+        candidate = ".".join(labels[i:])
+        if candidate in exception:
+            return len(labels) - i - 1
+        if candidate in exact or ".".join(labels[i + 1:]) in wildcard:
+            return len(labels) - i
+    return 1
+
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def registered_domain(host: str) -> Optional[str]:
+    """Registrable domain (``edition.cnn.com`` -> ``cnn.com``) of a host"""
+    host = host.lower()
+    if _IPV4.match(host):
+        return host
+    labels = [label for label in host.split(".") if label]
+    if not labels:
+        return None
+    suffix = _suffix_labels(labels)
+    if suffix >= len(labels):
+        return None  # the host is itself a public suffix
+    return ".".join(labels[-suffix - 1:])
+
+
+class OutletIndex:
+    """Reversed-label trie over outlet domains.
+
+    ``resolve`` walks a host's labels right to left and returns the longest
+    outlet domain it ends with, so ``edition.cnn.com`` and ``amp.cnn.com``
+    resolve to ``cnn.com`` while ``abcnews.go.com`` stays distinct from any
+    ``go.com`` entry. Lookups are O(labels) and memoized per host.
+    """
+
+    def __init__(self, ratings: Mapping[str, float]):
+        self._root: dict = {}
+        for domain, score in ratings.items():
+            node = self._root
+            for label in reversed(domain.lower().split(".")):
+                node = node.setdefault(label, {})
+            node[_TERMINAL] = (domain, score)
+        self.resolve = lru_cache(maxsize=HOST_CACHE_SIZE)(self._resolve)
+
+    def _resolve(self, host: str) -> Optional[tuple[str, float]]:
+        node = self._root
+        match = None
+        for label in reversed(host.split(".")):
+            if not label:
+                break
+            node = node.get(label)
+            if node is None:
+                break
+            match = node.get(_TERMINAL, match)
+        return match
+
+    def resolve_url(self, url: str) -> Optional[tuple[str, float]]:
+        return self.resolve(host_of(url))
+
+
+def build_suffix_list(source: str, dest: Path = SUFFIX_LIST_PATH) -> int:
+    """Write the ICANN rules of a Public Suffix List file (plus punycode forms
+    of internationalized rules) to ``dest``; returns the number of rules"""
+    rules: list[str] = []
+    icann = False
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if "===BEGIN ICANN DOMAINS===" in line:
+                icann = True
+            elif "===END ICANN DOMAINS===" in line:
+                break
+            elif icann and line and not line.startswith("//"):
+                rule = line.split()[0].lower()
+                rules.append(rule)
+                prefix = rule[:1] if rule[:1] == "!" else "*." if rule.startswith("*.") else ""
+                try:
+                    puny = prefix + rule[len(prefix):].encode("idna").decode("ascii")
+                except UnicodeError:
+                    continue
+                if puny != rule:
+                    rules.append(puny)
+    with open(dest, "w", encoding="utf-8") as f:
+        f.write(f"// ICANN section of the Public Suffix List (https://publicsuffix.org/list/), {len(rules)} rules\n")
+        f.write("\n".join(rules) + "\n")
+    return len(rules)
+
+
+if __name__ == "__main__":
+    print(f"{build_suffix_list(sys.argv[1])} rules written to {SUFFIX_LIST_PATH}")
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
-import httpx
+import asyncio
 import logging
+from dataclasses import dataclass
 from typing import Any, Dict, Optional
 from datetime import datetime
 from ..config import settings
+from .http import get_client
+from .cache import classification_cache
+from .deadline import can_afford, expired, hedged, time_left
+from .dedup import dedup_results
+from .search_cache import search_cache
+from .outlets import registry_status
+from .ratelimit import cse_guard, parse_retry_after, upstream_status
+from .metrics import stage, upstream_requests
 
 BASE_URL = "https://www.googleapis.com/customsearch/v1"
 
@@ -16,10 +25,17 @@ class APIStatus:
     def __init__(self):
         self.total_requests = 0
         self.failed_requests = 0
-        self.rate_limited = False
         self.last_error = None
         self.last_request_time = None
-        self.quota_exceeded = False
+        
+    # Derived from the CSE circuit breaker, so both recover on their own
+    @property
+    def rate_limited(self) -> bool:
+        return cse_guard.rate_limited
+    
+    @property
+    def quota_exceeded(self) -> bool:
+        return cse_guard.quota_exceeded
         
     def record_request(self):
         self.total_requests += 1
@@ -28,12 +44,6 @@ class APIStatus:
     def record_error(self, error_type: str, message: str):
         self.failed_requests += 1
         self.last_error = {"type": error_type, "message": message, "time": datetime.now()}
-        
-        if "quota" in message.lower() or "limit" in message.lower():
-            self.quota_exceeded = True
-            self.rate_limited = True
-        elif error_type == "rate_limit":
-            self.rate_limited = True
 
 api_status = APIStatus()
 
@@ -48,12 +58,31 @@ TARGET_OUTLETS = [
 ]
 
 
-async def search_news(query: str, num: int = 10) -> list[dict[str, Any]]:
-    if not settings.google_api_key or not settings.google_cse_id:
-        return []
-    
-    all_results = []
-    
+# CSE serves at most the first 100 results of a query, 10 per request
+CSE_MAX_RESULTS = 100
+CSE_MAX_NUM = 10
+
+# Per-request timeout, shortened to the search budget left; a fan-out is not
+# started with less than MIN_FANOUT_SECONDS to go
+CSE_TIMEOUT = 20.0
+MIN_FANOUT_SECONDS = 0.5
+
+
+@dataclass(slots=True)
+class Feed:
+    """One CSE query of the fan-out and how far into its results it has been read"""
+    query: str
+    num: int
+    start: int = 1  # 1-based offset of the next result to fetch
+    done: bool = False
+
+    def advance(self, returned: int, more: bool) -> None:
+        self.start += returned
+        self.done = not more or not returned or self.start > CSE_MAX_RESULTS
+
+
+def outlet_feeds(query: str) -> list[Feed]:
+    """The first-page fan-out for a query: one feed per outlet group plus a general one"""
     # Simplified search strategy - fewer API calls for faster response
     outlet_groups = [
         # Liberal sources
@@ -65,114 +94,179 @@ async def search_news(query: str, num: int = 10) -> list[dict[str, Any]]:
         # Quality mainstream
         f"{query} site:nytimes.com OR site:washingtonpost.com OR site:politico.com"
     ]
+    feeds = [Feed(outlet_query, 3) for outlet_query in outlet_groups]
+    feeds.append(Feed(query, 6))  # One general search for additional coverage
+    return feeds
+
+
+async def search_news(query: str, num: int = 10, feeds: Optional[list[Feed]] = None) -> list[dict[str, Any]]:
+    """Fan out ``feeds`` (by default ``outlet_feeds(query)``) and dedup the results.
+
+    Each feed fetches ``feed.num`` results from ``feed.start`` and is
+    advanced past what it returned, so callers holding on to ``feeds``
+    can continue from there; exhausted feeds are skipped.
+    """
+    if not settings.google_api_key or not settings.google_cse_id:
+        return []
+    if feeds is None:
+        feeds = outlet_feeds(query)
+    if not can_afford(MIN_FANOUT_SECONDS, "cse_fanout"):
+        return []
     
-    # Search each group - reduced from 9 to 4 API calls
-    for outlet_query in outlet_groups:
-        outlet_results = await _search_with_params(outlet_query, num=3)
-        all_results.extend(outlet_results)
-    
-    # One general search for additional coverage
-    general_results = await _search_with_params(query, num=6)
-    all_results.extend(general_results)
+    # Fan out all group queries plus one general query concurrently over the
+    # shared pool; whatever has arrived by the deadline (the fan-out's own,
+    # or the search's end-to-end one if sooner) is used.
+    with stage("cse_fanout"):
+        all_results = await _fan_out([feed for feed in feeds if not feed.done], time_left(settings.search_deadline_seconds))
     
-    # Remove duplicates based on URL and title similarity
-    seen_urls = set()
-    seen_titles = set()
-    unique_results = []
+    with stage("dedup"):
+        # Canonical URL + SimHash clustering, so wire copies and utm variants
+        # don't each cost an AI classification
+        return dedup_results(all_results, settings.dedup_max_distance)[:num]
+
+
+async def _fan_out(feeds: list[Feed], deadline: float) -> list[dict[str, Any]]:
+    """Run CSE queries concurrently, returning results in query order.
+
+    Queries still pending when ``deadline`` seconds elapse are cancelled and
+    the partial results from the ones that finished are returned; their
+    feeds stay where they were.
+    """
+    tasks = [asyncio.create_task(_search_with_params(feed.query, num=feed.num, feed=feed)) for feed in feeds]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
     
-    for result in all_results:
-        url = result.get("link", "")
-        title = result.get("title", "").lower()
-        
-        # Skip if we've seen this URL
-        if url and url in seen_urls:
-            continue
-            
-        # Skip if we've seen a very similar title (first 50 chars)
-        title_key = title[:50] if title else ""
-        if title_key and title_key in seen_titles:
-            continue
-            
-        if url:
-            seen_urls.add(url)
-            if title_key:
-                seen_titles.add(title_key)
-            unique_results.append(result)
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        api_status.record_error("timeout", f"{len(pending)} of {len(tasks)} search groups missed the {deadline}s deadline")
+        logger.warning(f"Search fan-out returning partial results: {len(pending)} group(s) timed out")
     
-    return unique_results[:num]
+    results: list[dict[str, Any]] = []
+    for task in tasks:
+        if task in done and not task.cancelled() and task.exception() is None:
+            results.extend(task.result())
+    return results
+
 
+async def _search_with_params(query: str, num: int = 10, feed: Optional[Feed] = None) -> list[dict[str, Any]]:
+    """Helper function to perform actual Google search with comprehensive error handling.
 
-async def _search_with_params(query: str, num: int = 10) -> list[dict[str, Any]]:
-    """Helper function to perform actual Google search with comprehensive error handling"""
+    With ``feed``, fetches from ``feed.start`` and advances the feed on
+    success only, so a failed page is retried on the next continuation.
+    The request is hedged once it outlives the recent CSE p95, and times
+    out with the search's budget.
+    """
+    import httpx  # loaded with the pooled client, after cold start
+    
+    start = feed.start if feed is not None else 1
     params = {
         "q": query,
         "cx": settings.google_cse_id,
         "key": settings.google_api_key,
-        "num": min(max(num, 1), 10),
+        "num": min(max(num, 1), CSE_MAX_NUM, CSE_MAX_RESULTS + 1 - start),
         "safe": "medium",
         "lr": "lang_en",
         "sort": "date",  # Get recent articles
     }
+    if start > 1:
+        params["start"] = start
+    
+    # Paced by the shared token bucket; skipped while the breaker is open
+    if not await cse_guard.acquire():
+        upstream_requests.inc(upstream="google_cse", outcome="skipped")
+        logger.info(f"Skipping Google API call ({cse_guard.breaker.reason or 'throttled'}): {query[:50]}")
+        return []
     
     api_status.record_request()
     
     try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            r = await client.get(BASE_URL, params=params)
-            
-            # Handle different HTTP status codes
-            if r.status_code == 429:
-                api_status.record_error("rate_limit", "Too many requests - rate limited")
-                logger.warning("Google API rate limit exceeded")
-                return []
-            elif r.status_code == 403:
-                error_data = r.json() if r.content else {}
-                error_message = error_data.get("error", {}).get("message", "Forbidden")
-                
-                if "quota" in error_message.lower() or "limit" in error_message.lower():
-                    api_status.record_error("quota_exceeded", f"API quota exceeded: {error_message}")
-                    logger.error(f"Google API quota exceeded: {error_message}")
-                else:
-                    api_status.record_error("forbidden", f"API access forbidden: {error_message}")
-                    logger.error(f"Google API forbidden: {error_message}")
-                return []
-            elif r.status_code == 400:
-                error_data = r.json() if r.content else {}
-                error_message = error_data.get("error", {}).get("message", "Bad request")
-                api_status.record_error("bad_request", f"Invalid API request: {error_message}")
-                logger.error(f"Google API bad request: {error_message}")
-                return []
-            
-            r.raise_for_status()
-            data = r.json()
-            
-            # Check for API errors in response
-            if "error" in data:
-                error_info = data["error"]
-                error_message = error_info.get("message", "Unknown API error")
-                error_code = error_info.get("code", "unknown")
-                
-                if error_code == 403 or "quota" in error_message.lower():
-                    api_status.record_error("quota_exceeded", f"API quota exceeded: {error_message}")
-                    logger.error(f"Google API quota exceeded: {error_message}")
-                else:
-                    api_status.record_error("api_error", f"API error {error_code}: {error_message}")
-                    logger.error(f"Google API error: {error_message}")
-                return []
+        client = get_client()
+        with stage("cse_request"):
+            r = await hedged(
+                "google_cse",
+                cse_guard.latency,
+                lambda: client.get(BASE_URL, params=params, timeout=time_left(CSE_TIMEOUT)),
+                admit=cse_guard.acquire,
+            )
+        upstream_requests.inc(upstream="google_cse", outcome=r.status_code)
+        
+        # Handle different HTTP status codes
+        if r.status_code == 429:
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            cse_guard.record_rate_limited(retry_after)
+            api_status.record_error("rate_limit", "Too many requests - rate limited")
+            logger.warning("Google API rate limit exceeded")
+            return []
+        elif r.status_code == 403:
+            error_data = r.json() if r.content else {}
+            error_message = error_data.get("error", {}).get("message", "Forbidden")
             
-            items = data.get("items", [])
-            logger.info(f"Successfully fetched {len(items)} results for query: {query[:50]}...")
-            return items
+            if "quota" in error_message.lower() or "limit" in error_message.lower():
+                cse_guard.record_quota_exceeded()
+                api_status.record_error("quota_exceeded", f"API quota exceeded: {error_message}")
+                logger.error(f"Google API quota exceeded: {error_message}")
+            else:
+                cse_guard.record_failure("forbidden")
+                api_status.record_error("forbidden", f"API access forbidden: {error_message}")
+                logger.error(f"Google API forbidden: {error_message}")
+            return []
+        elif r.status_code == 400:
+            cse_guard.record_success()  # upstream is healthy; the request itself was bad
+            error_data = r.json() if r.content else {}
+            error_message = error_data.get("error", {}).get("message", "Bad request")
+            api_status.record_error("bad_request", f"Invalid API request: {error_message}")
+            logger.error(f"Google API bad request: {error_message}")
+            return []
+        
+        r.raise_for_status()
+        data = r.json()
+        
+        # Check for API errors in response
+        if "error" in data:
+            error_info = data["error"]
+            error_message = error_info.get("message", "Unknown API error")
+            error_code = error_info.get("code", "unknown")
             
+            if error_code == 403 or "quota" in error_message.lower():
+                cse_guard.record_quota_exceeded()
+                api_status.record_error("quota_exceeded", f"API quota exceeded: {error_message}")
+                logger.error(f"Google API quota exceeded: {error_message}")
+            else:
+                cse_guard.record_failure("api_error")
+                api_status.record_error("api_error", f"API error {error_code}: {error_message}")
+                logger.error(f"Google API error: {error_message}")
+            return []
+        
+        cse_guard.record_success()
+        items = data.get("items", [])
+        if feed is not None:
+            # CSE lists a nextPage query while there are more results
+            queries = data.get("queries")
+            feed.advance(len(items), "nextPage" in queries if isinstance(queries, dict) else len(items) >= params["num"])
+        logger.info(f"Successfully fetched {len(items)} results for query: {query[:50]}...")
+        return items
+        
+    except asyncio.CancelledError:
+        # Cancelled by our own fan-out window or search deadline (or a won
+        # hedge): not an upstream fault, so the breaker is left alone
+        upstream_requests.inc(upstream="google_cse", outcome="deadline")
+        raise
     except httpx.TimeoutException:
+        upstream_requests.inc(upstream="google_cse", outcome="timeout")
+        if not expired():
+            cse_guard.record_failure("timeout")  # running out of our own budget is not an upstream fault
         api_status.record_error("timeout", "Request timed out")
         logger.warning("Google API request timed out")
         return []
     except httpx.HTTPStatusError as e:
+        cse_guard.record_failure("http_error")
         api_status.record_error("http_error", f"HTTP {e.response.status_code}: {str(e)}")
         logger.error(f"Google API HTTP error: {e}")
         return []
     except Exception as e:
+        upstream_requests.inc(upstream="google_cse", outcome="error")
+        cse_guard.record_failure("unknown")
         api_status.record_error("unknown", str(e))
         logger.error(f"Unexpected Google API error: {e}")
         return []
@@ -188,5 +282,9 @@ def get_api_status() -> Dict[str, Any]:
         "quota_exceeded": api_status.quota_exceeded,
         "last_error": api_status.last_error,
         "last_request_time": api_status.last_request_time.isoformat() if api_status.last_request_time else None,
-        "api_configured": bool(settings.google_api_key and settings.google_cse_id)
+        "api_configured": bool(settings.google_api_key and settings.google_cse_id),
+        "classification_cache": classification_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "outlet_registry": registry_status(),
+        "upstreams": upstream_status(),
     } 
\ No newline at end of file
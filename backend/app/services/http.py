@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+# Shared connection pool for all upstream calls (Google CSE, OpenAI).
+# Reusing one client keeps TLS sessions and keep-alive connections warm
+# across requests instead of paying a fresh handshake for every call.
+# httpx is imported with the first client, not at cold start.
+POOL_LIMITS = dict(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0)
+DEFAULT_TIMEOUT = dict(timeout=20.0, connect=5.0)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client, creating it on first use.
+
+    The pool is bound to the event loop that created it; if the running loop
+    changes (e.g. one ``asyncio.run`` per request) a new client is created.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        import httpx
+
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(**DEFAULT_TIMEOUT), limits=httpx.Limits(**POOL_LIMITS))
+        _client_loop = loop
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client. Call from the app's shutdown hook."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
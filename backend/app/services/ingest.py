@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..config import settings
+from .metrics import counter, stage
+from .ratelimit import cse_guard
+from .search import search_and_classify
+from .search_cache import normalize_query, search_cache
+
+logger = logging.getLogger(__name__)
+
+ingested = counter("newsanalyzer_ingest_queries_total", "Background ingestion runs per query, by outcome")
+
+# Popularity of user queries decays with this half-life
+POPULARITY_HALF_LIFE = 3600.0
+MAX_TRACKED_QUERIES = 1000
+
+
+class IngestWorker:
+    """Periodically pre-fetches and pre-classifies topics and popular queries.
+
+    Each cycle runs ``search_and_classify`` for the configured topics plus the
+    most searched recent queries and stores the results in the query cache,
+    fresh until the next cycle, so interactive requests for them never wait
+    on CSE or OpenAI. Cycles stop early while CSE is rate limited, out of
+    quota, or past ``quota_share`` of its daily quota, leaving the rest for
+    live searches.
+    """
+
+    def __init__(
+        self,
+        topics: Sequence[str],
+        interval: float,
+        popular: int = 10,
+        quota_share: float = 0.5,
+    ):
+        self.topics = list(topics)
+        self.interval = interval
+        self.popular = popular
+        self.quota_share = quota_share
+        # normalized query -> [decayed score, last update, query as typed]
+        self._popularity: Dict[str, List[Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.last_cycle: Optional[Dict[str, Any]] = None
+
+    def record_query(self, query: str) -> None:
+        key = normalize_query(query)
+        if not key:
+            return
+        now = time.monotonic()
+        entry = self._popularity.get(key)
+        if entry is None:
+            if len(self._popularity) >= MAX_TRACKED_QUERIES:
+                coldest = min(self._popularity, key=lambda k: self._score(k, now))
+                del self._popularity[coldest]
+            self._popularity[key] = [1.0, now, query.strip()]
+        else:
+            entry[0] = self._score(key, now) + 1.0
+            entry[1] = now
+
+    def _score(self, key: str, now: float) -> float:
+        score, updated, _ = self._popularity[key]
+        return score * 0.5 ** ((now - updated) / POPULARITY_HALF_LIFE)
+
+    def popular_queries(self, n: int) -> List[str]:
+        now = time.monotonic()
+        ranked = sorted(self._popularity, key=lambda k: self._score(k, now), reverse=True)
+        return [self._popularity[k][2] for k in ranked[:n]]
+
+    def queries(self) -> List[str]:
+        """Topics first, then popular queries not already covered"""
+        seen, queries = set(), []
+        for query in self.topics + self.popular_queries(self.popular):
+            key = normalize_query(query)
+            if key and key not in seen:
+                seen.add(key)
+                queries.append(query)
+        return queries
+
+    def _budget_left(self) -> bool:
+        if cse_guard.rate_limited or cse_guard.quota_exceeded:
+            return False
+        if cse_guard.daily_quota:
+            return cse_guard.quota_used() < cse_guard.daily_quota * self.quota_share
+        return True
+
+    async def run_once(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        warmed, empty, skipped = 0, 0, 0
+        queries = self.queries()
+        # Keep entries fresh until the next cycle has had time to replace them
+        ttl = self.interval * 1.5
+        with stage("ingest_cycle"):
+            for i, query in enumerate(queries):
+                if not self._budget_left():
+                    skipped = len(queries) - i
+                    ingested.inc(skipped, outcome="skipped")
+                    break
+                try:
+                    articles = await search_cache.refresh(query, lambda q=query: search_and_classify(q), ttl=ttl)
+                except Exception as e:
+                    logger.warning(f"Ingestion failed for {query!r}: {e}")
+                    articles = []
+                if articles:
+                    warmed += 1
+                    ingested.inc(outcome="warmed")
+                else:
+                    empty += 1
+                    ingested.inc(outcome="empty")
+        self.cycles += 1
+        self.last_cycle = {
+            "warmed": warmed,
+            "empty": empty,
+            "skipped": skipped,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        logger.info(f"Ingestion cycle {self.cycles}: {self.last_cycle}")
+        return self.last_cycle
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ingestion cycle failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "topics": len(self.topics),
+            "tracked_queries": len(self._popularity),
+            "popular_queries": self.popular_queries(self.popular),
+            "cycles": self.cycles,
+            "last_cycle": self.last_cycle,
+        }
+
+
+ingest_worker = IngestWorker(
+    topics=settings.ingest_topics,
+    interval=settings.ingest_interval_seconds,
+    popular=settings.ingest_popular_queries,
+    quota_share=settings.ingest_quota_share,
+)
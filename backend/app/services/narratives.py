@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from .dimensions import DIMENSIONS, DimensionScores, dimension_engine
+from .metrics import stage
+
+# Hashed TF-IDF over title + snippet unigrams and bigrams
+FEATURE_BITS = 20
+_FEATURE_MASK = (1 << FEATURE_BITS) - 1
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a about after an and are as at be been but by can could for from has have he her his how in into is it its "
+    "new news not of on or over says said she than that the their they this to up was we were what when who will "
+    "with would you".split()
+)
+
+# An article joins the most similar narrative at or above this cosine, else starts one
+JOIN_THRESHOLD = 0.28
+# Centroids keep only their heaviest features; enough to match and to name them
+CENTROID_FEATURES = 64
+# Candidates come from an article's heaviest (rarest) features; features
+# shared by this many narratives stop being used to find them
+QUERY_FEATURES = 16
+MAX_POSTINGS = 200
+CANDIDATES = 12
+SNAPSHOT_SIZE = 20
+MIN_NARRATIVE_SIZE = 2
+
+
+def _feature(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "big") & _FEATURE_MASK
+
+
+@dataclass
+class _Narrative:
+    id: str
+    title: str
+    centroid: Dict[int, float] = field(default_factory=dict)  # summed member vectors, pruned
+    article_ids: List[str] = field(default_factory=list)
+    sources: Dict[str, int] = field(default_factory=dict)
+    bias_sum: Dict[str, float] = field(default_factory=lambda: {d: 0.0 for d in DIMENSIONS})
+    norm: float = 1.0
+    updated: float = 0.0
+
+
+class NarrativeIndex:
+    """Incremental (leader) clustering of articles into narratives.
+
+    Each article becomes a hashed TF-IDF vector (IDF from document
+    frequencies seen so far) and is compared only with the narratives that
+    share one of its features, found through an inverted index over the
+    narratives' centroid features. It joins the closest one above
+    ``JOIN_THRESHOLD`` or starts a new narrative, so adding a batch costs
+    O(batch) regardless of corpus size and nothing is ever re-clustered.
+
+    ``centroid_bias`` is the mean of the members' bias dimensions. After
+    every batch the top narratives are rebuilt into an immutable snapshot
+    that ``snapshot()`` returns without further work.
+    """
+
+    def __init__(self, join_threshold: float = JOIN_THRESHOLD):
+        self.join_threshold = join_threshold
+        self._lock = threading.Lock()
+        self._df: Dict[int, int] = {}
+        self._docs = 0
+        self._tokens: Dict[int, str] = {}  # feature -> a token it came from, for naming
+        self._narratives: Dict[str, _Narrative] = {}
+        self._postings: Dict[int, set] = {}
+        self._member_of: Dict[str, str] = {}
+        self._next_id = 0
+        self._top: List[str] = []
+        self._snapshot: List[Dict[str, Any]] = []
+        self.snapshot_built = 0.0
+
+    def _terms(self, article: Dict[str, Any]) -> Dict[int, int]:
+        words = [t for t in _TOKEN.findall(f"{article.get('title', '')} {article.get('snippet', '')}".lower())
+                 if t not in _STOPWORDS and len(t) > 1]
+        counts: Dict[int, int] = {}
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            f = _feature(term)
+            counts[f] = counts.get(f, 0) + 1
+            if f not in self._tokens and " " not in term:
+                self._tokens[f] = term
+        return counts
+
+    def _vector(self, counts: Dict[int, int]) -> Dict[int, float]:
+        vector = {
+            f: (1 + math.log(tf)) * math.log((1 + self._docs) / (1 + self._df.get(f, 0)) + 1)
+            for f, tf in counts.items()
+        }
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {f: w / norm for f, w in vector.items()}
+
+    def _candidates(self, vector: Dict[int, float]) -> List[str]:
+        overlap: Dict[str, float] = {}
+        for f, w in heapq.nlargest(QUERY_FEATURES, vector.items(), key=lambda item: item[1]):
+            posting = self._postings.get(f)
+            if posting is None or len(posting) >= MAX_POSTINGS:
+                continue
+            for narrative_id in posting:
+                overlap[narrative_id] = overlap.get(narrative_id, 0.0) + w
+        return heapq.nlargest(CANDIDATES, overlap, key=overlap.__getitem__)
+
+    def _join(self, narrative: _Narrative, vector: Dict[int, float]) -> None:
+        centroid = narrative.centroid
+        for f, w in vector.items():
+            centroid[f] = centroid.get(f, 0.0) + w
+        if len(centroid) > CENTROID_FEATURES * 2:
+            keep = dict(heapq.nlargest(CENTROID_FEATURES, centroid.items(), key=lambda item: item[1]))
+            for f in centroid.keys() - keep.keys():
+                posting = self._postings.get(f)
+                if posting is not None:
+                    posting.discard(narrative.id)
+            narrative.centroid = centroid = keep
+        for f in vector:
+            if f in centroid:
+                self._postings.setdefault(f, set()).add(narrative.id)
+        narrative.norm = math.sqrt(sum(w * w for w in centroid.values())) or 1.0
+
+    def add(self, articles: Sequence[Dict[str, Any]], scores: Sequence[DimensionScores]) -> int:
+        """Absorb new articles (with their bias dimensions); returns how many were new"""
+        added = 0
+        touched: set = set()
+        now = time.time()
+        with self._lock:
+            for article, score in zip(articles, scores):
+                article_id = article.get("id")
+                if not article_id or article_id in self._member_of:
+                    continue
+                counts = self._terms(article)
+                if not counts:
+                    continue
+                self._docs += 1
+                for f in counts:
+                    self._df[f] = self._df.get(f, 0) + 1
+                vector = self._vector(counts)
+
+                best, best_similarity = None, 0.0
+                for narrative_id in self._candidates(vector):
+                    narrative = self._narratives[narrative_id]
+                    centroid = narrative.centroid
+                    similarity = sum(w * centroid.get(f, 0.0) for f, w in vector.items()) / narrative.norm
+                    if similarity > best_similarity:
+                        best, best_similarity = narrative, similarity
+                if best is None or best_similarity < self.join_threshold:
+                    self._next_id += 1
+                    best = _Narrative(id=f"n{self._next_id}", title=article.get("title", ""))
+                    self._narratives[best.id] = best
+
+                self._join(best, vector)
+                best.article_ids.append(article_id)
+                source = article.get("source") or "unknown"
+                best.sources[source] = best.sources.get(source, 0) + 1
+                for d in DIMENSIONS:
+                    best.bias_sum[d] += getattr(score, d)
+                best.updated = now
+                self._member_of[article_id] = best.id
+                touched.add(best.id)
+                added += 1
+            if added:
+                self._rebuild_snapshot(touched)
+        return added
+
+    async def absorb(self, articles: Sequence[Dict[str, Any]]) -> int:
+        """Add freshly classified articles, scoring their dimensions without new LLM calls"""
+        new = [a for a in articles if a.get("id") and a["id"] not in self._member_of]
+        if not new:
+            return 0
+        # Memoized AI scores where an article was already opened, the lexicon otherwise
+        scores = await dimension_engine.score_many(new, allow_llm=False)
+        with stage("narratives"):
+            return self.add(new, scores)
+
+    def _describe(self, narrative: _Narrative) -> str:
+        terms = [
+            self._tokens[f]
+            for f, _ in heapq.nlargest(8, narrative.centroid.items(), key=lambda item: item[1])
+            if f in self._tokens
+        ][:4]
+        outlets = len(narrative.sources)
+        text = f"{len(narrative.article_ids)} articles from {outlets} outlet{'s' if outlets != 1 else ''}"
+        return f"{text}; key terms: {', '.join(terms)}" if terms else text
+
+    def _rebuild_snapshot(self, touched: set) -> None:
+        # Bigger and more recently updated narratives first (one-day half-life).
+        # Untouched narratives all decay by the same factor and keep their
+        # order, so the new top is drawn from the old top plus this batch's.
+        now = time.time()
+        eligible = (
+            self._narratives[i] for i in touched.union(self._top)
+            if len(self._narratives[i].article_ids) >= MIN_NARRATIVE_SIZE
+        )
+        top = heapq.nlargest(
+            SNAPSHOT_SIZE, eligible,
+            key=lambda n: len(n.article_ids) * 0.5 ** ((now - n.updated) / 86400),
+        )
+        self._snapshot = [
+            {
+                "id": n.id,
+                "title": n.title,
+                "description": self._describe(n),
+                "article_ids": list(n.article_ids[-50:]),
+                "centroid_bias": {d: round(n.bias_sum[d] / len(n.article_ids), 3) for d in DIMENSIONS},
+            }
+            for n in top
+        ]
+        self._top = [n.id for n in top]
+        self.snapshot_built = now
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return self._snapshot
+
+    def narrative_of(self, article_id: str) -> Optional[str]:
+        return self._member_of.get(article_id)
+
+    def siblings(self, article_id: str, limit: int) -> List[str]:
+        """Up to ``limit`` other members of an article's narrative, most recent first"""
+        narrative_id = self._member_of.get(article_id)
+        if narrative_id is None or limit <= 0:
+            return []
+        with self._lock:
+            members = self._narratives[narrative_id].article_ids[::-1]
+        return [i for i in members if i != article_id][:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "articles": len(self._member_of),
+            "narratives": len(self._narratives),
+            "in_snapshot": len(self._snapshot),
+            "snapshot_age_seconds": round(time.time() - self.snapshot_built, 1) if self.snapshot_built else None,
+        }
+
+
+narrative_index = NarrativeIndex()
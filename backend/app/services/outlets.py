@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+from ..config import settings
+from .domains import OutletIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = Path(__file__).resolve().parent.parent / "data" / "outlets.json"
+
+# How often (seconds) get_registry() stats the file for changes
+RELOAD_CHECK_INTERVAL = 5.0
+
+
+class RegistryError(ValueError):
+    """The outlet registry file is malformed or fails validation"""
+
+
+@dataclass(frozen=True)
+class OutletRegistry:
+    """Immutable snapshot of the outlet bias table and its lookup index"""
+
+    version: str
+    ratings: Mapping[str, float]
+    index: OutletIndex
+    path: str
+    mtime: float
+    loaded_at: float
+
+
+def _reject_duplicates(pairs: list[tuple[str, Any]]) -> dict[str, Any]:
+    keys = [k for k, _ in pairs]
+    duplicates = sorted({k for k in keys if keys.count(k) > 1})
+    if duplicates:
+        raise RegistryError(f"duplicate keys: {', '.join(duplicates)}")
+    return dict(pairs)
+
+
+def parse_registry(text: str) -> tuple[str, dict[str, float]]:
+    """Validate registry JSON and return ``(version, {domain: score})``"""
+    try:
+        data = json.loads(text, object_pairs_hook=_reject_duplicates)
+    except json.JSONDecodeError as e:
+        raise RegistryError(f"invalid JSON: {e}") from e
+
+    version = data.get("version")
+    if not isinstance(version, str) or not version:
+        raise RegistryError("missing 'version'")
+
+    ratings: dict[str, float] = {}
+    owner: dict[str, str] = {}
+    for group in data.get("groups", []):
+        name = group.get("name", "?")
+        for domain, score in group.get("outlets", {}).items():
+            if domain != domain.strip().lower() or "." not in domain:
+                raise RegistryError(f"{name}: invalid domain {domain!r}")
+            if domain in ratings:
+                raise RegistryError(f"{domain} listed in both {owner[domain]!r} and {name!r}")
+            if isinstance(score, bool) or not isinstance(score, (int, float)) or not -1.0 <= score <= 1.0:
+                raise RegistryError(f"{domain}: score {score!r} outside [-1.0, 1.0]")
+            ratings[domain] = float(score)
+            owner[domain] = name
+    if not ratings:
+        raise RegistryError("registry has no outlets")
+    return version, ratings
+
+
+def load_registry(path: str | os.PathLike) -> OutletRegistry:
+    """Read, validate and index a registry file into a new snapshot"""
+    path = str(path)
+    mtime = os.stat(path).st_mtime
+    with open(path, encoding="utf-8") as f:
+        version, ratings = parse_registry(f.read())
+    return OutletRegistry(
+        version=version,
+        ratings=MappingProxyType(ratings),
+        index=OutletIndex(ratings),
+        path=path,
+        mtime=mtime,
+        loaded_at=time.time(),
+    )
+
+
+_registry: Optional[OutletRegistry] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def get_registry() -> OutletRegistry:
+    """Current registry snapshot, reloaded when the file changes on disk.
+
+    A reload builds the complete new snapshot before swapping the module
+    reference, so callers see either the old table or the new one, never a
+    partial one. A file that fails validation is logged and ignored.
+    """
+    global _registry, _last_check
+    now = time.monotonic()
+    if _registry is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+        return _registry
+
+    with _reload_lock:
+        if _registry is not None and now - _last_check < RELOAD_CHECK_INTERVAL:
+            return _registry
+        _last_check = now
+        path = settings.outlet_registry_path or str(DEFAULT_REGISTRY_PATH)
+        if _registry is None:
+            _registry = load_registry(path)
+            return _registry
+        try:
+            changed = path != _registry.path or os.stat(path).st_mtime != _registry.mtime
+            if changed:
+                fresh = load_registry(path)
+                logger.info(f"Outlet registry reloaded: {_registry.version} -> {fresh.version}")
+                _registry = fresh
+        except (OSError, RegistryError) as e:
+            logger.error(f"Outlet registry reload failed, keeping version {_registry.version}: {e}")
+        return _registry
+
+
+def registry_status() -> Dict[str, Any]:
+    registry = get_registry()
+    return {
+        "version": registry.version,
+        "outlets": len(registry.ratings),
+        "loaded_at": registry.loaded_at,
+    }
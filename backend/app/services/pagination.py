@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..config import settings
+from .dedup import DedupIndex
+from .google import Feed, outlet_feeds
+from .metrics import counter, gauge_func
+from .records import ArticleRecord, dumps
+from .search_cache import normalize_query, search_cache
+from .shared_state import background, get_state
+
+logger = logging.getLogger(__name__)
+
+search_pages = counter("newsanalyzer_search_pages_total", "Continuation pages served, by source")
+
+# Tokens handed out with a first page name the query, not a cursor: state is
+# only created once a client actually asks for more
+FIRST_PAGE = "q:"
+
+
+class SearchCursor:
+    """Where a search's continuation stands, kept server-side between pages.
+
+    ``feeds`` hold the next CSE offset of each query of the fan-out,
+    ``index`` every article delivered or pooled so far (canonical URL +
+    SimHash) and ``pool`` the deduplicated candidates not picked yet, so a
+    page fetches and classifies only results no earlier page had.
+    """
+
+    __slots__ = ("id", "query", "feeds", "index", "pool", "page", "last", "lock")
+
+    def __init__(
+        self,
+        query: str,
+        feeds: List[Feed],
+        index: DedupIndex,
+        pool: List[ArticleRecord],
+        page: int = 1,
+        cursor_id: Optional[str] = None,
+        last: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ):
+        self.id = cursor_id or uuid.uuid4().hex[:16]
+        self.query = query
+        self.feeds = feeds
+        self.index = index
+        self.pool = pool
+        self.page = page  # pages served so far
+        self.last = last  # (token, payload) of the latest page, replayed on retries
+        self.lock = asyncio.Lock()
+
+    @property
+    def token(self) -> str:
+        return f"{self.id}.{self.page}"
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.pool and all(feed.done for feed in self.feeds)
+
+    def accepts(self, token: str) -> bool:
+        return token == self.token or (token.startswith(FIRST_PAGE) and self.page == 1)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "query": self.query,
+            "feeds": [[feed.query, feed.num, feed.start, feed.done] for feed in self.feeds],
+            "keys": sorted(self.index.keys),
+            "fingerprints": self.index.fingerprints,
+            "pool": [record.to_dict() for record in self.pool],
+            "page": self.page,
+            "last": list(self.last) if self.last is not None else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], cursor_id: Optional[str] = None) -> "SearchCursor":
+        index = DedupIndex(settings.dedup_max_distance)
+        for fingerprint in state["fingerprints"]:
+            index.add("", fingerprint)
+        index.keys.update(state["keys"])
+        last = state.get("last")
+        return cls(
+            state["query"],
+            [Feed(*feed) for feed in state["feeds"]],
+            index,
+            [ArticleRecord(**record) for record in state["pool"]],
+            page=state.get("page", 1),
+            cursor_id=cursor_id,
+            last=(last[0], last[1]) if last else None,
+        )
+
+
+def first_page_token(query: str) -> str:
+    """The cursor returned with a search's first page"""
+    return FIRST_PAGE + base64.urlsafe_b64encode(normalize_query(query).encode()).decode().rstrip("=")
+
+
+def _token_query(token: str) -> Optional[str]:
+    encoded = token[len(FIRST_PAGE):]
+    try:
+        return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def _seed_index(articles: Sequence[ArticleRecord]) -> DedupIndex:
+    index = DedupIndex(settings.dedup_max_distance)
+    for article in articles:
+        index.add_article(article.url, article.title, article.snippet)
+    return index
+
+
+class SearchCursors:
+    """Continuation state for ``/search/more``.
+
+    Every live search ``remember``s its fan-out feeds and candidate pool as
+    the seed for its query, for as long as its results stay in the query
+    cache. A first-page token opens a new cursor from that seed (or, when
+    the seed is gone, from the cached first page with feeds advanced past
+    it); later tokens name the cursor and the page to continue from.
+    Cursors live ``ttl`` seconds after their last page, at most
+    ``max_entries`` per process, and are mirrored to the shared backend so
+    any worker can continue them.
+    """
+
+    def __init__(self, ttl: float = 1800.0, seed_ttl: float = 3900.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.seed_ttl = seed_ttl
+        self.max_entries = max_entries
+        self._cursors: "OrderedDict[str, tuple[SearchCursor, float]]" = OrderedDict()
+        self._seeds: "OrderedDict[str, tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def remember(self, query: str, feeds: List[Feed], candidates: Sequence[ArticleRecord], picked: Sequence[ArticleRecord]) -> None:
+        """Seed continuation for a first page: ``picked`` out of ``candidates``"""
+        chosen = {id(article) for article in picked}
+        seed = SearchCursor(
+            query,
+            [Feed(feed.query, feed.num, feed.start, feed.done) for feed in feeds],
+            _seed_index(candidates),
+            [ArticleRecord(**article.to_dict()) for article in candidates if id(article) not in chosen],
+        ).to_state()
+        key = normalize_query(query)
+        self._seeds[key] = (seed, time.monotonic() + self.seed_ttl)
+        self._seeds.move_to_end(key)
+        while len(self._seeds) > self.max_entries:
+            self._seeds.popitem(last=False)
+        state = get_state()
+        if state is not None:
+            background(state.set(f"cursor-seed:{key}", json.dumps(seed), self.seed_ttl), "cursor seed write")
+
+    async def resume(self, token: str) -> Optional[SearchCursor]:
+        """The cursor a token continues, or None when it is unknown or expired"""
+        if token.startswith(FIRST_PAGE):
+            query = _token_query(token)
+            return await self._open(query) if query else None
+        cursor_id, _, _ = token.partition(".")
+        entry = self._cursors.get(cursor_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self._cursors.move_to_end(cursor_id)
+            return entry[0]
+        state = get_state()
+        if state is None:
+            return None
+        try:
+            stored = await state.get(f"cursor:{cursor_id}")
+        except Exception as e:
+            logger.warning(f"Shared cursor read failed: {e}")
+            return None
+        if stored is None:
+            return None
+        cursor = SearchCursor.from_state(json.loads(stored), cursor_id=cursor_id)
+        self._keep(cursor)
+        return cursor
+
+    async def _open(self, query: str) -> Optional[SearchCursor]:
+        seed = await self._seed(query)
+        if seed is not None:
+            cursor = SearchCursor.from_state(seed)
+        else:
+            # Seed gone (expired, or the page came from another worker's
+            # cache): continue past the first-page offsets, deduplicating
+            # against the cached first page
+            delivered = search_cache.peek(query)
+            if not delivered:
+                return None
+            feeds = outlet_feeds(query)
+            for feed in feeds:
+                feed.start += feed.num
+            cursor = SearchCursor(query, feeds, _seed_index(delivered), [])
+        self._keep(cursor)
+        return cursor
+
+    async def _seed(self, query: str) -> Optional[Dict[str, Any]]:
+        key = normalize_query(query)
+        entry = self._seeds.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        state = get_state()
+        if state is None:
+            return None
+        try:
+            stored = await state.get(f"cursor-seed:{key}")
+        except Exception as e:
+            logger.warning(f"Shared cursor seed read failed: {e}")
+            return None
+        return json.loads(stored) if stored is not None else None
+
+    def _keep(self, cursor: SearchCursor) -> None:
+        self._cursors[cursor.id] = (cursor, time.monotonic() + self.ttl)
+        self._cursors.move_to_end(cursor.id)
+        now = time.monotonic()
+        while self._cursors:
+            oldest, expires_at = next(iter(self._cursors.values()))
+            if expires_at > now and len(self._cursors) <= self.max_entries:
+                break
+            del self._cursors[oldest.id]
+
+    def save(self, cursor: SearchCursor) -> None:
+        """Record a served page: refresh the TTL and mirror the cursor to the shared backend"""
+        self._keep(cursor)
+        state = get_state()
+        if state is not None:
+            background(state.set(f"cursor:{cursor.id}", dumps(cursor.to_state()).decode(), self.ttl), "cursor write")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cursors": len(self._cursors), "seeds": len(self._seeds)}
+
+
+search_cursors = SearchCursors(
+    ttl=settings.search_cursor_ttl_seconds,
+    seed_ttl=settings.search_cache_ttl_seconds + settings.search_cache_stale_seconds,
+    max_entries=settings.search_cursor_max_entries,
+)
+
+gauge_func(
+    "newsanalyzer_search_cursors",
+    "Search continuation state held in this process, by kind",
+    lambda: {(("kind", kind),): float(count) for kind, count in search_cursors.stats().items()},
+)
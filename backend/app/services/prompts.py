@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You rate political bias in news coverage. Answer with JSON only."
+
+# Per-search spend: a few hundred tokens per uncached search, thousands for big batches
+TOKEN_BUCKETS = (0.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0, 25000.0)
+
+openai_tokens = counter("newsanalyzer_openai_tokens_total", "OpenAI tokens spent, by prompt and kind")
+openai_completions = counter("newsanalyzer_openai_completions_total", "OpenAI completions, by prompt and finish reason")
+search_tokens = histogram("newsanalyzer_search_openai_tokens", "OpenAI tokens spent per search, by mode", TOKEN_BUCKETS)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token; the real count comes back in the response usage
+    return len(text) // 4
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A versioned chat prompt with its response schema and output budget.
+
+    ``render(items)`` builds the user message; ``schema`` is sent as a strict
+    ``json_schema`` response format, so the model answers in exactly that
+    shape (properties are generated in schema order: put the scores before
+    free text so a truncated answer still carries them). Output is capped
+    at ``output_tokens + output_tokens_per_item * len(items)``.
+    """
+
+    name: str
+    version: str
+    render: Callable[[Sequence[Dict[str, Any]]], str]
+    schema: Dict[str, Any]
+    output_tokens: int
+    output_tokens_per_item: int = 0
+    temperature: float = 0.3
+    system: str = SYSTEM_PROMPT
+
+    @property
+    def cache_version(self) -> str:
+        """Part of cache keys: results of an older prompt version are not reused"""
+        return f"{self.name}-{self.version}"
+
+    def max_tokens(self, items: int) -> int:
+        return self.output_tokens + self.output_tokens_per_item * items
+
+    def reserve(self, prompt: str, items: int) -> int:
+        """Tokens to reserve against the TPM budget before sending"""
+        return estimate_tokens(self.system) + estimate_tokens(prompt) + self.max_tokens(items)
+
+    def request(self, model: str, prompt: str, items: int, stream: bool = False) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": self.system},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens(items),
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": self.name.replace("-", "_"), "strict": True, "schema": self.schema},
+            },
+        }
+        if stream:
+            body["stream"] = True
+            body["stream_options"] = {"include_usage": True}
+        return body
+
+
+_registry: Dict[str, PromptTemplate] = {}
+
+
+def register_prompt(template: PromptTemplate) -> PromptTemplate:
+    _registry[template.name] = template
+    return template
+
+
+def prompts() -> Dict[str, str]:
+    """Registered prompt names and versions"""
+    return {name: template.version for name, template in _registry.items()}
+
+
+def article_lines(articles: Sequence[Dict[str, Any]]) -> List[str]:
+    """The numbered Source/Title/Snippet block every batch prompt shares"""
+    lines = []
+    for i, article in enumerate(articles):
+        lines.append(f"[{i}] Source: {article.get('source', '')}")
+        lines.append(f"Title: {article.get('title', '')}")
+        lines.append(f"Snippet: {article.get('snippet', '')}")
+    return lines
+
+
+def object_schema(**properties: Any) -> Dict[str, Any]:
+    # Strict mode: every property required, nothing else allowed
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+# Tolerant JSON: completions cut off by max_tokens, or still streaming, parse
+# to everything before the cut. Containers that never closed come back as
+# PartialDict/PartialList (still dicts and lists); a string cut off inside
+# one is kept as far as it got, a cut-off number or literal is dropped.
+
+
+class PartialDict(dict):
+    """A JSON object cut off before its closing brace"""
+
+
+class PartialList(list):
+    """A JSON array cut off before its closing bracket"""
+
+
+def is_complete(value: Any) -> bool:
+    return not isinstance(value, (PartialDict, PartialList))
+
+
+_WS = re.compile(r"\s*")
+_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+def _string(text: str, i: int) -> Tuple[Optional[str], int, bool]:
+    match = _STRING.match(text, i)
+    if match is not None:
+        return json.loads(match.group(0)), match.end(), True
+    raw = text[i + 1:]
+    # Retry without a dangling escape (``\``, ``\u12``) the cut left behind
+    for candidate in (raw, re.sub(r"\\(u[0-9a-fA-F]{0,3})?$", "", raw)):
+        try:
+            return json.loads(f'"{candidate}"'), len(text), False
+        except json.JSONDecodeError:
+            continue
+    return None, len(text), False
+
+
+def _value(text: str, i: int) -> Tuple[Any, int, bool]:
+    """(value, end, complete) for the JSON value starting at ``i``"""
+    i = _WS.match(text, i).end()
+    if i >= len(text):
+        return None, i, False
+    char = text[i]
+    if char == "{":
+        return _object(text, i + 1)
+    if char == "[":
+        return _array(text, i + 1)
+    if char == '"':
+        return _string(text, i)
+    match = _NUMBER.match(text, i)
+    if match is not None:
+        # A number running into the end may have more digits to come
+        complete = match.end() < len(text)
+        return json.loads(match.group(0)) if complete else None, match.end(), complete
+    for literal, value in _LITERALS.items():
+        if text.startswith(literal, i):
+            return value, i + len(literal), True
+        if literal.startswith(text[i:]):
+            return None, len(text), False
+    return None, i, False
+
+
+def _keep(value: Any, complete: bool) -> bool:
+    return complete or isinstance(value, (str, PartialDict, PartialList))
+
+
+def _object(text: str, i: int) -> Tuple[Dict[str, Any], int, bool]:
+    result: Dict[str, Any] = {}
+    while True:
+        i = _WS.match(text, i).end()
+        if i < len(text) and text[i] == ",":
+            i = _WS.match(text, i + 1).end()
+        if i >= len(text) or text[i] != '"':
+            if i < len(text) and text[i] == "}":
+                return result, i + 1, True
+            return PartialDict(result), i, False
+        key, i, complete = _string(text, i)
+        i = _WS.match(text, i).end()
+        if not complete or i >= len(text) or text[i] != ":":
+            return PartialDict(result), i, False
+        value, i, complete = _value(text, i + 1)
+        if _keep(value, complete):
+            result[key] = value
+        if not complete:
+            return PartialDict(result), i, False
+
+
+def _array(text: str, i: int) -> Tuple[List[Any], int, bool]:
+    result: List[Any] = []
+    while True:
+        i = _WS.match(text, i).end()
+        if i < len(text) and text[i] == ",":
+            i = _WS.match(text, i + 1).end()
+        if i < len(text) and text[i] == "]":
+            return result, i + 1, True
+        if i >= len(text):
+            return PartialList(result), i, False
+        value, i, complete = _value(text, i)
+        if _keep(value, complete):
+            result.append(value)
+        if not complete:
+            return PartialList(result), i, False
+
+
+def parse_partial(text: str) -> Any:
+    """Parse a JSON object or array that may be cut off or wrapped in prose/code fences.
+
+    Returns None when no object or array starts in ``text``.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    return _value(text, min(starts))[0]
+
+
+class StreamingJSON:
+    """Accumulates streamed completion text and hands out list entries as they close.
+
+    ``feed(delta)`` returns ``(position, entry)`` for each entry of the
+    top-level ``key`` list (or of a top-level list) completed by the delta.
+    """
+
+    def __init__(self, key: str = "results"):
+        self.key = key
+        self._parts: List[str] = []
+        self._emitted = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def entries(self) -> List[Any]:
+        data = parse_partial(self.text)
+        entries = data.get(self.key) if isinstance(data, dict) else data
+        return entries if isinstance(entries, list) else []
+
+    def feed(self, delta: str) -> List[Tuple[int, Any]]:
+        self._parts.append(delta)
+        if "}" not in delta and "]" not in delta:
+            return []  # nothing can have closed
+        entries = self.entries()
+        done = []
+        for position in range(self._emitted, len(entries)):
+            entry = entries[position]
+            if not is_complete(entry):
+                break
+            done.append((position, entry))
+        self._emitted += len(done)
+        return done
+
+
+# Token accounting: usage from every completion goes to the counters above
+# and to the spend of the search (or job) that made it, if one is being tracked
+
+
+@dataclass(slots=True)
+class TokenSpend:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    requests: int = 0
+    truncated: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total,
+            "requests": self.requests,
+            "truncated": self.truncated,
+        }
+
+
+_spend: ContextVar[Optional[TokenSpend]] = ContextVar("token_spend", default=None)
+
+
+def start_token_accounting() -> TokenSpend:
+    """Track OpenAI usage from here on in this context (and tasks it starts)"""
+    spend = TokenSpend()
+    _spend.set(spend)
+    return spend
+
+
+def record_usage(template: PromptTemplate, usage: Optional[Dict[str, Any]], finish_reason: Optional[str], prompt: str, content: str) -> int:
+    """Account a completion's usage (estimated when the response has none); returns tokens used"""
+    usage = usage or {}
+    prompt_tokens = int(usage.get("prompt_tokens") or estimate_tokens(template.system) + estimate_tokens(prompt))
+    completion_tokens = int(usage.get("completion_tokens") or estimate_tokens(content))
+    openai_tokens.inc(prompt_tokens, prompt=template.name, kind="prompt")
+    openai_tokens.inc(completion_tokens, prompt=template.name, kind="completion")
+    openai_completions.inc(prompt=template.name, finish_reason=finish_reason or "unknown")
+    spend = _spend.get()
+    if spend is not None:
+        spend.prompt_tokens += prompt_tokens
+        spend.completion_tokens += completion_tokens
+        spend.requests += 1
+        spend.truncated += finish_reason == "length"
+    return prompt_tokens + completion_tokens
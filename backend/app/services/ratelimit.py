@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from zoneinfo import ZoneInfo
+
+from ..config import settings
+from .deadline import LatencyTracker, time_left
+from .shared_state import background, get_state
+
+logger = logging.getLogger(__name__)
+
+# Google resets Custom Search daily quotas at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def seconds_until_quota_reset(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(QUOTA_TIMEZONE)
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (tomorrow - now).total_seconds()
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations.
+
+    ``acquire`` takes tokens immediately (the balance may go negative) and
+    sleeps until the reservation is covered, so waiters are served in order.
+    Requests that would wait longer than ``max_wait`` are refused.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0, max_wait: float = float("inf")) -> bool:
+        if self.rate <= 0:
+            return True  # unlimited
+        self._refill()
+        self.tokens -= tokens
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > max_wait:
+            self.tokens += tokens
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    def refund(self, tokens: float) -> None:
+        """Give back part of a reservation (negative: take more)"""
+        if self.rate <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+class CircuitBreaker:
+    """Closed -> open -> half-open breaker with jittered exponential backoff.
+
+    Opens after ``failure_threshold`` consecutive failures, or immediately when
+    the upstream says how long to back off (Retry-After, quota reset). After
+    the open period a single probe request is let through (half-open); its
+    success closes the breaker, its failure re-opens it with a longer backoff.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, base_backoff: float = 2.0, max_backoff: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.reason: Optional[str] = None
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() < self.open_until:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit closed after {self.reason}")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.reason = None
+        self._probe_in_flight = False
+
+    def hold(self, reason: str, seconds: float) -> None:
+        """Stay open for ``seconds`` because another worker tripped (no backoff escalation)"""
+        until = time.monotonic() + seconds
+        if self.state == self.OPEN and self.open_until >= until:
+            return
+        self.state = self.OPEN
+        self.open_until = until
+        self.reason = reason
+        self._probe_in_flight = False
+
+    def record_failure(self, reason: str, retry_after: Optional[float] = None) -> None:
+        self.failures += 1
+        if retry_after is None and self.state == self.CLOSED and self.failures < self.failure_threshold:
+            return
+        self.trip(reason, retry_after)
+
+    def trip(self, reason: str, retry_after: Optional[float] = None) -> None:
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** self.trips) * random.uniform(0.5, 1.5)
+        delay = retry_after if retry_after is not None else backoff
+        self.trips += 1
+        self.state = self.OPEN
+        self.open_until = time.monotonic() + delay
+        self.reason = reason
+        self._probe_in_flight = False
+        logger.warning(f"Circuit opened for {delay:.1f}s: {reason}")
+
+    def retry_in(self) -> float:
+        return max(self.open_until - time.monotonic(), 0.0) if self.state == self.OPEN else 0.0
+
+
+class UpstreamGuard:
+    """Request pacing, optional token (TPM) pacing, daily quota and breaker for one upstream.
+
+    With a shared state backend (settings.shared_state_backend) the pacing
+    buckets and the daily quota count live there, so every worker draws
+    from one budget, and breaker trips are published for the other workers
+    to honour until they expire. If the backend fails, the guard falls back
+    to its local buckets for that call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        token_rate: float = 0.0,
+        daily_quota: int = 0,
+        max_wait: float = 2.0,
+    ):
+        self.name = name
+        self.requests = TokenBucket(rate, burst)
+        self.tokens = TokenBucket(token_rate, token_rate * 60) if token_rate > 0 else None
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.daily_quota = daily_quota
+        self.max_wait = max_wait
+        self._quota_day: Optional[str] = None
+        self._quota_used = 0
+        self.rejected = 0
+        self.throttled_seconds = 0.0
+        self.shared_errors = 0
+
+    def _today(self) -> str:
+        return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+    def quota_used(self) -> int:
+        if self._quota_day != self._today():
+            self._quota_day, self._quota_used = self._today(), 0
+        return self._quota_used
+
+    def quota_exhausted(self) -> bool:
+        return bool(self.daily_quota) and self.quota_used() >= self.daily_quota
+
+    # Both flags clear once the breaker's open window has passed, even before
+    # anything has called allow(): callers that stop at them must still let
+    # the half-open probe through, or the breaker would never close again
+    @property
+    def quota_exceeded(self) -> bool:
+        return self.quota_exhausted() or (self.breaker.reason == "quota" and self.breaker.retry_in() > 0)
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.breaker.retry_in() > 0
+
+    async def acquire(self, tokens: float = 0.0) -> bool:
+        """Wait for capacity; False means skip the call (breaker open, quota spent or too long a wait).
+
+        The wait is also bounded by the budget left before the request's deadline.
+        """
+        shared = get_state()
+        if shared is not None:
+            await self._follow_breaker(shared)
+        if self.quota_exhausted() and self.breaker.state != CircuitBreaker.OPEN:
+            self.breaker.trip("quota", seconds_until_quota_reset())
+            self._publish_breaker()
+        if not self.breaker.allow():
+            self.rejected += 1
+            return False
+        start = time.monotonic()
+        max_wait = time_left(self.max_wait)
+        if not await self._take(shared, "requests", self.requests, 1, max_wait):
+            self.rejected += 1
+            self._release_probe()
+            return False
+        if self.tokens is not None and tokens and not await self._take(shared, "tokens", self.tokens, tokens, max_wait):
+            self.rejected += 1
+            self._release_probe()
+            return False
+        self.throttled_seconds += time.monotonic() - start
+        await self._count_quota(shared)
+        if self.daily_quota and self._quota_used > self.daily_quota:
+            # Other workers spent the rest of the shared quota first
+            self.rejected += 1
+            self.breaker.trip("quota", seconds_until_quota_reset())
+            self._publish_breaker()
+            return False
+        return True
+
+    async def _take(self, shared: Any, name: str, bucket: TokenBucket, cost: float, max_wait: float) -> bool:
+        if shared is None or bucket.rate <= 0:
+            return await bucket.acquire(cost, max_wait)
+        try:
+            wait = await shared.reserve(f"{self.name}:{name}", bucket.rate, bucket.capacity, cost, max_wait)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared {self.name} {name} bucket unavailable, pacing locally: {e}")
+            return await bucket.acquire(cost, max_wait)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    async def _count_quota(self, shared: Any) -> None:
+        self.quota_used()
+        if shared is None:
+            self._quota_used += 1
+            return
+        try:
+            # Kept a day past the reset, so late counts never revive an old day
+            self._quota_used = await shared.incr(f"{self.name}:quota:{self._quota_day}", 1, ttl=2 * 86400)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared {self.name} quota count unavailable, counting locally: {e}")
+            self._quota_used += 1
+
+    async def _follow_breaker(self, shared: Any) -> None:
+        """Open the local breaker while another worker's published trip is in force"""
+        try:
+            raw = await shared.get(f"{self.name}:breaker")
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared {self.name} breaker state unavailable: {e}")
+            return
+        if raw is None:
+            return
+        trip = json.loads(raw)
+        remaining = trip["until"] - time.time()
+        if remaining > 0:
+            self.breaker.hold(trip["reason"], remaining)
+
+    def _publish_breaker(self) -> None:
+        shared = get_state()
+        if shared is None:
+            return
+        key = f"{self.name}:breaker"
+        if self.breaker.state == CircuitBreaker.OPEN:
+            remaining = self.breaker.retry_in()
+            if remaining > 0:
+                trip = json.dumps({"reason": self.breaker.reason, "until": time.time() + remaining})
+                background(shared.set(key, trip, remaining), "breaker publish")
+        else:
+            background(shared.delete(key), "breaker clear")
+
+    def settle(self, reserved: float, used: float) -> None:
+        """Square a token reservation with what the call really used"""
+        if self.tokens is None:
+            return
+        shared = get_state()
+        if shared is not None and self.tokens.rate > 0:
+            if reserved > used:
+                background(shared.refund(f"{self.name}:tokens", self.tokens.rate, reserved - used), "token refund")
+            return
+        self.tokens.refund(reserved - used)
+
+    def _release_probe(self) -> None:
+        # A half-open probe that never went out must not block the next one
+        self.breaker._probe_in_flight = False
+
+    def record_success(self) -> None:
+        was_closed = self.breaker.state == CircuitBreaker.CLOSED
+        self.breaker.record_success()
+        if not was_closed:
+            self._publish_breaker()
+
+    def record_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        self.breaker.trip("rate_limit", retry_after)
+        self._publish_breaker()
+
+    def record_quota_exceeded(self) -> None:
+        self.breaker.trip("quota", seconds_until_quota_reset())
+        self._publish_breaker()
+
+    def record_failure(self, reason: str) -> None:
+        was_open = self.breaker.state == CircuitBreaker.OPEN
+        self.breaker.record_failure(reason)
+        if self.breaker.state == CircuitBreaker.OPEN and not was_open:
+            self._publish_breaker()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "reason": self.breaker.reason,
+            "retry_in_seconds": round(self.breaker.retry_in(), 1),
+            "consecutive_failures": self.breaker.failures,
+            "available_requests": round(self.requests.available(), 2) if self.requests.rate > 0 else None,
+            "available_tokens": round(self.tokens.available()) if self.tokens is not None else None,
+            "daily_quota": self.daily_quota or None,
+            "quota_used_today": self.quota_used(),
+            "rejected": self.rejected,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "shared": type(get_state()).__name__ if get_state() is not None else None,
+            "shared_errors": self.shared_errors,
+            "latency": self.latency.status(),
+        }
+
+
+cse_guard = UpstreamGuard(
+    "google_cse",
+    rate=settings.google_cse_qps,
+    burst=max(settings.google_cse_qps, 5),
+    daily_quota=settings.google_cse_daily_quota,
+    max_wait=settings.upstream_max_wait_seconds,
+)
+
+openai_guard = UpstreamGuard(
+    "openai",
+    rate=settings.openai_rpm / 60,
+    burst=max(settings.openai_rpm / 60, 5),
+    token_rate=settings.openai_tpm / 60,
+    max_wait=settings.upstream_max_wait_seconds,
+)
+
+
+def upstream_status() -> Dict[str, Any]:
+    return {guard.name: guard.status() for guard in (cse_guard, openai_guard)}
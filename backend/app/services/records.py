@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii as _encode
+from typing import Any, Dict, Iterator, List, Optional
+
+from .classifier import Classification
+
+try:  # optional: much faster response encoding
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+
+@dataclass(slots=True)
+class ArticleRecord:
+    """One search result, from CSE parsing through classification to the response.
+
+    Built once per CSE item and classified in place, so a search holds one
+    object per article instead of an info dict, a Classification and a
+    merged copy. Reads like a read-only mapping (``record["url"]``,
+    ``record.get("source")``, ``dict(record)``, ``Article(**record)``) for
+    the code that treats articles as dicts.
+    """
+
+    id: str
+    url: str
+    title: str
+    snippet: str
+    published_at: Optional[str]
+    source: str
+    spectrum_score: float = 0.0
+    confidence: float = 0.0
+    method: str = "unknown"
+    reasoning: Optional[str] = None
+
+    def classify(self, classification: Classification) -> "ArticleRecord":
+        self.spectrum_score = classification.score
+        self.confidence = classification.confidence
+        self.method = classification.method
+        self.reasoning = classification.reasoning
+        return self
+
+    def keys(self) -> tuple:
+        return FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in FIELDS
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in FIELDS else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def json(self) -> str:
+        """This record as a JSON object (same output as ``json.dumps(record.to_dict())``)"""
+        head = (
+            f'{{"id": {_encode(self.id)}, "url": {_encode(self.url)}, "title": {_encode(self.title)}, '
+            f'"snippet": {_encode(self.snippet)}, "published_at": {_scalar(self.published_at)}, '
+        )
+        if self.method == "ai":
+            return head + _tail(self.source, self.spectrum_score, self.confidence, self.method, self.reasoning)
+        # Outlet and unknown scores repeat per outlet: encode their tail once
+        return head + _shared_tail(self.source, self.spectrum_score, self.confidence, self.method, self.reasoning)
+
+
+FIELDS = tuple(f.name for f in fields(ArticleRecord))
+
+
+def _scalar(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return _encode(value)
+    return json.dumps(value, default=str)
+
+
+def _tail(source: str, score: float, confidence: float, method: str, reasoning: Optional[str]) -> str:
+    return (
+        f'"source": {_encode(source)}, "spectrum_score": {_scalar(score)}, "confidence": {_scalar(confidence)}, '
+        f'"method": {_encode(method)}, "reasoning": {_scalar(reasoning)}}}'
+    )
+
+
+_shared_tail = lru_cache(maxsize=4096)(_tail)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ArticleRecord):
+        return value.to_dict()
+    return str(value)
+
+
+def _write(value: Any, out: List[str]) -> None:
+    if isinstance(value, ArticleRecord):
+        out.append(value.json())
+    elif isinstance(value, dict):
+        if not value:
+            out.append("{}")
+            return
+        out.append("{")
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                out.append(", ")
+            out.append(_encode(str(key)))
+            out.append(": ")
+            _write(item, out)
+        out.append("}")
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            out.append("[]")
+            return
+        out.append("[")
+        for i, item in enumerate(value):
+            if i:
+                out.append(", ")
+            _write(item, out)
+        out.append("]")
+    else:
+        out.append(json.dumps(value, default=str))
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a response payload (dicts, lists, ArticleRecords) to JSON in one pass.
+
+    Uses orjson when installed (records are slotted dataclasses, which it
+    serializes natively); otherwise records are written from their cached
+    per-outlet fragments without building intermediate dicts.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    out: List[str] = []
+    _write(payload, out)
+    return "".join(out).encode()
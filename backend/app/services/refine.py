@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from ..config import settings
+from .classifier import Classification, classify_batch_with_ai
+from .metrics import counter, gauge_func, stage
+from .prompts import TokenSpend, search_tokens, start_token_accounting
+from .records import ArticleRecord
+from .search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+refinement_jobs = counter("newsanalyzer_refinement_jobs_total", "Background AI refinement jobs, by outcome")
+
+
+def refinement_frame(record: ArticleRecord) -> Dict[str, Any]:
+    """An article's current classification, as streamed and polled"""
+    return {
+        "type": "classification",
+        "id": record.id,
+        "spectrum_score": record.spectrum_score,
+        "confidence": record.confidence,
+        "method": record.method,
+        "reasoning": record.reasoning,
+    }
+
+
+class RefinementJob:
+    __slots__ = ("id", "query", "articles", "unknown", "updates", "status", "created", "finished", "task", "tokens")
+
+    def __init__(self, query: str, articles: List[ArticleRecord], unknown: List[int]):
+        self.id = uuid.uuid4().hex[:16]
+        self.query = query
+        self.articles = articles
+        self.unknown = unknown
+        self.updates: List[Dict[str, Any]] = []
+        self.status = "queued"  # -> running -> done | failed
+        self.created = time.monotonic()
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.tokens = TokenSpend()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job": self.id,
+            "status": self.status,
+            "pending": len(self.unknown) - len(self.updates) if self.active else 0,
+            "poll": f"/search/{self.id}/refinements",
+        }
+
+    def since(self, cursor: int) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "query": self.query,
+            "refinements": self.updates[cursor:],
+            "next": len(self.updates),
+            "tokens": self.tokens.to_dict(),
+        }
+
+
+class RefinementQueue:
+    """AI classification of unknown outlets after the response has gone out.
+
+    ``submit`` returns at once with a job; the job waits for one of
+    ``concurrency`` slots, runs ``classify_batch_with_ai`` over the unknown
+    articles, updates each record in place and appends its new score to
+    ``job.updates`` for pollers. Concurrent searches for the same query
+    share the active job. Finished jobs stay readable for ``ttl`` seconds;
+    at most ``max_jobs`` are kept.
+    """
+
+    def __init__(self, concurrency: int = 4, ttl: float = 600.0, max_jobs: int = 1000):
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._jobs: "OrderedDict[str, RefinementJob]" = OrderedDict()
+        self._active: Dict[str, RefinementJob] = {}
+
+    def active(self, query: str) -> Optional[RefinementJob]:
+        job = self._active.get(normalize_query(query))
+        return job if job is not None and job.active else None
+
+    def submit(
+        self,
+        query: str,
+        articles: List[ArticleRecord],
+        unknown: Sequence[int],
+        on_done: Optional[Callable[[RefinementJob], Awaitable[None]]] = None,
+    ) -> RefinementJob:
+        existing = self.active(query)
+        if existing is not None:
+            return existing
+        self._expire()
+        job = RefinementJob(query, articles, list(unknown))
+        self._jobs[job.id] = job
+        self._active[normalize_query(query)] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job, on_done))
+        return job
+
+    def get(self, job_id: str) -> Optional[RefinementJob]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: RefinementJob, on_done: Optional[Callable[[RefinementJob], Awaitable[None]]]) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        def resolved(j: int, classification: Classification) -> None:
+            record = job.articles[job.unknown[j]]
+            record.classify(classification)
+            job.updates.append(refinement_frame(record))
+
+        job.tokens = start_token_accounting()
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                with stage("refine"):
+                    await classify_batch_with_ai([job.articles[i] for i in job.unknown], on_result=resolved)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            raise
+        except Exception:
+            # Unrefined articles keep their outlet/unknown scores
+            logger.exception(f"Refinement failed for {job.query!r}")
+            job.status = "failed"
+        finally:
+            job.finished = time.monotonic()
+            refinement_jobs.inc(outcome=job.status)
+            search_tokens.observe(job.tokens.total, mode="refine")
+            key = normalize_query(job.query)
+            if self._active.get(key) is job:
+                del self._active[key]
+        if on_done is not None:
+            try:
+                await on_done(job)
+            except Exception:
+                logger.exception(f"Refinement completion failed for {job.query!r}")
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._jobs:
+            oldest = next(iter(self._jobs.values()))
+            expired = oldest.finished is not None and now - oldest.finished > self.ttl
+            if not expired and len(self._jobs) < self.max_jobs:
+                break
+            if oldest.active:
+                # Over capacity with only running jobs left: keep them
+                break
+            del self._jobs[oldest.id]
+
+    async def stop(self) -> None:
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "concurrency": self.concurrency,
+            "jobs": len(statuses),
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+        }
+
+
+refinement_queue = RefinementQueue(
+    concurrency=settings.refine_concurrency,
+    ttl=settings.refine_job_ttl_seconds,
+)
+
+
+def _queue_gauges() -> Dict[Any, float]:
+    stats = refinement_queue.stats()
+    return {(("state", "queued"),): float(stats["queued"]), (("state", "running"),): float(stats["running"])}
+
+
+gauge_func("newsanalyzer_refinement_jobs", "Refinement jobs waiting for or holding a slot, by state", _queue_gauges)
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Optional
+
+from ..config import settings
+from .article_store import article_id, article_store
+from .classifier import MIN_CHAT_SECONDS, Classification, classify_batch_with_ai, extract_domain
+from .deadline import can_afford, deadline, remaining, search_deadline
+from .google import CSE_MAX_NUM, get_api_status, outlet_feeds, search_news
+from .metrics import classifications as classification_counter, stage
+from .narratives import narrative_index
+from .pagination import first_page_token, search_cursors, search_pages
+from .prompts import search_tokens, start_token_accounting
+from .ratelimit import openai_guard
+from .records import ArticleRecord
+from .refine import RefinementJob, refinement_frame, refinement_queue
+from .search_cache import search_cache
+from .selection import select_balanced
+
+logger = logging.getLogger(__name__)
+
+# Deduplicated CSE results to choose from; the balanced pick keeps
+# settings.search_result_count of them
+CANDIDATE_POOL = 30
+
+
+def _article_info(i: int, result: dict[str, Any]) -> ArticleRecord:
+    url = result.get('link', '')
+    return ArticleRecord(
+        id=article_id(url) if url else f"article_{i}",
+        url=url,
+        title=result.get('title', ''),
+        snippet=result.get('snippet', ''),
+        published_at=result.get('published_at'),
+        source=extract_domain(url) or 'unknown',
+    )
+
+
+async def _select(query: str) -> tuple[list[ArticleRecord], list[Classification]]:
+    """Fetch candidates and pick a spectrum-balanced set, scored by outlet so far.
+
+    The fan-out offsets and the candidates left over seed "load more" for the query.
+    """
+    feeds = outlet_feeds(query)
+    # Keep a typical completion's worth of the budget (with some slack) for
+    # classifying the picks, unless that would leave the fan-out too little
+    left, classify_time = remaining(), 1.5 * openai_guard.latency.estimate(MIN_CHAT_SECONDS)
+    with deadline(left - classify_time if left is not None and left > 2 * classify_time else None):
+        search_results = await search_news(query, num=CANDIDATE_POOL, feeds=feeds)
+    candidates = [_article_info(i, result) for i, result in enumerate(search_results)]
+    with stage("select"):
+        picked = select_balanced(candidates, settings.search_result_count, settings.selection_max_unknown_share)
+    article_data = [article for article, _ in picked]
+    if article_data:
+        search_cursors.remember(query, feeds, candidates, article_data)
+    return article_data, [classification for _, classification in picked]
+
+
+async def _classify_unknown(article_data: list[ArticleRecord], classifications: list[Classification]) -> None:
+    """Replace the outlet classification of unknown outlets with AI scores, in place"""
+    # Known outlets keep their outlet score; only the unknown ones go to
+    # the AI, in one batched chat-completion per group of articles
+    unknown = [i for i, classification in enumerate(classifications) if classification.method != "outlet"]
+    # Past the point where a typical completion still fits the search budget,
+    # answer with outlet scores rather than miss the deadline
+    if not unknown or not can_afford(openai_guard.latency.estimate(MIN_CHAT_SECONDS), "classify"):
+        return
+    with stage("classify"):
+        try:
+            ai_results = await classify_batch_with_ai([article_data[i] for i in unknown])
+        except Exception as e:
+            logger.warning(f"Batch classification failed: {e}")
+            ai_results = [e] * len(unknown)
+    for i, classification in zip(unknown, ai_results):
+        # On failure the article keeps its outlet-based classification
+        if isinstance(classification, Exception):
+            logger.warning(f"Classification failed for article {i}: {classification}")
+            continue
+        classifications[i] = classification
+
+
+async def _finish(articles: list[ArticleRecord]) -> None:
+    for article in articles:
+        classification_counter.inc(method=article["method"])
+    await article_store.upsert(articles)
+    try:
+        await narrative_index.absorb(articles)
+    except Exception:
+        logger.exception("Narrative update failed")
+
+
+async def search_and_classify(query: str) -> list[ArticleRecord]:
+    """Search for news, pick a balanced set and classify it, within the search budget"""
+    spend = start_token_accounting()
+    try:
+        with search_deadline():
+            article_data, classifications = await _select(query)
+            await _classify_unknown(article_data, classifications)
+        articles = [record.classify(classification) for record, classification in zip(article_data, classifications)]
+        await _finish(articles)
+        return articles
+        
+    except Exception:
+        logger.exception(f"Search and classify failed for {query!r}")
+        return []
+    finally:
+        search_tokens.observe(spend.total, mode="full")
+
+
+async def cached_search_and_classify(query: str) -> list[ArticleRecord]:
+    """search_and_classify behind the query cache (stale-while-revalidate, coalesced)"""
+    return await search_cache.get(query, lambda: search_and_classify(query))
+
+
+async def speculative_search_and_classify(query: str) -> tuple[list[ArticleRecord], Optional[RefinementJob]]:
+    """Outlet-scored results right away; unknown outlets are AI-classified in a background job.
+
+    Returns the articles and the refinement job (None when nothing needs
+    refining). The job updates the returned records in place, and its
+    refined result set is cached and stored once it succeeds, so a
+    response only waits on CSE.
+    """
+    if search_cache.peek(query) is not None:
+        return await cached_search_and_classify(query), None
+    job = refinement_queue.active(query)
+    if job is not None:
+        return job.articles, job
+    try:
+        with search_deadline():
+            article_data, classifications = await _select(query)
+    except Exception:
+        logger.exception(f"Speculative search failed for {query!r}")
+        return [], None
+    articles = [record.classify(classification) for record, classification in zip(article_data, classifications)]
+    unknown = [i for i, classification in enumerate(classifications) if classification.method != "outlet"]
+    if not unknown:
+        if articles:
+            search_cache.put(query, articles)
+            await _finish(articles)
+        return articles, None
+
+    async def refined(job: RefinementJob) -> None:
+        if job.status != "done":
+            return  # left uncached: the next search retries the unknown outlets
+        search_cache.put(query, job.articles)
+        await _finish(job.articles)
+
+    return articles, refinement_queue.submit(query, articles, unknown, on_done=refined)
+
+
+async def stream_search_and_classify(query: str) -> AsyncIterator[dict[str, Any]]:
+    """Yield search progress as frames for NDJSON streaming.
+
+    - ``{"type": "article", "article": ...}`` for each result as soon as CSE
+      returns, scored by outlet (or ``unknown``);
+    - ``{"type": "classification", "id": ..., ...}`` as each AI score resolves;
+    - a final ``{"type": "done", ...}`` frame with the status summary, the
+      OpenAI tokens the search spent and the cursor for the next page
+      (``count: 0`` and an ``error`` if the search failed).
+
+    Cached queries are replayed as article frames followed by ``done``.
+    """
+    if search_cache.peek(query) is not None:
+        cached = await cached_search_and_classify(query)
+        for article in cached:
+            yield {"type": "article", "article": article}
+        yield {
+            "type": "done", "query": query, "count": len(cached), "cached": True,
+            "cursor": first_page_token(query) if cached else None, "api_status": get_api_status(),
+        }
+        return
+    
+    spend = start_token_accounting()
+    # The classification task inherits the search budget; the deadline is
+    # not held across yields, where the context is the response's
+    try:
+        with search_deadline():
+            article_data, classifications = await _select(query)
+            articles = [record.classify(classification) for record, classification in zip(article_data, classifications)]
+        
+            # Only the unknown outlets among the picks are refined by the AI
+            unknown = [i for i, classification in enumerate(classifications) if classification.method != "outlet"]
+            if unknown and not can_afford(openai_guard.latency.estimate(MIN_CHAT_SECONDS), "classify"):
+                unknown = []
+            updates: asyncio.Queue[tuple[int, Classification]] = asyncio.Queue()
+            classify_task = asyncio.create_task(
+                classify_batch_with_ai(
+                    [article_data[i] for i in unknown],
+                    on_result=lambda j, c: updates.put_nowait((unknown[j], c)),
+                )
+            )
+    except Exception:
+        # Headers are already out: end the stream with a done frame instead of breaking it
+        logger.exception(f"Streaming search failed for {query!r}")
+        search_tokens.observe(spend.total, mode="stream")
+        yield {
+            "type": "done", "query": query, "count": 0, "cached": False, "error": "search_failed",
+            "tokens": spend.to_dict(), "cursor": None, "api_status": get_api_status(),
+        }
+        return
+    try:
+        for article in articles:
+            yield {"type": "article", "article": article}
+        outstanding = len(unknown)
+        while outstanding:
+            getter = asyncio.create_task(updates.get())
+            await asyncio.wait({getter, classify_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                if updates.empty():
+                    break  # classification ended without resolving every article
+                continue
+            i, classification = getter.result()
+            outstanding -= 1
+            yield refinement_frame(articles[i].classify(classification))
+    finally:
+        if not classify_task.done():
+            classify_task.cancel()
+        elif not classify_task.cancelled() and classify_task.exception() is not None:
+            logger.warning(f"Streaming classification failed: {classify_task.exception()}")
+    
+    if articles:
+        search_cache.put(query, articles)
+        await _finish(articles)
+    search_tokens.observe(spend.total, mode="stream")
+    yield {
+        "type": "done", "query": query, "count": len(articles), "cached": False,
+        "tokens": spend.to_dict(), "cursor": first_page_token(query) if articles else None,
+        "api_status": get_api_status(),
+    }
+
+
+async def search_more(token: str) -> Optional[dict[str, Any]]:
+    """The next page of a search, continuing from cursor ``token``.
+
+    Candidates left over from earlier pages are used first; only when they
+    run short does each feed of the fan-out fetch its next CSE slice. New
+    results are deduplicated against everything earlier pages delivered or
+    pooled, and only the picked unknown outlets are AI-classified. Returns
+    None for unknown or expired cursors; a retried token gets the same page.
+    """
+    cursor = await search_cursors.resume(token)
+    if cursor is None:
+        return None
+    async with cursor.lock:
+        if cursor.last is not None and token == cursor.last[0]:
+            search_pages.inc(source="replay")
+            return cursor.last[1]
+        if not cursor.accepts(token):
+            return None
+        size = settings.search_result_count
+        spend = start_token_accounting()
+        try:
+            with search_deadline():
+                fetched = len(cursor.pool) < size and not cursor.exhausted
+                if fetched:
+                    # Deeper pages read full CSE pages: the quota counts requests, not results
+                    for feed in cursor.feeds:
+                        feed.num = CSE_MAX_NUM
+                    search_results = await search_news(cursor.query, num=CSE_MAX_NUM * len(cursor.feeds), feeds=cursor.feeds)
+                    with stage("dedup"):
+                        fresh = cursor.index.filter_new(search_results)
+                    cursor.pool.extend(_article_info(len(cursor.index) + i, result) for i, result in enumerate(fresh))
+                with stage("select"):
+                    picked = select_balanced(cursor.pool, size, settings.selection_max_unknown_share)
+                chosen = {id(article) for article, _ in picked}
+                cursor.pool = [article for article in cursor.pool if id(article) not in chosen]
+                article_data = [article for article, _ in picked]
+                classifications = [classification for _, classification in picked]
+                await _classify_unknown(article_data, classifications)
+            articles = [record.classify(classification) for record, classification in zip(article_data, classifications)]
+            await _finish(articles)
+        finally:
+            search_tokens.observe(spend.total, mode="more")
+        search_pages.inc(source="fetched" if fetched else "pool")
+        cursor.page += 1
+        payload = {
+            "query": cursor.query,
+            "articles": articles,
+            "page": cursor.page,
+            "cursor": cursor.token if articles and not cursor.exhausted else None,
+            "tokens": spend.to_dict(),
+        }
+        cursor.last = (token, payload)
+        search_cursors.save(cursor)
+        return payload
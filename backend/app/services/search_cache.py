@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..config import settings
+from .metrics import gauge_func
+from .outlets import get_registry
+from .shared_state import background, get_state
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a search: case- and whitespace-insensitive"""
+    return " ".join(query.lower().split())
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+    version: str
+
+
+class SearchCache:
+    """Cache of fully classified search responses with stale-while-revalidate.
+
+    - fresh entries are served directly;
+    - stale entries are served immediately while one background refresh runs;
+    - concurrent misses for the same query share a single upstream computation;
+    - while ``degraded()`` is true (e.g. CSE quota exhausted) any stored entry,
+      however old, is served and no refresh is attempted;
+    - entries computed under a different ``version()`` (e.g. outlet ratings
+      changed) are treated as misses unless degraded;
+    - with a ``shared()`` backend, stored entries are also written there
+      (via ``encode``) and a local miss first looks for another worker's
+      entry (via ``decode``) before computing.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float,
+        max_entries: int,
+        degraded: Callable[[], bool] = lambda: False,
+        version: Callable[[], str] = lambda: "",
+        shared: Callable[[], Optional[Any]] = lambda: None,
+        encode: Callable[[Any], str] = str,
+        decode: Callable[[str], Any] = str,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.degraded = degraded
+        self.version = version
+        self.shared = shared
+        self.encode = encode
+        self.decode = decode
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.shared_hits = 0
+
+    async def get(self, query: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            current = entry.version == self.version()
+            if current and now < entry.fresh_until:
+                self.hits += 1
+                return entry.value
+            degraded = self.degraded()
+            if degraded or (current and now < entry.stale_until):
+                self.stale_hits += 1
+                if not degraded:
+                    self._start(key, compute, background=True)
+                return entry.value
+
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start(key, compute)
+        return await asyncio.shield(task)
+
+    def peek(self, query: str) -> Optional[Any]:
+        """Return any stored value for ``query`` without touching upstream"""
+        entry = self._entries.get(normalize_query(query))
+        return entry.value if entry is not None else None
+
+    async def refresh(self, query: str, compute: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        """Recompute ``query`` now (joining any in-flight computation) and store it for ``ttl``"""
+        return await asyncio.shield(self._start(normalize_query(query), compute, ttl=ttl))
+
+    def put(self, query: str, value: Any, ttl: float | None = None) -> None:
+        now = time.monotonic()
+        key = normalize_query(query)
+        ttl = self.ttl if ttl is None else ttl
+        self._store(key, _Entry(value, now + ttl, now + ttl + self.stale_ttl, self.version()))
+        shared = self.shared()
+        if shared is not None:
+            # Wall-clock deadlines: other workers (and nodes) read them
+            wall = time.time()
+            header = f"{self.version()}\n{wall + ttl}\n{wall + ttl + self.stale_ttl}\n"
+            background(shared.set(f"search:{key}", header + self.encode(value), ttl + self.stale_ttl), "query cache write")
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _from_shared(self, key: str) -> Optional[Any]:
+        """A current, fresh entry another worker stored for ``key``, installed locally"""
+        shared = self.shared()
+        if shared is None:
+            return None
+        try:
+            raw = await shared.get(f"search:{key}")
+            if raw is None:
+                return None
+            version, fresh_until, stale_until, body = raw.split("\n", 3)
+            wall = time.time()
+            if version != self.version() or float(fresh_until) <= wall:
+                return None
+            value = self.decode(body)
+        except Exception as e:
+            logger.warning(f"Shared query cache read failed for {key!r}: {e}")
+            return None
+        now = time.monotonic()
+        self._store(key, _Entry(value, now + float(fresh_until) - wall, now + float(stale_until) - wall, version))
+        self.shared_hits += 1
+        return value
+
+    def invalidate(self, query: str | None = None) -> None:
+        if query is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(normalize_query(query), None)
+
+    def _start(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        background: bool = False,
+        ttl: float | None = None,
+    ) -> asyncio.Task:
+        existing = self._inflight.get(key)
+        if existing is not None and existing.get_loop() is asyncio.get_running_loop():
+            return existing
+        if background:
+            self.refreshes += 1
+
+        async def run() -> Any:
+            # A plain miss may already be answered by another worker;
+            # refreshes always recompute
+            if not background and ttl is None:
+                value = await self._from_shared(key)
+                if value is not None:
+                    return value
+            value = await compute()
+            # Empty results usually mean an upstream failure; keep the old entry
+            if value:
+                self.put(key, value, ttl)
+            return value
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._inflight[key] = task
+
+        def done(t: asyncio.Task) -> None:
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            if background and not t.cancelled() and t.exception() is not None:
+                logger.warning(f"Background refresh failed for {key!r}: {t.exception()}")
+
+        task.add_done_callback(done)
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "shared_hits": self.shared_hits,
+            "inflight": len(self._inflight),
+        }
+
+
+def _quota_exceeded() -> bool:
+    from .google import api_status  # imported lazily: google reports this cache's stats
+
+    return api_status.quota_exceeded
+
+
+def _registry_version() -> str:
+    return get_registry().version
+
+
+def _encode_articles(articles: Any) -> str:
+    from .records import dumps  # imported lazily: records pulls in the classifier
+
+    return dumps(articles).decode()
+
+
+def _decode_articles(body: str) -> Any:
+    from .records import ArticleRecord
+
+    return [ArticleRecord(**article) for article in json.loads(body)]
+
+
+search_cache = SearchCache(
+    ttl=settings.search_cache_ttl_seconds,
+    stale_ttl=settings.search_cache_stale_seconds,
+    max_entries=settings.search_cache_max_entries,
+    degraded=_quota_exceeded,
+    version=_registry_version,
+    shared=get_state,
+    encode=_encode_articles,
+    decode=_decode_articles,
+)
+
+
+def _cache_counters() -> Dict[Any, float]:
+    stats = search_cache.stats()
+    return {
+        (("event", name),): float(stats[name])
+        for name in ("hits", "stale_hits", "shared_hits", "misses", "coalesced", "refreshes")
+    }
+
+
+gauge_func(
+    "newsanalyzer_search_cache_events_total",
+    "Query cache lookups and refreshes, by event",
+    _cache_counters,
+    kind="counter",
+)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Sequence, Tuple
+
+from .classifier import Classification, classify_by_outlet
+
+# Spectrum buckets by outlet score; "unknown" outlets need an AI call to place
+BUCKETS = ("left", "center", "right")
+CENTER_BAND = 0.33
+
+
+def bucket_of(classification: Classification) -> str:
+    if classification.method != "outlet":
+        return "unknown"
+    if classification.score < -CENTER_BAND:
+        return "left"
+    if classification.score > CENTER_BAND:
+        return "right"
+    return "center"
+
+
+def select_balanced(
+    articles: Sequence[Dict[str, Any]],
+    num: int,
+    max_unknown_share: float = 0.34,
+) -> List[Tuple[Dict[str, Any], Classification]]:
+    """Pick up to ``num`` articles spread across left, center and right.
+
+    Every candidate is scored by its outlet first (a registry lookup, no AI).
+    Picks then rotate left -> center -> right -> unknown, taking the best
+    ranked remaining candidate of each bucket and preferring outlets not
+    picked yet. Unknown outlets get at most ``max_unknown_share`` of the
+    slots, since each one costs an AI classification. Buckets that run dry
+    give their turns to the others. Returns (article, outlet classification)
+    pairs in pick order, so any prefix is balanced too.
+    """
+    queues: Dict[str, Deque[Tuple[Dict[str, Any], Classification]]] = {b: deque() for b in (*BUCKETS, "unknown")}
+    for article in articles:
+        classification = classify_by_outlet(article.get("url", ""))
+        queues[bucket_of(classification)].append((article, classification))
+
+    max_unknown = int(num * max_unknown_share)
+    picked: List[Tuple[Dict[str, Any], Classification]] = []
+    sources: set[str] = set()
+    unknown_picked = 0
+
+    def take(bucket: str) -> bool:
+        queue = queues[bucket]
+        if not queue:
+            return False
+        # Best ranked candidate from an outlet we don't have yet, else the best ranked
+        for position, (article, _) in enumerate(queue):
+            if article.get("source") not in sources:
+                break
+        else:
+            position = 0
+        queue.rotate(-position)
+        article, classification = queue.popleft()
+        queue.rotate(position)
+        picked.append((article, classification))
+        sources.add(article.get("source"))
+        return True
+
+    while len(picked) < num:
+        progressed = False
+        for bucket in BUCKETS:
+            if len(picked) < num and take(bucket):
+                progressed = True
+        if len(picked) < num and unknown_picked < max_unknown and take("unknown"):
+            unknown_picked += 1
+            progressed = True
+        if not progressed:
+            # Only unknowns are left: let them fill the remaining slots
+            if unknown_picked >= max_unknown and queues["unknown"]:
+                max_unknown = num
+                continue
+            break
+    return picked
+
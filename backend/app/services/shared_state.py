@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Coroutine, Dict, Optional, Set
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "newsanalyzer:"
+
+
+class MemoryState:
+    """In-process stand-in for the shared backend (tests, single-worker runs).
+
+    Each operation completes without awaiting, so it is atomic on the event
+    loop just as the Redis scripts are atomic on the server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple[Any, float]] = {}
+
+    def _live(self, key: str) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at and expires_at < time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._data[key] = (value, time.time() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        current = self._live(key)
+        if current is None:
+            value, expires_at = amount, (time.time() + ttl if ttl else 0.0)
+        else:
+            value, expires_at = int(current) + amount, self._data[key][1]
+        self._data[key] = (value, expires_at)
+        return value
+
+    async def reserve(self, key: str, rate: float, capacity: float, cost: float, max_wait: float) -> Optional[float]:
+        now = time.time()
+        tat = max(float(self._live(key) or 0.0), now)
+        new_tat = tat + cost / rate
+        wait = new_tat - capacity / rate - now
+        if wait > max_wait:
+            return None
+        self._data[key] = (new_tat, new_tat + 1.0)
+        return max(wait, 0.0)
+
+    async def refund(self, key: str, rate: float, cost: float) -> None:
+        tat = self._live(key)
+        if tat is not None:
+            self._data[key] = (max(float(tat) - cost / rate, time.time()), self._data[key][1])
+
+
+# GCRA: the key holds the theoretical arrival time of the next request. A
+# reservation pushes it forward by cost/rate and waits until it is within
+# capacity/rate of now, which behaves like a token bucket of that capacity.
+# Times come from the Redis server clock so every node agrees.
+_RESERVE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate, capacity, cost, max_wait = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < now then tat = now end
+local new_tat = tat + cost / rate
+local wait = new_tat - capacity / rate - now
+if wait > max_wait then return '-1' end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+if wait < 0 then wait = 0 end
+return tostring(wait)
+"""
+
+_REFUND = """
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+if tat <= now then return 0 end
+local back = tat - tonumber(ARGV[2]) / tonumber(ARGV[1])
+if back < now then back = now end
+redis.call('SET', KEYS[1], tostring(back), 'KEEPTTL')
+return 1
+"""
+
+_INCR = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if tonumber(ARGV[2]) > 0 and value == tonumber(ARGV[1]) then
+  redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+
+class RedisState:
+    """Shared state in Redis (requires the ``redis`` package); every update is one atomic command or script"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url)
+        self._reserve = self._redis.register_script(_RESERVE)
+        self._refund = self._redis.register_script(_REFUND)
+        self._incr = self._redis.register_script(_INCR)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._redis.get(PREFIX + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(PREFIX + key, value, px=max(int(ttl * 1000), 1))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(PREFIX + key)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return int(await self._incr(keys=[PREFIX + key], args=[amount, math.ceil(ttl or 0)]))
+
+    async def reserve(self, key: str, rate: float, capacity: float, cost: float, max_wait: float) -> Optional[float]:
+        wait = float(await self._reserve(keys=[PREFIX + key], args=[rate, capacity, cost, max_wait]))
+        return None if wait < 0 else wait
+
+    async def refund(self, key: str, rate: float, cost: float) -> None:
+        await self._refund(keys=[PREFIX + key], args=[rate, cost])
+
+
+_state: Any = None
+_state_ready = False
+
+
+def get_state() -> Optional[Any]:
+    """The configured shared backend, or None when state stays per process"""
+    global _state, _state_ready
+    if not _state_ready:
+        _state_ready = True
+        backend = settings.shared_state_backend
+        if backend == "redis":
+            if not settings.redis_url:
+                logger.warning("shared_state_backend is redis but redis_url is not set; keeping state per process")
+            else:
+                try:
+                    _state = RedisState(settings.redis_url)
+                except ImportError:
+                    logger.warning("shared_state_backend is redis but the redis package is not installed; keeping state per process")
+        elif backend == "memory":
+            _state = MemoryState()
+        elif backend:
+            logger.warning(f"Unknown shared_state_backend {backend!r}; keeping state per process")
+    return _state
+
+
+def set_state(state: Optional[Any]) -> None:
+    """Swap the shared backend (tests and benchmarks)"""
+    global _state, _state_ready
+    _state, _state_ready = state, True
+
+
+_background: Set[asyncio.Task] = set()
+
+
+def background(coro: Coroutine[Any, Any, Any], what: str) -> None:
+    """Run a shared-state write without waiting for it; failures are logged"""
+    try:
+        task = asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        coro.close()  # no loop (sync caller outside the app): nothing to share with
+        return
+    _background.add(task)
+
+    def done(t: asyncio.Task) -> None:
+        _background.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning(f"Shared state {what} failed: {t.exception()}")
+
+    task.add_done_callback(done)
@@ -0,0 +1,4 @@
+"""Performance benchmarks run against local stub upstreams.
+
+Run from the ``backend`` directory, e.g. ``python -m benchmarks.fanout``.
+"""
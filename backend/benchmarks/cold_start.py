@@ -0,0 +1,102 @@
+"""Serverless cold start: import of api/index.py and the first requests, in fresh interpreters.
+
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --budget-ms 900    # exit 1 when over budget
+
+Each run starts a new Python process, as a fresh function instance would,
+times ``from api.index import app`` and then the first request to a few
+routes, called straight through ASGI (no server, no lifespan: Vercel does
+not run it). Upstream API keys are cleared so nothing leaves the process.
+
+Reports per-stage medians and fails when the median import + first-request
+time exceeds --budget-ms, or when a module that should load lazily
+(--forbid) was imported at cold start.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+# Loaded on first use (pooled client, optional backends), never at import
+LAZY_MODULES = ("httpx", "tldextract", "requests", "redis", "numpy", "pyarrow")
+ROUTES = ("/health", "/search?q=climate", "/search?q=climate&offline=true", "/api-status")
+
+_CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+from api.index import app
+imported = time.perf_counter()
+
+async def get(target):
+    path, _, query = target.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 1),
+        "server": ("localhost", 80),
+    }
+    sent = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        sent.append(message)
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return sent[0]["status"], (time.perf_counter() - start) * 1000
+
+async def main():
+    return {target: await get(target) for target in ROUTES}
+
+loaded = sorted(m for m in LAZY if m in sys.modules)
+requests = asyncio.run(main())
+print(json.dumps({"import_ms": (imported - started) * 1000, "requests": requests, "lazy_loaded_at_import": loaded}))
+"""
+
+
+def run_once(routes: tuple[str, ...], lazy: tuple[str, ...]) -> dict:
+    env = {**os.environ, "GOOGLE_API_KEY": "", "GOOGLE_CSE_ID": "", "OPENAI_API_KEY": "", "PYTHONDONTWRITEBYTECODE": "1"}
+    code = f"ROUTES = {routes!r}\nLAZY = {lazy!r}\n" + _CHILD
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=0.0, help="max median import + first /health request")
+    parser.add_argument("--forbid", nargs="*", default=list(LAZY_MODULES), help="modules that must not load at import")
+    args = parser.parse_args()
+
+    runs = [run_once(ROUTES, tuple(args.forbid)) for _ in range(args.runs)]
+    imports = statistics.median(r["import_ms"] for r in runs)
+    print(f"{'process (interpreter + import + requests)':<44} {statistics.median(r['process_ms'] for r in runs):8.1f} ms")
+    print(f"{'import api.index':<44} {imports:8.1f} ms")
+    for route in ROUTES:
+        status = runs[0]["requests"][route][0]
+        print(f"{'first GET ' + route:<44} {statistics.median(r['requests'][route][1] for r in runs):8.1f} ms  ({status})")
+
+    failed = False
+    loaded = sorted({m for r in runs for m in r["lazy_loaded_at_import"]})
+    if loaded:
+        print(f"FAIL loaded at import: {', '.join(loaded)}", file=sys.stderr)
+        failed = True
+    cold = imports + statistics.median(r["requests"][ROUTES[0]][1] for r in runs)
+    if args.budget_ms and cold > args.budget_ms:
+        print(f"FAIL cold start {cold:.1f} ms over the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
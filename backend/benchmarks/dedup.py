@@ -0,0 +1,143 @@
+"""Near-duplicate clustering on a synthetic corpus with known duplicate groups.
+
+    python -m benchmarks.dedup --articles 10000 --distance 6
+
+Each story is published several ways: syndicated wire copies on other
+outlets (with the outlet suffix CSE appends to titles), utm_* / scheme
+variants of the same URL, and rewrites with a changed headline word or two.
+Distinct stories are drawn from a shared topical vocabulary so some are
+near each other without being duplicates.
+
+Reports pairwise precision / recall against the true groups and throughput
+for the old exact-URL + 50-char-title-prefix dedup and for dedup_results.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from collections import Counter
+from typing import Any, Callable
+
+from app.config import settings
+from app.services.dedup import cluster, dedup_results, simhash
+from app.services.cache import normalize_url
+
+OUTLETS = [
+    ("apnews.com", "AP News"), ("reuters.com", "Reuters"), ("cnn.com", "CNN"), ("foxnews.com", "Fox News"),
+    ("nypost.com", "New York Post"), ("npr.org", "NPR"), ("usatoday.com", "USA Today"),
+    ("localgazette.com", "Local Gazette"), ("citybeat.net", "City Beat"), ("abcnews.go.com", "ABC News"),
+]
+TOPIC = ("senate house bill vote budget tariff court ruling governor election campaign economy inflation "
+         "market jobs report border policy president congress trade deal climate energy health care").split()
+FILLER = ("officials said on tuesday after weeks of debate over new plan that would change how state "
+          "leaders respond critics argued supporters hope measure could pass before end year analysts "
+          "expect further talks while lawmakers weigh options amid growing pressure from voters").split()
+
+
+def _sentence(rng: random.Random, n: int) -> list[str]:
+    return [rng.choice(TOPIC) if rng.random() < 0.35 else rng.choice(FILLER) for _ in range(n)]
+
+
+def make_corpus(n: int, seed: int = 11) -> tuple[list[dict[str, Any]], list[int]]:
+    rng = random.Random(seed)
+    results: list[dict[str, Any]] = []
+    groups: list[int] = []
+    story = 0
+    while len(results) < n:
+        title = _sentence(rng, rng.randint(8, 12))
+        snippet = _sentence(rng, rng.randint(20, 28))
+        domain, name = rng.choice(OUTLETS)
+        slug = f"story-{story}"
+        copies = rng.choices([1, 2, 3, 5], weights=[5, 3, 2, 1])[0]
+        for c in range(copies):
+            kind = "original" if c == 0 else rng.choice(["syndicated", "utm", "rewrite"])
+            t, s, d, nm, url = list(title), list(snippet), domain, name, f"https://www.{domain}/2024/{slug}"
+            if kind == "syndicated":
+                d, nm = rng.choice(OUTLETS)
+                url = f"https://{d}/wire/{slug}-{c}"
+                s = [rng.choice(["Mar", "Apr", "May"]), str(rng.randint(1, 28)) + ",", "2024", "..."] + s
+            elif kind == "utm":
+                url = f"http://{domain}/2024/{slug}/?utm_source=feed{c}&utm_medium=rss"
+            elif kind == "rewrite":
+                for _ in range(rng.randint(1, 2)):
+                    t[rng.randrange(min(len(t), 6))] = rng.choice(TOPIC + FILLER)
+                s = s[: len(s) - rng.randint(0, 4)]
+                url = f"https://{d}/2024/{slug}-updated"
+            results.append({
+                "title": " ".join(t).capitalize() + f" - {nm}",
+                "snippet": " ".join(s).capitalize() + ".",
+                "link": url,
+            })
+            groups.append(story)
+        story += 1
+    return results[:n], groups[:n]
+
+
+def legacy_clusters(results: list[dict[str, Any]]) -> list[int]:
+    """Cluster ids implied by the old dedup: exact URL or lowercased 50-char title prefix"""
+    first: dict[str, int] = {}
+    ids = []
+    for i, r in enumerate(results):
+        url_key, title_key = "u:" + r["link"], "t:" + r["title"].lower()[:50]
+        cid = first.get(url_key, first.get(title_key, i))
+        first.setdefault(url_key, cid)
+        first.setdefault(title_key, cid)
+        ids.append(cid)
+    return ids
+
+
+def simhash_clusters(distance: int) -> Callable[[list[dict[str, Any]]], list[int]]:
+    def run(results: list[dict[str, Any]]) -> list[int]:
+        keys = [normalize_url(r["link"]) for r in results]
+        fingerprints = [simhash(r["title"], r["snippet"]) for r in results]
+        return cluster(fingerprints, keys, distance)
+    return run
+
+
+def _pairs(counts: Counter) -> int:
+    return sum(c * (c - 1) // 2 for c in counts.values())
+
+
+def pairwise(predicted: list[int], truth: list[int]) -> tuple[float, float]:
+    true_positive = _pairs(Counter(zip(predicted, truth)))
+    predicted_pairs, true_pairs = _pairs(Counter(predicted)), _pairs(Counter(truth))
+    precision = true_positive / predicted_pairs if predicted_pairs else 1.0
+    recall = true_positive / true_pairs if true_pairs else 1.0
+    return precision, recall
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--distance", type=int, default=settings.dedup_max_distance, help="max Hamming distance between fingerprints")
+    args = parser.parse_args()
+
+    results, truth = make_corpus(args.articles)
+    print(f"{len(results):,} articles in {len(set(truth)):,} stories")
+    for name, fn in [("url + title[:50]", legacy_clusters), (f"simhash d<={args.distance}", simhash_clusters(args.distance))]:
+        start = time.perf_counter()
+        predicted = fn(results)
+        elapsed = time.perf_counter() - start
+        precision, recall = pairwise(predicted, truth)
+        print(
+            f"{name:<18} precision {precision:6.1%}  recall {recall:6.1%}  "
+            f"kept {len(set(predicted)):,}  {elapsed / len(results) * 1e6:7.1f} us/article"
+        )
+
+    start = time.perf_counter()
+    kept = dedup_results(results, max_distance=args.distance)
+    elapsed = time.perf_counter() - start
+    print(f"dedup_results, whole corpus: {len(kept):,} kept, {elapsed / len(results) * 1e6:.1f} us/article")
+
+    # What /search actually sees: ~20 CSE results per call
+    page = 20
+    start = time.perf_counter()
+    for offset in range(0, len(results), page):
+        dedup_results(results[offset:offset + page], max_distance=args.distance)
+    elapsed = time.perf_counter() - start
+    print(f"dedup_results, {page}-result pages: {elapsed / len(results) * 1e6:.1f} us/article")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Domain resolution: tldextract + exact dict lookup vs. the outlet trie.
+
+    python -m benchmarks.domains --urls 100000
+
+Reports throughput and how many URLs would fall through to an AI call
+(i.e. did not resolve to a known outlet) under each strategy.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+try:  # the old strategy's dependency; the app no longer needs it
+    import tldextract
+except ImportError:
+    tldextract = None
+
+from app.services.classifier import classify_by_outlet
+from app.services.outlets import get_registry
+
+SUBDOMAINS = ["www", "edition", "amp", "m", "news", "us", "www"]
+UNKNOWN = ["localgazette.com", "citybeat.net", "example-news.co.uk", "wirefeed.org", "tribune.com.au"]
+
+
+def make_urls(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    outlets = list(get_registry().ratings)
+    urls = []
+    for i in range(n):
+        domain = rng.choice(outlets) if rng.random() < 0.8 else rng.choice(UNKNOWN)
+        sub = rng.choice(SUBDOMAINS)
+        host = domain if sub == "www" and rng.random() < 0.3 else f"{sub}.{domain}"
+        urls.append(f"https://{host}/2024/story-{i}?utm_source=feed")
+    return urls
+
+
+def old_strategy(urls: list[str]) -> int:
+    """extract_domain as it was (tldextract per URL) + exact dict lookup"""
+    extract = tldextract.TLDExtract(suffix_list_urls=())  # offline, still uses its disk cache
+    ratings = dict(get_registry().ratings)
+    misses = 0
+    for url in urls:
+        parts = extract(url)
+        domain = ".".join(p for p in [parts.domain, parts.suffix] if p).lower()
+        if domain not in ratings:
+            misses += 1
+    return misses
+
+
+def new_strategy(urls: list[str]) -> int:
+    return sum(1 for url in urls if classify_by_outlet(url).method != "outlet")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    urls = make_urls(args.urls)
+    strategies = [("tldextract + dict", old_strategy)] if tldextract is not None else []
+    for name, fn in strategies + [("outlet trie", new_strategy)]:
+        start = time.perf_counter()
+        misses = fn(urls)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<18} {len(urls) / elapsed:12,.0f} urls/s  AI fallbacks: {misses:,} ({misses / len(urls):.1%})")
+
+
+if __name__ == "__main__":
+    main()
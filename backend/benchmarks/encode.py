@@ -0,0 +1,104 @@
+"""Building and encoding a 1k-article search response, old path vs. ArticleRecord.
+
+    python -m benchmarks.encode --articles 1000
+
+The old path built an info dict per CSE item, a Classification, a merged
+dict per article and then ``json.dumps``-ed the list. The new one builds
+one slotted ArticleRecord per item, classifies it in place and encodes the
+response with ``app.services.records.dumps`` (orjson when installed, the
+fragment-caching encoder otherwise; both are timed).
+
+Reports allocated blocks and bytes still held by each response (tracemalloc)
+and the encode time per response.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from app.services import records
+from app.services.article_store import article_id
+from app.services.classifier import Classification, classify_by_outlet, extract_domain
+from app.services.search import _article_info
+from benchmarks.domains import make_urls
+
+
+def make_items(n: int) -> list[dict[str, Any]]:
+    return [
+        {"link": url, "title": f"Headline number {i} about the budget vote", "snippet": "Lawmakers said on Tuesday " * 6}
+        for i, url in enumerate(make_urls(n))
+    ]
+
+
+def legacy_build(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    articles = []
+    for i, item in enumerate(items):
+        url = item.get("link", "")
+        info = {
+            "id": article_id(url), "url": url, "title": item.get("title", ""), "snippet": item.get("snippet", ""),
+            "source": extract_domain(url) or "unknown", "published_at": None,
+        }
+        match = classify_by_outlet(url)
+        # Each call used to build its own Classification and reasoning string
+        classification = Classification(match.score, match.confidence, match.method, f"{match.reasoning}")
+        articles.append({
+            **info, "spectrum_score": classification.score, "confidence": classification.confidence,
+            "method": classification.method, "reasoning": classification.reasoning,
+        })
+    return articles
+
+
+def record_build(items: list[dict[str, Any]]) -> list[records.ArticleRecord]:
+    return [_article_info(i, item).classify(classify_by_outlet(item.get("link", ""))) for i, item in enumerate(items)]
+
+
+def held(build: Callable[[], Any]) -> tuple[int, int]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del result
+    return sum(s.count_diff for s in stats), sum(s.size_diff for s in stats)
+
+
+def timed(encode: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    items = make_items(args.articles)
+    record_build(items)  # warm the outlet index and memoized lookups for both paths
+    for name, build in [("dicts", lambda: legacy_build(items)), ("records", lambda: record_build(items))]:
+        blocks, size = held(build)
+        print(f"{name:<8} build: {blocks:7,} blocks, {size / 1024:8.1f} KiB held per {args.articles} articles")
+
+    legacy = {"query": "q", "articles": legacy_build(items), "api_status": {}}
+    new = {"query": "q", "articles": record_build(items), "api_status": {}}
+    orjson = records.orjson
+    try:
+        records.orjson = None
+        fallback = timed(lambda: records.dumps(new), args.repeat)
+        assert json.loads(records.dumps(new)) == json.loads(json.dumps(legacy))
+    finally:
+        records.orjson = orjson
+    print(f"json.dumps(dicts)          {timed(lambda: json.dumps(legacy).encode(), args.repeat) * 1e3:7.2f} ms/response")
+    print(f"records.dumps (no orjson)  {fallback * 1e3:7.2f} ms/response")
+    if orjson is not None:
+        print(f"records.dumps (orjson)     {timed(lambda: records.dumps(new), args.repeat) * 1e3:7.2f} ms/response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare serial per-call clients against the pooled concurrent fan-out.
+
+    python -m benchmarks.fanout --latency 0.15 --rounds 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.config import settings
+from app.services import google
+from app.services.http import close_client
+from benchmarks.stubs import StubCSEServer
+
+GROUPS = 5  # four outlet groups plus the general query
+
+
+async def serial_fresh_clients(query: str) -> int:
+    """The previous strategy: one query at a time, a new client per call."""
+    total = 0
+    for i in range(GROUPS):
+        async with httpx.AsyncClient(timeout=20) as client:
+            r = await client.get(google.BASE_URL, params={"q": f"{query} {i}", "num": 3})
+            total += len(r.json().get("items", []))
+    return total
+
+
+async def pooled_fan_out(query: str) -> int:
+    return len(await google.search_news(query, num=12))
+
+
+async def _time(fn, query: str, rounds: int) -> list[float]:
+    samples = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        await fn(f"{query} {i}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(name: str, samples: list[float]) -> None:
+    print(f"{name:<22} p50={statistics.median(samples):8.1f}ms  max={max(samples):8.1f}ms")
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.google_api_key = settings.google_api_key or "stub-key"
+    settings.google_cse_id = settings.google_cse_id or "stub-cx"
+    settings.search_deadline_seconds = args.deadline
+
+    with StubCSEServer(latency=args.latency) as stub:
+        google.BASE_URL = stub.url
+        _report("serial/fresh clients", await _time(serial_fresh_clients, "economy", args.rounds))
+        _report("pooled fan-out", await _time(pooled_fan_out, "economy", args.rounds))
+
+    # One group far slower than the deadline: partial results, bounded latency
+    with StubCSEServer(latency=args.latency, slow_marker="site:foxnews.com", slow_latency=args.deadline * 3) as stub:
+        google.BASE_URL = stub.url
+        start = time.perf_counter()
+        results = await google.search_news("economy slow", num=12)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{'slow group, deadline':<22} {elapsed:8.1f}ms  results={len(results)}")
+
+    await close_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.15, help="stub CSE latency in seconds")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--deadline", type=float, default=1.0, help="fan-out deadline in seconds")
+    asyncio.run(main(parser.parse_args()))
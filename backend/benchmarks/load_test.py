@@ -0,0 +1,155 @@
+"""Load-test /search: requests/sec and latency percentiles.
+
+    python -m benchmarks.load_test --serve asgi
+    python -m benchmarks.load_test --serve legacy
+    python -m benchmarks.load_test --url http://127.0.0.1:8000
+
+``asgi`` runs app.main:app under uvicorn; ``legacy`` reproduces the previous
+serving model (a threaded BaseHTTPRequestHandler running ``asyncio.run`` per
+request). Both talk to a local stub CSE server, with no OpenAI key set so
+classification stays local.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from app.config import settings
+from app.services import google
+from app.services.http import close_client
+from app.services.search import cached_search_and_classify
+from benchmarks.stubs import StubCSEServer
+
+
+class _LegacyHandler(BaseHTTPRequestHandler):
+    """The previous serving path: a fresh event loop for every request."""
+
+    def do_GET(self):
+        q = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+
+        async def run():
+            try:
+                return await cached_search_and_classify(q)
+            finally:
+                await close_client()
+
+        body = json.dumps({"query": q, "articles": asyncio.run(run())}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve_legacy() -> tuple[str, callable]:
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _LegacyHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+
+    def stop():
+        httpd.shutdown()
+        httpd.server_close()
+
+    return f"http://{host}:{port}", stop
+
+
+def _serve_asgi() -> tuple[str, callable]:
+    import socket
+
+    import uvicorn
+
+    from app.main import app
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, distinct: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    counter = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        async def worker():
+            nonlocal errors, counter
+            while time.perf_counter() < deadline:
+                counter += 1
+                query = f"topic {counter % distinct}" if distinct else f"topic {counter}"
+                start = time.perf_counter()
+                try:
+                    r = await client.get("/search", params={"q": query})
+                    if r.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serve", choices=["asgi", "legacy"], help="start a local server instead of using --url")
+    parser.add_argument("--url", help="base URL of an already running server")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--distinct", type=int, default=0, help="cycle through N queries (0: every query is new)")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub CSE latency in seconds")
+    args = parser.parse_args()
+    if not args.serve and not args.url:
+        parser.error("one of --serve or --url is required")
+
+    if not args.serve:
+        print(json.dumps(asyncio.run(run_load(args.url, args.concurrency, args.duration, args.distinct))))
+        return
+
+    settings.google_api_key = settings.google_api_key or "stub-key"
+    settings.google_cse_id = settings.google_cse_id or "stub-cx"
+    settings.openai_api_key = None
+    with StubCSEServer(latency=args.latency) as stub:
+        google.BASE_URL = stub.url
+        base_url, stop = _serve_asgi() if args.serve == "asgi" else _serve_legacy()
+        try:
+            result = asyncio.run(run_load(base_url, args.concurrency, args.duration, args.distinct))
+        finally:
+            stop()
+    print(json.dumps({"serve": args.serve, **result}))
+
+
+if __name__ == "__main__":
+    main()
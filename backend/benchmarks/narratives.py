@@ -0,0 +1,76 @@
+"""Incremental narrative clustering on a synthetic article stream.
+
+    python -m benchmarks.narratives --articles 50000 --batch 12
+
+Each narrative has its own handful of key terms; articles mix a few of
+them with filler shared by everything, and arrive interleaved in
+search-sized batches. Reports pairwise precision / recall of the
+narratives found against the true ones, the cost of an ingestion batch
+early and late in the stream (it should not grow with the corpus), and
+the latency of reading the snapshot /narratives serves.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any
+
+from app.services.dimensions import score_lexicon
+from app.services.narratives import NarrativeIndex
+from benchmarks.dedup import FILLER, OUTLETS, pairwise
+
+
+def make_stream(n: int, narratives: int, seed: int = 5) -> tuple[list[dict[str, Any]], list[int]]:
+    rng = random.Random(seed)
+    keys = [[f"k{t}x{j}" for j in range(8)] for t in range(narratives)]
+    articles: list[dict[str, Any]] = []
+    truth: list[int] = []
+    for i in range(n):
+        # Newer narratives keep appearing; older ones keep getting coverage
+        topic = rng.randrange(max(1, min(narratives, narratives * (i + 1) * 2 // n)))
+        def text(length: int) -> str:
+            return " ".join(rng.choice(keys[topic]) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(length))
+        domain, _ = rng.choice(OUTLETS)
+        articles.append({
+            "id": f"a{i}", "url": f"https://{domain}/{i}", "source": domain,
+            "title": text(rng.randint(8, 12)).capitalize(), "snippet": text(rng.randint(20, 28)) + ".",
+        })
+        truth.append(topic)
+    return articles, truth
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=50_000)
+    parser.add_argument("--narratives", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=12, help="articles per ingestion batch (one search)")
+    args = parser.parse_args()
+
+    articles, truth = make_stream(args.articles, args.narratives)
+    scores = [score_lexicon(a) for a in articles]
+    index = NarrativeIndex()
+    batch_times: list[float] = []
+    for offset in range(0, len(articles), args.batch):
+        start = time.perf_counter()
+        index.add(articles[offset:offset + args.batch], scores[offset:offset + args.batch])
+        batch_times.append(time.perf_counter() - start)
+
+    tenth = max(1, len(batch_times) // 10)
+    early, late = sorted(batch_times[:tenth]), sorted(batch_times[-tenth:])
+    print(f"{len(articles):,} articles, {args.narratives} true narratives, batches of {args.batch}")
+    print(f"batch cost, first 10%  p50 {early[len(early) // 2] * 1e3:6.2f} ms")
+    print(f"batch cost, last 10%   p50 {late[len(late) // 2] * 1e3:6.2f} ms")
+
+    predicted = [int(index.narrative_of(a["id"])[1:]) for a in articles]
+    precision, recall = pairwise(predicted, truth)
+    print(f"precision {precision:6.1%}  recall {recall:6.1%}  found {len(set(predicted)):,} narratives")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.snapshot()
+    print(f"snapshot read {(time.perf_counter() - start) * 1e3:.3f} us  ({len(index.snapshot())} narratives)")
+
+
+if __name__ == "__main__":
+    main()
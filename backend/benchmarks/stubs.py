@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = Path(__file__).parent / "fixtures"
+_SITE = re.compile(r"\bsite:(\S+)")
+_ARTICLE = re.compile(r"^\[(\d+)\] Source: (.*)\nTitle: (.*)$", re.MULTILINE)
+
+
+def load_fixture(name: str) -> dict[str, Any]:
+    with open(FIXTURES / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _stable_hash(text: str) -> int:
+    return zlib.crc32(text.encode())
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # listen backlog; the default 5 drops connections under fan-out
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients can reuse connections
+
+    def _send(self, status: int, payload: Any, headers: dict | None = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _respond(self, key: str, answer) -> None:
+        server: _StubServer = self.server.stub  # type: ignore[attr-defined]
+        server.record(key)
+        time.sleep(server.latency_for(key))
+        failure = server.next_failure()
+        if failure is not None:
+            self._send(*failure[:2], headers=failure[2])
+            return
+        self._send(200, answer())
+
+    def log_message(self, format, *args):  # silence per-request logging
+        pass
+
+
+class _CSEHandler(_Handler):
+    def do_GET(self):
+        server: StubCSEServer = self.server.stub  # type: ignore[attr-defined]
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        query = params.get("q", "")
+        num, start = int(params.get("num", 10)), int(params.get("start", 1))
+        self._respond(query, lambda: server.results(query, num, start))
+
+
+class _OpenAIHandler(_Handler):
+    def do_POST(self):
+        server: StubOpenAIServer = self.server.stub  # type: ignore[attr-defined]
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        model = body.get("model", "")
+        if not body.get("stream"):
+            def answer():
+                time.sleep(server.generation_time(prompt))
+                return server.completion(prompt, model)
+            self._respond(prompt[:80], answer)
+            return
+        server.record(prompt[:80])
+        time.sleep(server.latency_for(prompt))
+        failure = server.next_failure()
+        if failure is not None:
+            self._send(*failure[:2], headers=failure[2])
+            return
+        self._stream(server, server.completion(prompt, model), server.generation_time(prompt))
+
+    def _stream(self, server: "StubOpenAIServer", completion: dict[str, Any], seconds: float) -> None:
+        """Send a completion as server-sent chunks spread over ``seconds``, then usage and [DONE]"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(payload: Any) -> None:
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        text = completion["choices"][0]["message"]["content"]
+        pieces = [text[i:i + server.chunk_chars] for i in range(0, len(text), server.chunk_chars)]
+        envelope = {"id": completion["id"], "object": "chat.completion.chunk", "model": completion["model"]}
+        for n, piece in enumerate(pieces):
+            time.sleep(seconds / len(pieces))
+            finish = "stop" if n == len(pieces) - 1 else None
+            event({**envelope, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": finish}]})
+        event({**envelope, "choices": [], "usage": completion["usage"]})
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _StubServer:
+    """Threaded local HTTP server standing in for an upstream.
+
+    Every response waits ``latency`` seconds (+/- ``jitter`` as a fraction).
+    Queued failures (``fail_with_*``) are served first; after that each
+    request fails with a 429 at ``rate_limit_rate`` and a 500 at
+    ``error_rate``, drawn from a generator seeded with ``seed``.
+    """
+
+    handler: type = _Handler
+
+    def __init__(
+        self,
+        latency: float = 0.1,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 1,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests: list[str] = []
+        self.failures: list[tuple[int, dict, dict]] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = _Server(("127.0.0.1", 0), self.handler)
+        self._httpd.stub = self  # type: ignore[attr-defined]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def latency_for(self, key: str) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def fail_with_rate_limit(self, times: int = 1, retry_after: float | None = None) -> None:
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        payload = {"error": {"code": 429, "message": "Rate Limit Exceeded"}}
+        with self._lock:
+            self.failures.extend([(429, payload, headers)] * times)
+
+    def next_failure(self) -> tuple[int, dict, dict] | None:
+        with self._lock:
+            if self.failures:
+                return self.failures.pop(0)
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return 429, {"error": {"code": 429, "message": "Rate Limit Exceeded"}}, {"Retry-After": "1"}
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, {"error": {"code": 500, "message": "Backend Error"}}, {}
+        return None
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self.requests.append(key)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class StubCSEServer(_StubServer):
+    """Local stand-in for the Google CSE endpoint with configurable latency.
+
+    Without ``fixtures`` every query gets synthetic reuters.com results.
+    With ``fixtures`` (``load_fixture("cse.json")["queries"]``) a query is
+    answered from the recorded page for its text before any ``site:``
+    terms (or a page picked by hash), filtered to the ``site:`` outlets it
+    names; ``vary_links`` makes the links unique per query so classification
+    caches stay cold across queries.
+
+    ``slow_marker``/``slow_latency`` let one outlet group lag behind the rest,
+    which exercises the fan-out deadline.
+    """
+
+    handler = _CSEHandler
+
+    def __init__(
+        self,
+        latency: float = 0.1,
+        slow_marker: str | None = None,
+        slow_latency: float = 0.0,
+        fixtures: dict[str, Any] | None = None,
+        vary_links: bool = False,
+        **faults: Any,
+    ):
+        super().__init__(latency, **faults)
+        self.slow_marker = slow_marker
+        self.slow_latency = slow_latency
+        self.fixtures = fixtures
+        self.vary_links = vary_links
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/customsearch/v1"
+
+    def latency_for(self, query: str) -> float:
+        if self.slow_marker and self.slow_marker in query:
+            return self.slow_latency
+        return super().latency_for(query)
+
+    def fail_with_quota(self, times: int = 1) -> None:
+        payload = {"error": {"code": 403, "message": "Quota exceeded for quota metric 'Queries' per day"}}
+        with self._lock:
+            self.failures.extend([(403, payload, {})] * times)
+
+    def results(self, query: str, num: int, start: int = 1) -> dict[str, Any]:
+        if not self.fixtures:
+            slug = abs(hash(query)) % 100000
+            return {"items": [
+                {
+                    "title": f"Stub result {i} for {query[:40]}",
+                    "link": f"https://www.reuters.com/world/stub-{slug}-{i}",
+                    "displayLink": "www.reuters.com",
+                    "snippet": f"Snippet {i} for stub query {slug}.",
+                }
+                for i in range(start - 1, min(start - 1 + num, 100))
+            ]}
+        base = query.split(" site:")[0].strip()
+        page = self.fixtures.get(base)
+        if page is None:
+            names = sorted(self.fixtures)
+            page = self.fixtures[names[_stable_hash(base) % len(names)]]
+        sites = _SITE.findall(query)
+        items = [
+            item for item in page["items"]
+            if not sites or any(item["displayLink"].endswith(site) for site in sites)
+        ]
+        more = len(items) > start - 1 + num
+        items = items[start - 1:start - 1 + num]
+        if self.vary_links:
+            suffix = f"{_stable_hash(base):08x}"
+            items = [{**item, "link": f"{item['link']}-{suffix}"} for item in items]
+        queries: dict[str, Any] = {"request": [{"startIndex": start, "count": len(items)}]}
+        if more:
+            queries["nextPage"] = [{"startIndex": start + num, "count": num}]
+        return {"kind": "customsearch#search", "queries": queries, "items": items}
+
+
+class StubOpenAIServer(_StubServer):
+    """Local stand-in for OpenAI chat completions, answering from canned fixtures.
+
+    Understands the single-article, batched and bias-dimension prompts the
+    classifier sends and answers each article with an entry from
+    ``fixtures`` (``load_fixture("openai.json")``) chosen by a hash of its
+    title, so the same article always gets the same scores. Point the app at
+    it with ``settings.openai_base_url = stub.url``. ``per_article_latency``
+    is added per article in the prompt, like generation time; streamed
+    requests (``"stream": true``) get it spread over ``chunk_chars``-sized
+    deltas, followed by a usage chunk.
+    """
+
+    handler = _OpenAIHandler
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        per_article_latency: float = 0.0,
+        fixtures: dict[str, Any] | None = None,
+        chunk_chars: int = 16,
+        **faults: Any,
+    ):
+        super().__init__(latency, **faults)
+        self.per_article_latency = per_article_latency
+        self.fixtures = fixtures or load_fixture("openai.json")
+        self.chunk_chars = chunk_chars
+
+    def generation_time(self, prompt: str) -> float:
+        return self.per_article_latency * max(len(_ARTICLE.findall(prompt)), 1)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    def completion(self, prompt: str, model: str) -> dict[str, Any]:
+        articles = _ARTICLE.findall(prompt)
+        classifications, dimensions = self.fixtures["classifications"], self.fixtures["dimensions"]
+        if "five bias dimensions" in prompt:
+            results = []
+            for index, _, title in articles:
+                entry = dimensions[_stable_hash(title) % len(dimensions)]
+                phrase = " ".join(title.split()[:3])
+                results.append({"index": int(index), **entry, "phrases": [{"text": phrase, "dimension": "sensationalism"}]})
+            content = {"results": results}
+        elif articles:
+            content = {"results": [
+                {"index": int(index), **classifications[_stable_hash(title) % len(classifications)]}
+                for index, _, title in articles
+            ]}
+        else:
+            title = re.search(r"^Title: (.*)", prompt, re.MULTILINE)
+            content = classifications[_stable_hash(title.group(1) if title else prompt) % len(classifications)]
+        text = json.dumps(content)
+        return {
+            "id": f"chatcmpl-stub-{_stable_hash(prompt):08x}",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": (len(prompt) + len(text)) // 4},
+        }
+
+
+def _serve(cls: type, kwargs: dict[str, Any], conn) -> None:
+    with cls(**kwargs) as stub:
+        conn.send(stub.url)
+        conn.recv()  # until the parent is done
+        conn.send(len(stub.requests))
+
+
+class StubProcess:
+    """Run a stub server in a child process, so its request threads don't
+    compete with the code being measured for the interpreter lock.
+
+        with StubProcess(StubCSEServer, latency=0.05) as cse:
+            google.BASE_URL = cse.url
+        cse.request_count  # upstream calls served, once stopped
+    """
+
+    def __init__(self, cls: type, **kwargs: Any):
+        self.cls = cls
+        self.kwargs = kwargs
+        self.url = ""
+        self.request_count: int | None = None
+
+    def __enter__(self) -> "StubProcess":
+        self._conn, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_serve, args=(self.cls, self.kwargs, child), daemon=True)
+        self._process.start()
+        self.url = self._conn.recv()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._conn.send(None)
+        self.request_count = self._conn.recv()
+        self._process.join(timeout=5)
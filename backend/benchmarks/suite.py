@@ -0,0 +1,240 @@
+"""Offline, repeatable benchmark suite for the search hot path.
+
+    python -m benchmarks.suite                          # every scenario, JSON report on stdout
+    python -m benchmarks.suite -s search_and_classify --concurrency 32 --requests 400
+    python -m benchmarks.suite -o baseline.json
+    python -m benchmarks.suite --baseline baseline.json --tolerance 0.25
+
+Upstreams are local stub servers, each in its own process, answering from
+benchmarks/fixtures (CSE result pages, canned OpenAI completions) with
+configurable latency, jitter, 5xx and 429 rates drawn from a seeded
+generator. Client-side pacing
+(google_cse_qps, openai_rpm/tpm) is lifted so the numbers reflect this code
+and the stub latency rather than the token buckets; the stubs' 429s still
+go through the circuit breakers, which are reset between scenarios.
+
+Scenarios:
+  search_news          CSE fan-out, dedup and trimming for one query
+  search_and_classify  a full uncached search: fan-out, balanced pick, AI batch, store, narratives
+  classify_hybrid      one article each, outlet lookup or single AI call
+  dedup                dedup_results over a fan-out's worth of raw CSE items
+  encode               records.dumps of a 1k-article response
+
+Each reports ops, errors (exceptions or empty results), throughput (ops/s),
+p50/p95/p99 latency in ms and peak RSS in MiB (the process high-water mark
+when the scenario ends, so it only grows across scenarios). With
+--baseline, exits 1 when a scenario's p95 or throughput is worse than the
+baseline's by more than --tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import time
+from typing import Any, Awaitable, Callable
+
+from app.config import settings
+from app.services import google, records
+from app.services.classifier import classify_hybrid
+from app.services.dedup import dedup_results
+from app.services.http import close_client
+from app.services.ratelimit import cse_guard, openai_guard
+from app.services.search import _article_info, search_and_classify
+from benchmarks.stubs import StubCSEServer, StubOpenAIServer, StubProcess, load_fixture
+
+try:  # peak RSS; not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+SCENARIOS = ("search_news", "search_and_classify", "classify_hybrid", "dedup", "encode")
+# Pure CPU work: run one at a time whatever --concurrency says
+SERIAL = {"dedup", "encode"}
+
+
+def percentile(samples: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted ``samples``"""
+    return samples[max(0, math.ceil(p * len(samples)) - 1)]
+
+
+def peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def drive(op: Callable[[int], Awaitable[Any]], requests: int, concurrency: int) -> dict[str, Any]:
+    """Run ``op(0..requests-1)`` from ``concurrency`` workers and summarize latencies"""
+    latencies: list[float] = []
+    errors = 0
+    indices = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in indices:
+            start = time.perf_counter()
+            try:
+                if not await op(i):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "ops": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def scenario_ops(pages: dict[str, Any]) -> dict[str, Callable[[int], Awaitable[Any]]]:
+    topics = sorted(pages)
+    items = [item for topic in topics for item in pages[topic]["items"]]
+
+    def query(i: int) -> str:
+        # A new query every time: nothing is served from a cache
+        return f"{topics[i % len(topics)]} {i}"
+
+    async def search_news(i: int) -> Any:
+        return await google.search_news(query(i), num=30)
+
+    async def search_classify(i: int) -> Any:
+        return await search_and_classify(query(i))
+
+    async def hybrid(i: int) -> Any:
+        item = items[i % len(items)]
+        record = _article_info(i, {**item, "link": f"{item['link']}-{i}"})
+        return await classify_hybrid(record.title, record.snippet, record.source, url=record.url)
+
+    # One fan-out's raw items: the group queries plus the overlapping general query
+    page = pages[topics[0]]["items"]
+    raw = page + page[:6]
+
+    async def dedup(i: int) -> Any:
+        return dedup_results(raw, settings.dedup_max_distance)
+
+    response = {
+        "query": "q",
+        "articles": [
+            _article_info(i, {**item, "link": f"{item['link']}-{i}"}) for i, item in enumerate(items * (1000 // len(items) + 1))
+        ][:1000],
+        "api_status": {"served_from": "live"},
+    }
+
+    async def encode(i: int) -> Any:
+        return records.dumps(response)
+
+    return {
+        "search_news": search_news,
+        "search_and_classify": search_classify,
+        "classify_hybrid": hybrid,
+        "dedup": dedup,
+        "encode": encode,
+    }
+
+
+def _reset_upstreams() -> None:
+    for guard in (cse_guard, openai_guard):
+        guard.requests.rate = 0  # unlimited; the stubs set the pace
+        guard.tokens = None
+        guard.breaker.record_success()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    faults = {"jitter": args.jitter, "error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate, "seed": args.seed}
+    pages = load_fixture("cse.json")["queries"]
+    cse = StubProcess(StubCSEServer, latency=args.cse_latency, fixtures=pages, vary_links=True, **faults)
+    openai = StubProcess(StubOpenAIServer, latency=args.openai_latency, per_article_latency=args.per_article_latency, **faults)
+    settings.google_api_key = "stub-key"
+    settings.google_cse_id = "stub-cx"
+    settings.openai_api_key = "stub-key"
+
+    report: dict[str, Any] = {"config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}, "scenarios": {}}
+    with cse, openai:
+        settings.openai_base_url = openai.url
+        google.BASE_URL = cse.url
+        ops = scenario_ops(pages)
+        for name in args.scenario or SCENARIOS:
+            _reset_upstreams()
+            concurrency = 1 if name in SERIAL else args.concurrency
+            result = await drive(ops[name], args.requests, concurrency)
+            report["scenarios"][name] = result
+            print(
+                f"{name:<20} {result['throughput']:9.1f} ops/s  p50 {result['p50_ms']:8.2f}  "
+                f"p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  "
+                f"errors {result['errors']:4}  rss {result['peak_rss_mib']} MiB",
+                file=sys.stderr,
+            )
+    await close_client()
+    report["upstream_calls"] = {"google_cse": cse.request_count, "openai": openai.request_count}
+    return report
+
+
+def regressions(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    found = []
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            found.append(f"{name}: p95 {result['p95_ms']} ms vs {base['p95_ms']} ms")
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            found.append(f"{name}: throughput {result['throughput']} vs {base['throughput']} ops/s")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenario", action="append", choices=SCENARIOS, help="repeatable; default: all")
+    parser.add_argument("--requests", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--cse-latency", type=float, default=0.08, help="seconds per stub CSE call")
+    parser.add_argument("--openai-latency", type=float, default=0.4, help="seconds per stub OpenAI call")
+    parser.add_argument("--per-article-latency", type=float, default=0.05, help="extra OpenAI seconds per article")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency spread, as a fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream calls answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of upstream calls answered with a 429")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep the app's warning logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("app").setLevel(logging.ERROR)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Drive the CSE limiter/breaker against a stub that returns 429s and quota 403s.
+
+    python -m benchmarks.upstream_faults
+
+Prints the google_cse upstream state after each step: the breaker opens on
+a 429 (honoring Retry-After), skips calls while open, lets one half-open
+probe through once the wait is over and closes again on success. A quota 403
+keeps the breaker open until the daily reset.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+
+from app.config import settings
+from app.services import google
+from app.services.http import close_client
+from app.services.ratelimit import cse_guard
+from benchmarks.stubs import StubCSEServer
+
+
+def _show(step: str, stub: StubCSEServer) -> None:
+    status = google.get_api_status()
+    upstream = status["upstreams"]["google_cse"]
+    print(json.dumps({
+        "step": step,
+        "upstream_calls": len(stub.requests),
+        "state": upstream["state"],
+        "reason": upstream["reason"],
+        "retry_in_seconds": upstream["retry_in_seconds"],
+        "rate_limited": status["rate_limited"],
+        "quota_exceeded": status["quota_exceeded"],
+    }))
+
+
+async def main() -> None:
+    settings.google_api_key = settings.google_api_key or "stub-key"
+    settings.google_cse_id = settings.google_cse_id or "stub-cx"
+
+    with StubCSEServer(latency=0.01) as stub:
+        google.BASE_URL = stub.url
+
+        stub.fail_with_rate_limit(times=1, retry_after=1)
+        await google._search_with_params("economy", num=3)
+        _show("429 with Retry-After: 1", stub)
+
+        await google._search_with_params("economy", num=3)
+        _show("call while open (skipped)", stub)
+
+        await asyncio.sleep(1.1)
+        await google._search_with_params("economy", num=3)
+        _show("half-open probe succeeds", stub)
+
+        stub.fail_with_quota(times=1)
+        await google._search_with_params("economy", num=3)
+        _show("403 quota exceeded", stub)
+
+        # Simulate the quota reset instead of waiting for midnight Pacific
+        cse_guard.breaker.open_until = 0
+        await google._search_with_params("economy", num=3)
+        _show("after quota reset", stub)
+
+    await close_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
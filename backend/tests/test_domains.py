@@ -0,0 +1,46 @@
+from app.services.classifier import classify_by_outlet, extract_domain
+from app.services.domains import OutletIndex, registered_domain
+
+
+def test_listed_suffixes():
+    assert registered_domain("edition.cnn.com") == "cnn.com"
+    assert registered_domain("www.bbc.co.uk") == "bbc.co.uk"
+    assert registered_domain("co.uk") is None
+
+
+def test_unlisted_tld_uses_default_rule():
+    assert registered_domain("example.zz") == "example.zz"
+    assert registered_domain("news.example.zz") == "example.zz"
+    assert registered_domain("zz") is None
+
+
+def test_outlet_index_matches_subdomains_and_nested_outlets():
+    index = OutletIndex({"cnn.com": -0.5, "abcnews.go.com": 0.0, "go.com": 0.3, "bbc.co.uk": -0.1})
+    assert index.resolve("edition.cnn.com") == ("cnn.com", -0.5)
+    assert index.resolve("amp.cnn.com") == ("cnn.com", -0.5)
+    assert index.resolve("abcnews.go.com") == ("abcnews.go.com", 0.0)
+    assert index.resolve("amp.abcnews.go.com") == ("abcnews.go.com", 0.0)
+    assert index.resolve("espn.go.com") == ("go.com", 0.3)
+    assert index.resolve("news.bbc.co.uk") == ("bbc.co.uk", -0.1)
+    assert index.resolve("co.uk") is None
+    assert index.resolve("notcnn.com") is None
+    assert index.resolve_url("https://AMP.CNN.com:443/2024/story?x=1") == ("cnn.com", -0.5)
+
+
+def test_extract_domain_resolves_outlets_before_registrable_domain():
+    assert extract_domain("https://edition.cnn.com/politics/story") == "cnn.com"
+    assert extract_domain("https://amp.cnn.com/story") == "cnn.com"
+    assert extract_domain("https://abcnews.go.com/Politics/story") == "abcnews.go.com"
+    assert extract_domain("https://www.lemonde.fr/politique/") == "lemonde.fr"
+    assert extract_domain("https://news.example.co.uk/a") == "example.co.uk"
+
+
+def test_classify_by_outlet_covers_hosts_the_registrable_domain_missed():
+    # abcnews.go.com registers as go.com, which the old exact lookup sent to AI
+    for url in (
+        "https://abcnews.go.com/Politics/story",
+        "https://edition.cnn.com/politics/story",
+        "https://amp.cnn.com/story",
+    ):
+        assert classify_by_outlet(url).method == "outlet"
+    assert classify_by_outlet("https://www.lemonde.fr/politique/").method == "unknown"
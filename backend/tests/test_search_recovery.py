@@ -0,0 +1,37 @@
+import time
+import uuid
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services import google
+from app.services.ratelimit import CircuitBreaker, cse_guard
+
+
+def test_search_probes_breaker_after_rate_limit_window(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"items": []})
+
+    monkeypatch.setattr(settings, "google_api_key", "test-key")
+    monkeypatch.setattr(settings, "google_cse_id", "test-cx")
+    monkeypatch.setattr(google, "get_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    client = TestClient(app)
+    cse_guard.record_rate_limited(0.2)
+    try:
+        blocked = client.get("/search", params={"q": f"recovery {uuid.uuid4().hex}"}).json()
+        assert blocked["api_status"]["error"] == "rate_limited"
+        assert not calls
+
+        time.sleep(0.5)
+        recovered = client.get("/search", params={"q": f"recovery {uuid.uuid4().hex}"}).json()
+        assert recovered["api_status"].get("error") != "rate_limited"
+        assert calls
+        assert cse_guard.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        cse_guard.breaker.record_success()
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.services.ratelimit import CircuitBreaker, UpstreamGuard
+from app.services.shared_state import MemoryState, set_state
+
+
+@pytest.fixture
+def shared():
+    state = MemoryState()
+    set_state(state)
+    yield state
+    set_state(None)
+
+
+def test_reserve_paces_past_capacity_and_refund_returns_room():
+    async def run():
+        state = MemoryState()
+        assert await state.reserve("cse:requests", rate=10, capacity=2, cost=1, max_wait=1) == 0.0
+        assert await state.reserve("cse:requests", rate=10, capacity=2, cost=1, max_wait=1) == 0.0
+        assert await state.reserve("cse:requests", rate=10, capacity=2, cost=1, max_wait=1) == pytest.approx(0.1, abs=0.02)
+        assert await state.reserve("cse:requests", rate=10, capacity=2, cost=1, max_wait=0.05) is None
+        await state.refund("cse:requests", rate=10, cost=2)
+        assert await state.reserve("cse:requests", rate=10, capacity=2, cost=1, max_wait=0) == 0.0
+
+    asyncio.run(run())
+
+
+def test_guards_share_one_daily_quota(shared):
+    async def run():
+        first = UpstreamGuard("quota-test", rate=1000, burst=1000, daily_quota=3)
+        second = UpstreamGuard("quota-test", rate=1000, burst=1000, daily_quota=3)
+        assert await first.acquire()
+        assert await first.acquire()
+        assert await second.acquire()
+        assert second.quota_used() == 3
+        assert not await second.acquire()
+        assert second.quota_exceeded
+
+    asyncio.run(run())
+
+
+def test_breaker_trip_is_seen_by_other_guards(shared):
+    async def run():
+        tripped = UpstreamGuard("breaker-test", rate=1000, burst=1000)
+        other = UpstreamGuard("breaker-test", rate=1000, burst=1000)
+        tripped.record_rate_limited(30)
+        await asyncio.sleep(0)  # let the background publish land
+        assert not await other.acquire()
+        assert other.breaker.state == CircuitBreaker.OPEN
+        assert other.rate_limited
+
+        tripped.record_success()
+        await asyncio.sleep(0)
+        assert await UpstreamGuard("breaker-test", rate=1000, burst=1000).acquire()
+
+    asyncio.run(run())
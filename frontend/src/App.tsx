@@ -26,7 +26,8 @@ function Landing() {
     
     setIsLoading(true)
     try {
-      const data = await searchArticles(q.trim())
+      // Render articles as they stream in, then settle on the final response
+      const data = await searchArticles(q.trim(), undefined, setSearchResults)
       setSearchResults(data)
       
       // Cache the articles for potential game use
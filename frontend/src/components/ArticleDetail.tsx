@@ -18,13 +18,13 @@ export default function ArticleDetail() {
   if (!detail) return <div className="p-6 text-center text-gray-600">Loading...</div>
 
   const d = detail.bias_dimensions
-  const data = [
+  const data = d ? [
     { key: 'Factuality', value: d.factuality },
     { key: 'Economic', value: d.economic },
     { key: 'Social', value: d.social },
     { key: 'Establishment', value: d.establishment },
     { key: 'Sensationalism', value: d.sensationalism },
-  ]
+  ] : []
 
   return (
     <div className="max-w-5xl mx-auto p-6">
@@ -35,14 +35,20 @@ export default function ArticleDetail() {
 
       <div className="grid md:grid-cols-2 gap-8">
         <div className="h-80 bg-white rounded-lg shadow p-4">
-          <ResponsiveContainer width="100%" height="100%">
-            <RadarChart data={data} outerRadius="70%">
-              <PolarGrid />
-              <PolarAngleAxis dataKey="key" />
-              <PolarRadiusAxis angle={30} domain={[-1, 1]} />
-              <Radar dataKey="value" stroke="#2563eb" fill="#3b82f6" fillOpacity={0.4} />
-            </RadarChart>
-          </ResponsiveContainer>
+          {d ? (
+            <ResponsiveContainer width="100%" height="100%">
+              <RadarChart data={data} outerRadius="70%">
+                <PolarGrid />
+                <PolarAngleAxis dataKey="key" />
+                <PolarRadiusAxis angle={30} domain={[-1, 1]} />
+                <Radar dataKey="value" stroke="#2563eb" fill="#3b82f6" fillOpacity={0.4} />
+              </RadarChart>
+            </ResponsiveContainer>
+          ) : (
+            <div className="h-full flex items-center justify-center text-sm text-gray-500">
+              Spectrum score {detail.article.spectrum_score.toFixed(2)} ({detail.article.method})
+            </div>
+          )}
         </div>
         <div className="bg-white rounded-lg shadow p-4">
           <h2 className="font-semibold mb-2">Highlighted Phrases</h2>
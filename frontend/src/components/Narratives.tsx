@@ -4,7 +4,7 @@ import type { Article } from '../lib'
 import { getNarratives } from '../lib'
 import type { Narrative } from '../lib'
 export default function Narratives() {
-  const [narratives, setNarratives] = useState<Narrative[]>([])
+  const [narratives, setNarratives] = useState<Narrative[] | null>(null)
   const [articles, setArticles] = useState<Record<string, Article>>({})
   const [error, setError] = useState<string | null>(null)
 
@@ -18,7 +18,10 @@ export default function Narratives() {
   }, [])
 
   if (error) return <div className="p-6 text-center text-red-600">{error}</div>
-  if (!narratives.length) return <div className="p-6 text-center text-gray-600">Loading...</div>
+  if (!narratives) return <div className="p-6 text-center text-gray-600">Loading...</div>
+  if (!narratives.length) {
+    return <div className="p-6 text-center text-gray-600">No narratives yet. They form as searches bring in related coverage.</div>
+  }
 
   return (
     <div className="max-w-6xl mx-auto p-6">
@@ -22,7 +22,26 @@ export type SearchResponse = {
     success_rate?: number
     rate_limited?: boolean
     quota_exceeded?: boolean
+    served_from?: 'live' | 'cache' | 'index'
   }
+  // Speculative searches (?speculative=true): unknown outlets are refined in the background
+  refinement?: RefinementJob | null
+  // Pass to searchMore() for the next page; null when there is nothing more
+  cursor?: string | null
+}
+
+export type SearchPage = {
+  query: string
+  articles: Article[]
+  page: number
+  cursor: string | null
+}
+
+export type RefinementJob = {
+  job: string
+  status: 'queued' | 'running' | 'done' | 'failed'
+  pending: number
+  poll: string
 }
 
 export type APIStatus = {
@@ -34,6 +53,32 @@ export type APIStatus = {
   last_error: any
   last_request_time: string | null
   api_configured: boolean
+  classification_cache?: {
+    entries: number
+    hits: number
+    durable_hits: number
+    misses: number
+    hit_rate: number
+    writes: number
+    errors: number
+    durable_tier: string | null
+  }
+  upstreams?: Record<string, {
+    state: 'closed' | 'open' | 'half_open'
+    reason: string | null
+    retry_in_seconds: number
+    consecutive_failures: number
+    quota_used_today: number
+    daily_quota: number | null
+    rejected: number
+  }>
+  ingestion?: {
+    running: boolean
+    interval_seconds: number
+    popular_queries: string[]
+    cycles: number
+    last_cycle: { warmed: number; empty: number; skipped: number; seconds: number } | null
+  }
 }
 
 // Resolve API base: Use relative path in production, localhost in dev
@@ -47,9 +92,60 @@ console.log('🔍 API Configuration:', {
   NODE_ENV: import.meta.env.NODE_ENV
 })
 
-export async function searchArticles(query: string, signal?: AbortSignal): Promise<SearchResponse> {
+// Frames emitted by /search?stream=1 (one JSON object per line)
+export type SearchStreamFrame =
+  | { type: 'article'; article: Article }
+  | {
+      type: 'classification'
+      id: string
+      spectrum_score: number
+      confidence: number
+      method: Article['method']
+      reasoning?: string | null
+    }
+  | {
+      type: 'done'
+      query: string
+      count: number
+      cached: boolean
+      cursor?: string | null
+      error?: string
+      api_status?: SearchResponse['api_status']
+    }
+
+function applyFrame(response: SearchResponse, frame: SearchStreamFrame): SearchResponse {
+  switch (frame.type) {
+    case 'article':
+      return { ...response, articles: [...response.articles, frame.article] }
+    case 'classification':
+      return {
+        ...response,
+        articles: response.articles.map((a) =>
+          a.id === frame.id
+            ? { ...a, spectrum_score: frame.spectrum_score, confidence: frame.confidence, method: frame.method, reasoning: frame.reasoning }
+            : a
+        ),
+      }
+    case 'done':
+      if (frame.error) {
+        return {
+          ...response,
+          cursor: null,
+          api_status: { ...frame.api_status, error: frame.error, message: 'The search failed. Please try again.' },
+        }
+      }
+      return { ...response, api_status: frame.api_status, cursor: frame.cursor }
+  }
+}
+
+export async function searchArticles(
+  query: string,
+  signal?: AbortSignal,
+  onProgress?: (partial: SearchResponse) => void
+): Promise<SearchResponse> {
   const url = new URL('/search', API_BASE)
   url.searchParams.set('q', query)
+  url.searchParams.set('stream', '1')
   
   console.log('🌐 Making API request to:', url.toString())
   
@@ -59,7 +155,28 @@ export async function searchArticles(query: string, signal?: AbortSignal): Promi
     if (!res.ok) {
       throw new Error(`Search failed: ${res.status} ${res.statusText}`)
     }
-    return res.json()
+    // Older backends ignore ?stream and answer with a single JSON document
+    if (!res.body || !res.headers.get('Content-Type')?.includes('ndjson')) {
+      return res.json()
+    }
+    
+    let response: SearchResponse = { query, articles: [] }
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffered = ''
+    for (;;) {
+      const { done, value } = await reader.read()
+      buffered += decoder.decode(value, { stream: !done })
+      const lines = buffered.split('\n')
+      buffered = done ? '' : lines.pop() ?? ''
+      for (const line of lines) {
+        if (!line.trim()) continue
+        response = applyFrame(response, JSON.parse(line) as SearchStreamFrame)
+      }
+      if (lines.length) onProgress?.(response)
+      if (done) break
+    }
+    return response
   } catch (error) {
     if (error instanceof Error && error.name === 'AbortError') {
       throw error
@@ -69,6 +186,28 @@ export async function searchArticles(query: string, signal?: AbortSignal): Promi
   }
 }
 
+// AI scores resolved by a speculative search's refinement job since cursor `since`
+export async function getRefinements(
+  job: string,
+  since = 0
+): Promise<RefinementJob & { query: string; refinements: Extract<SearchStreamFrame, { type: 'classification' }>[]; next: number }> {
+  const url = new URL(`/search/${job}/refinements`, API_BASE)
+  url.searchParams.set('since', String(since))
+  const res = await fetch(url.toString())
+  if (!res.ok) throw new Error(`Refinement poll failed: ${res.status}`)
+  return res.json()
+}
+
+// "Load more": the next page after `cursor` (from a search or the previous page).
+// The backend fetches and classifies only articles no earlier page had.
+export async function searchMore(cursor: string, signal?: AbortSignal): Promise<SearchPage> {
+  const url = new URL('/search/more', API_BASE)
+  url.searchParams.set('cursor', cursor)
+  const res = await fetch(url.toString(), { signal })
+  if (!res.ok) throw new Error(`Loading more results failed: ${res.status}`)
+  return res.json()
+}
+
 export async function getAPIStatus(): Promise<APIStatus> {
   const url = new URL('/api-status', API_BASE)
   
@@ -96,8 +235,9 @@ export type BiasDimensions = {
 export type ArticleDetail = {
   id: string
   article: Article
-  bias_dimensions: BiasDimensions
+  bias_dimensions: BiasDimensions | null  // null until the article has been scored per dimension
   highlighted_phrases: { text: string; dimension: string }[]
+  dimensions_method?: 'ai' | 'lexicon' | null
 }
 
 export type Narrative = {